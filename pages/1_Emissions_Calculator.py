@@ -4,8 +4,14 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 from utils.calculations import calculate_emissions
+from utils.cloud import calculate_cloud_emissions
+from utils.decomposition import INVENTORY_COLUMNS, inventory_rows, decompose_inventories
+from utils.fleet import calculate_fleet_emissions
+from utils.imputation import impute_portfolio, get_facility_inputs, retain_quality_flags
+from utils.meter_data import load_meter_reads, ingest_meter_reads, get_meter_totals, get_calculator_inputs
+from utils.refrigerants import load_equipment_inventory, calculate_refrigerant_leakage, summarize_refrigerant_emissions
 from utils.reports import generate_report
-from utils.visualization import create_emissions_pie_chart, create_emissions_bar_chart
+from utils.visualization import create_emissions_pie_chart, create_emissions_bar_chart, create_decomposition_waterfall
 import os
 
 st.set_page_config(
@@ -71,6 +77,45 @@ with tabs[0]:
         marine_fuel = st.number_input("Marine Fuel (liters)", min_value=0.0, 
                                      value=float(st.session_state.emissions_data['scope1'].get('marine_fuel', 0)))
 
+    # Fleet telematics import
+    with st.expander("Import Fleet Telematics Data"):
+        st.markdown("""
+        Upload a vehicle table (`vehicle_id`, `vehicle_class`) and one or more trip exports
+        (`vehicle_id`, `distance_km`, `fuel_liters`). Fuel totals by fuel type replace the
+        gasoline and vehicle diesel inputs above.
+        """)
+        vehicle_file = st.file_uploader("Vehicle Table (CSV)", type=["csv"])
+        trip_files = st.file_uploader("Trip Records (CSV)", type=["csv"], accept_multiple_files=True)
+        fleet_method = st.radio(
+            "Fleet Calculation Method",
+            ["Fuel-based", "Distance-based"],
+            help="Fuel-based uses reported fuel and falls back to distance when fuel is missing"
+        )
+
+        if vehicle_file is not None and trip_files and st.button("Process Trip Records"):
+            try:
+                fleet_results = calculate_fleet_emissions(
+                    trip_files,
+                    pd.read_csv(vehicle_file),
+                    method="fuel" if fleet_method == "Fuel-based" else "distance"
+                )
+                st.session_state.fleet_results = fleet_results
+            except ValueError as e:
+                st.error(str(e))
+
+        if 'fleet_results' in st.session_state:
+            fleet_results = st.session_state.fleet_results
+            st.dataframe(fleet_results['per_class'], use_container_width=True)
+            if fleet_results['unmatched_trips']:
+                st.warning(f"{fleet_results['unmatched_trips']:,} trips did not match a vehicle in the vehicle table")
+
+            if st.button("Use Fleet Totals"):
+                st.session_state.emissions_data['scope1'].update({
+                    'gasoline': fleet_results['scope1_inputs'].get('gasoline', 0.0),
+                    'diesel_mobile': fleet_results['scope1_inputs'].get('diesel_mobile', 0.0)
+                })
+                st.rerun()
+
     # Refrigerants and process emissions
     st.markdown("#### Refrigerants and Process Emissions")
     col1, col2 = st.columns(2)
@@ -87,7 +132,41 @@ with tabs[0]:
         other_direct = st.number_input("Other Direct Emissions (tCO2e)", min_value=0.0, 
                                        value=float(st.session_state.emissions_data['scope1'].get('other_direct', 0)))
     
+    # Refrigeration equipment inventory import
+    with st.expander("Import Refrigeration Equipment Inventory"):
+        st.markdown("""
+        Upload an equipment inventory with columns `unit_id`, `site`, `gas`, `equipment_type` and
+        `charge_kg`. Add `serviced_kg`, `new_charge_kg`, `new_capacity_kg`, `retired_capacity_kg`
+        and `recovered_kg` to use the mass-balance method; units without servicing records use the
+        screening method. Leave the R-22 and R-410A inputs above at zero for gases covered here.
+        """)
+        inventory_file = st.file_uploader("Equipment Inventory (CSV)", type=["csv"])
+        leakage_method = st.selectbox(
+            "Leakage Method",
+            ["Automatic", "Mass balance", "Screening"]
+        )
+
+        if inventory_file is not None and st.button("Calculate Refrigerant Leakage"):
+            try:
+                unit_results = calculate_refrigerant_leakage(
+                    load_equipment_inventory(inventory_file),
+                    method={"Automatic": "auto", "Mass balance": "mass_balance", "Screening": "screening"}[leakage_method]
+                )
+                st.session_state.refrigerant_summary = summarize_refrigerant_emissions(unit_results)
+            except ValueError as e:
+                st.error(str(e))
+
+        if 'refrigerant_summary' in st.session_state:
+            refrigerant_summary = st.session_state.refrigerant_summary
+            st.metric("Refrigerant Emissions", f"{refrigerant_summary['total_emissions']:.2f} tCO2e")
+            st.dataframe(refrigerant_summary['by_site_gas'], use_container_width=True)
+
+            if st.button("Use Inventory Results"):
+                st.session_state.emissions_data['scope1']['refrigerant_inventory'] = refrigerant_summary['scope1_input']
+                st.rerun()
+    
     if st.button("Save Scope 1 Data"):
+        previous_scope1 = st.session_state.emissions_data['scope1']
         st.session_state.emissions_data['scope1'] = {
             'natural_gas': natural_gas,
             'diesel_stationary': diesel_stationary,
@@ -101,8 +180,15 @@ with tabs[0]:
             'refrigerant_r22': refrigerant_r22,
             'refrigerant_r410a': refrigerant_r410a,
             'process_emissions': process_emissions,
-            'other_direct': other_direct
+            'other_direct': other_direct,
+            'refrigerant_inventory': st.session_state.emissions_data['scope1'].get('refrigerant_inventory', {})
         }
+        if 'data_quality' in st.session_state:
+            st.session_state.data_quality['scope1'] = retain_quality_flags(
+                st.session_state.data_quality.get('scope1', {}),
+                previous_scope1,
+                st.session_state.emissions_data['scope1']
+            )
         st.success("Scope 1 emissions data saved successfully!")
 
 # Scope 2 emissions (indirect emissions from purchased energy)
@@ -115,7 +201,38 @@ with tabs[1]:
     
     You can calculate Scope 2 emissions using either the location-based or market-based method.
     """)
-    
+
+    # Interval meter data import
+    with st.expander("Import Interval Meter Data"):
+        st.markdown("""
+        Upload interval meter reads as CSV with columns `meter_id`, `timestamp`, `value` and
+        `energy_type` (`electricity` in kWh or `gas` in m³). Reads are resampled to 15-minute
+        intervals, gaps are filled, and annual totals are used for your calculator inputs.
+        """)
+        meter_file = st.file_uploader("Meter Reads (CSV)", type=["csv"])
+
+        if meter_file is not None and st.button("Ingest Meter Data"):
+            try:
+                summary = ingest_meter_reads(load_meter_reads(meter_file))
+                st.success(f"Ingested {summary['intervals']:,} intervals from {summary['meters']} meters "
+                           f"({summary['estimated_share']*100:.1f}% gap-filled)")
+            except ValueError as e:
+                st.error(str(e))
+
+        meter_totals = get_meter_totals(period="month", year=st.session_state.company_data['year'])
+        if not meter_totals.empty:
+            monthly_totals = meter_totals.groupby(['energy_type', 'month'], as_index=False)['value'].sum()
+            st.dataframe(
+                monthly_totals.pivot(index='month', columns='energy_type', values='value'),
+                use_container_width=True
+            )
+
+            if st.button("Use Meter Totals"):
+                meter_inputs = get_calculator_inputs(st.session_state.company_data['year'])
+                st.session_state.emissions_data['scope1'].update(meter_inputs['scope1'])
+                st.session_state.emissions_data['scope2'].update(meter_inputs['scope2'])
+                st.rerun()
+
     calculation_method = st.radio(
         "Calculation Method",
         ["Location-based", "Market-based"], 
@@ -181,6 +298,12 @@ with tabs[1]:
             scope2_data['has_renewable_ppa'] = has_renewable_ppa
             scope2_data['renewable_percentage'] = renewable_percentage if has_renewable_ppa else 0
         
+        if 'data_quality' in st.session_state:
+            st.session_state.data_quality['scope2'] = retain_quality_flags(
+                st.session_state.data_quality.get('scope2', {}),
+                st.session_state.emissions_data['scope2'],
+                scope2_data
+            )
         st.session_state.emissions_data['scope2'] = scope2_data
         st.success("Scope 2 emissions data saved successfully!")
 
@@ -256,7 +379,36 @@ with tabs[2]:
         investments = st.number_input("15. Investments ($ USD)", min_value=0.0,
                                     value=float(st.session_state.emissions_data['scope3'].get('investments', 0)))
     
+    # Cloud billing import
+    with st.expander("Import Cloud Billing Export"):
+        st.markdown("""
+        Upload cloud usage exports (CSV or JSON lines) with columns `account_id`, `service`, `region`,
+        `usage_type`, `usage_date` and `usage_amount`. Supported usage types are compute (vCPU-hours),
+        gpu (GPU-hours), memory (GB-hours), storage_ssd and storage_hdd (TB-hours) and networking (GB).
+        Cloud emissions are reported as their own Scope 3 category.
+        """)
+        cloud_files = st.file_uploader("Cloud Usage Exports", type=["csv", "jsonl", "json"], accept_multiple_files=True)
+
+        if cloud_files and st.button("Process Cloud Usage"):
+            try:
+                cloud_results = calculate_cloud_emissions(cloud_files)
+                st.session_state.cloud_results = cloud_results
+            except ValueError as e:
+                st.error(str(e))
+
+        if 'cloud_results' in st.session_state:
+            cloud_results = st.session_state.cloud_results
+            st.metric("Cloud Emissions", f"{cloud_results['total_emissions']:.2f} tCO2e")
+            st.dataframe(cloud_results['by_account_service_month'], use_container_width=True)
+            if cloud_results['unmapped_records']:
+                st.warning(f"{cloud_results['unmapped_records']:,} records had an unsupported usage type and were skipped")
+
+            if st.button("Use Cloud Results"):
+                st.session_state.emissions_data['scope3']['cloud_services'] = cloud_results['total_emissions']
+                st.rerun()
+    
     if st.button("Save Scope 3 Data"):
+        previous_scope3 = st.session_state.emissions_data['scope3']
         st.session_state.emissions_data['scope3'] = {
             'purchased_goods': purchased_goods,
             'capital_goods': capital_goods,
@@ -273,20 +425,66 @@ with tabs[2]:
             'end_of_life': end_of_life,
             'downstream_leased': downstream_leased,
             'franchises': franchises,
-            'investments': investments
+            'investments': investments,
+            'cloud_services': st.session_state.emissions_data['scope3'].get('cloud_services', 0.0)
         }
+        if 'data_quality' in st.session_state:
+            st.session_state.data_quality['scope3'] = retain_quality_flags(
+                st.session_state.data_quality.get('scope3', {}),
+                previous_scope3,
+                st.session_state.emissions_data['scope3']
+            )
         st.success("Scope 3 emissions data saved successfully!")
 
 # Results tab
 with tabs[3]:
     st.subheader("Emissions Calculation Results")
     
+    # Portfolio data-gap imputation
+    with st.expander("Fill Data Gaps from a Facility Portfolio"):
+        st.markdown("""
+        Upload a facility portfolio with columns `facility_id`, `industry`, `region`, `employees`,
+        `revenue` and any calculator inputs (e.g. `natural_gas`, `purchased_electricity`). Blank inputs
+        are filled from peers in the same industry, region and size band. Imputed values are flagged
+        and carry a data quality score into your results and report.
+        """)
+        portfolio_file = st.file_uploader("Facility Portfolio (CSV)", type=["csv"])
+        imputation_method = st.radio(
+            "Imputation Method",
+            ["Intensity ratio (per revenue)", "Peer median"]
+        )
+
+        if portfolio_file is not None and st.button("Impute Missing Inputs"):
+            try:
+                st.session_state.portfolio_imputation = impute_portfolio(
+                    pd.read_csv(portfolio_file),
+                    method="intensity" if imputation_method.startswith("Intensity") else "median"
+                )
+            except ValueError as e:
+                st.error(str(e))
+
+        if 'portfolio_imputation' in st.session_state:
+            imputation = st.session_state.portfolio_imputation
+            st.dataframe(imputation['summary'], use_container_width=True)
+
+            facility_labels = imputation['values']['facility_id'].astype(str).tolist() \
+                if 'facility_id' in imputation['values'] else [str(i) for i in range(len(imputation['values']))]
+            selected_facility = st.selectbox("Facility", facility_labels)
+
+            if st.button("Load Facility Inputs"):
+                scope_data, data_quality = get_facility_inputs(imputation, facility_labels.index(selected_facility))
+                for scope in ['scope1', 'scope2', 'scope3']:
+                    st.session_state.emissions_data[scope].update(scope_data[scope])
+                st.session_state.data_quality = data_quality
+                st.success(f"Loaded inputs for facility {selected_facility}")
+    
     if st.button("Calculate Total Emissions"):
         # Calculate emissions using the data from all scopes
         emissions_results = calculate_emissions(
             st.session_state.emissions_data['scope1'],
             st.session_state.emissions_data['scope2'],
-            st.session_state.emissions_data['scope3']
+            st.session_state.emissions_data['scope3'],
+            data_quality=st.session_state.get('data_quality')
         )
         
         st.session_state.total_emissions = emissions_results['total']
@@ -300,6 +498,7 @@ with tabs[3]:
         st.session_state.scope1_breakdown = emissions_results['scope1_breakdown']
         st.session_state.scope2_breakdown = emissions_results['scope2_breakdown']
         st.session_state.scope3_breakdown = emissions_results['scope3_breakdown']
+        st.session_state.data_quality_results = emissions_results.get('data_quality')
         
         # Calculate targets
         base_emissions = st.session_state.total_emissions
@@ -327,6 +526,17 @@ with tabs[3]:
                 st.metric("Emissions Intensity", 
                          f"{st.session_state.total_emissions / st.session_state.company_data['revenue']:.2f} tCO2e/million USD")
         
+        data_quality_results = st.session_state.get('data_quality_results')
+        if data_quality_results:
+            imputed_categories = [
+                f"{category} (score {score:.2f})"
+                for scope in ['scope1', 'scope2', 'scope3']
+                for category, score in data_quality_results[scope].items()
+            ]
+            st.metric("Data Quality Score", f"{data_quality_results['overall']:.2f}")
+            if imputed_categories:
+                st.caption("Imputed from peer data: " + ", ".join(imputed_categories))
+        
         st.markdown("### Emissions by Scope")
         
         # Create pie chart for scope breakdown
@@ -372,6 +582,79 @@ with tabs[3]:
         fig_bar = create_emissions_bar_chart(categories, values, scopes)
         st.plotly_chart(fig_bar, use_container_width=True)
         
+        # Year-over-year change decomposition
+        with st.expander("Explain Year-over-Year Change"):
+            st.markdown(f"""
+            Upload inventories with columns `{'`, `'.join(INVENTORY_COLUMNS)}` (one row per entity, year and
+            category; `activity` is the entity's activity level that year, e.g. revenue). The change in emissions
+            is split into activity (overall growth), structure (shift between entities) and intensity
+            (emissions per unit of activity) effects.
+            """)
+            inventory_file = st.file_uploader("Inventories (CSV)", type=["csv"])
+            include_current = st.checkbox(
+                f"Include current results as {st.session_state.company_data['name']} ({st.session_state.company_data['year']})",
+                value=True
+            )
+
+            try:
+                inventory_tables = [pd.read_csv(inventory_file)] if inventory_file is not None else []
+                if include_current:
+                    inventory_tables.append(inventory_rows(
+                        {
+                            'scope1_breakdown': st.session_state.scope1_breakdown,
+                            'scope2_breakdown': st.session_state.scope2_breakdown,
+                            'scope3_breakdown': st.session_state.scope3_breakdown
+                        },
+                        st.session_state.company_data['name'],
+                        st.session_state.company_data['year'],
+                        st.session_state.company_data['revenue']
+                    ))
+
+                inventories = pd.concat(inventory_tables, ignore_index=True) if inventory_tables \
+                    else pd.DataFrame(columns=INVENTORY_COLUMNS)
+                missing = set(INVENTORY_COLUMNS) - set(inventories.columns)
+                if missing:
+                    raise ValueError(f"Inventory is missing required columns: {', '.join(sorted(missing))}")
+                inventories = inventories.assign(year=pd.to_numeric(inventories["year"], errors="coerce")) \
+                    .dropna(subset=["year"]).astype({"year": int})
+
+                inventory_years = sorted(inventories["year"].unique())
+                if len(inventory_years) >= 2:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        decomposition_base_year = st.selectbox("Base Year", inventory_years, index=len(inventory_years) - 2)
+                    with col2:
+                        decomposition_year = st.selectbox("Comparison Year", inventory_years, index=len(inventory_years) - 1)
+
+                    decomposition = decompose_inventories(
+                        inventories, decomposition_base_year, decomposition_year
+                    )
+                    fig_waterfall = create_decomposition_waterfall(
+                        str(decomposition_base_year),
+                        decomposition['total_0'],
+                        decomposition['effects'],
+                        str(decomposition_year),
+                        decomposition['total_1'],
+                        title=f"Drivers of Emissions Change ({decomposition_base_year} to {decomposition_year})"
+                    )
+                    st.plotly_chart(fig_waterfall, use_container_width=True)
+
+                    st.markdown("#### Effects by Entity")
+                    st.dataframe(decomposition['entity_table'].rename(columns={
+                        'emissions_0': f"Emissions {decomposition_base_year} (tCO2e)",
+                        'emissions_1': f"Emissions {decomposition_year} (tCO2e)",
+                        'activity': "Activity Effect",
+                        'structure': "Structure Effect",
+                        'intensity': "Intensity Effect"
+                    }).round(2), use_container_width=True)
+
+                    st.markdown("#### Intensity Effect by Category")
+                    st.dataframe(decomposition['category_table'].round(2), use_container_width=True)
+                else:
+                    st.info("Provide inventories for at least two years to decompose the change.")
+            except ValueError as e:
+                st.error(str(e))
+        
         # Generate and download report
         st.markdown("### Emissions Report")
         if st.button("Generate Emissions Report PDF"):
@@ -383,7 +666,8 @@ with tabs[3]:
                 st.session_state.scope1_breakdown,
                 st.session_state.scope2_breakdown,
                 st.session_state.scope3_breakdown,
-                st.session_state.targets
+                st.session_state.targets,
+                data_quality=st.session_state.get('data_quality_results')
             )
             
             # Provide download link (in a real app this would be a file download)
@@ -4,6 +4,13 @@ import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from utils.constants import REDUCTION_TARGETS, SCOPE_TARGET_SPLITS
+from utils.carbon_budget import solve_budget_pathways
+from utils.forecast import BAU_SCENARIOS, sample_driver_scenarios, project_bau_emissions, calculate_target_gap
+from utils.data_processing import calculate_annual_reduction_pathway
+from utils.monitoring import create_tracker, update_tracker, evaluate_progress
+from utils.scenarios import run_target_sweep
+from utils.visualization import create_reduction_pathway_chart, create_sweep_heatmap, create_sweep_small_multiples
 
 st.set_page_config(
     page_title="Reduction Targets",
@@ -93,23 +100,9 @@ with col3:
 # Reduction trajectory
 st.markdown("### Emissions Reduction Trajectory")
 
-# Generate years from current to 2050
-years = list(range(current_year, 2051))
-emissions = []
-
-# Calculate emissions for each year
-for year in years:
-    if year == current_year:
-        emissions.append(base_emissions)
-    else:
-        # Linear reduction until net zero year
-        if year < net_zero_year:
-            years_passed = year - current_year
-            reduction = min(years_passed * annual_reduction / 100 * base_emissions, base_emissions)
-            emissions.append(max(base_emissions - reduction, 0))
-        else:
-            # Net zero after target year
-            emissions.append(0)
+# Linear reduction from current year until net zero year, then net zero through 2050
+years, pathway = calculate_annual_reduction_pathway(base_emissions, annual_reduction, net_zero_year, current_year, 2050)
+emissions = pathway[0]
 
 # Create dataframe for plotting
 df = pd.DataFrame({
@@ -158,6 +151,280 @@ fig.update_layout(
 
 st.plotly_chart(fig, use_container_width=True)
 
+# Carbon budget pathway
+st.markdown("### Carbon Budget Pathway")
+st.markdown("""
+Find the pathway that stays within a cumulative carbon budget and reaches net zero by your net zero year,
+without cutting more than a set share of base emissions in any single year.
+""")
+
+col1, col2 = st.columns(2)
+with col1:
+    carbon_budget = st.number_input(
+        "Cumulative Carbon Budget (tCO2e)",
+        min_value=0.0,
+        value=float(round(sum(emissions[:max(net_zero_year - current_year, 1)]), 2))
+    )
+with col2:
+    max_annual_cut = st.slider("Maximum Annual Cut (% of base emissions)", 1.0, 50.0, 10.0)
+
+budget_pathway = solve_budget_pathways(
+    base_emissions,
+    carbon_budget,
+    net_zero_year,
+    max_annual_cut / 100,
+    base_year=current_year
+)
+
+if not budget_pathway['reaches_net_zero'][0]:
+    st.warning(f"A maximum cut of {max_annual_cut:.0f}% per year cannot reach net zero by {net_zero_year}.")
+elif not budget_pathway['within_budget'][0]:
+    st.warning("The budget cannot be met within the maximum annual cut. Showing the steepest allowed pathway.")
+else:
+    st.success(f"Budget met with cumulative emissions of {budget_pathway['cumulative_emissions'][0]:,.2f} tCO2e "
+               f"and a largest annual cut of {budget_pathway['largest_annual_cut'][0]*100:.1f}% of base emissions.")
+
+fig_budget = create_reduction_pathway_chart(
+    current_year,
+    base_emissions,
+    2030,
+    st.session_state.targets['2030'],
+    budget_years=budget_pathway['years'],
+    budget_emissions=budget_pathway['emissions'][0]
+)
+st.plotly_chart(fig_budget, use_container_width=True)
+
+# Scenario sweep across reduction levels, target years, frameworks and scope splits
+st.markdown("### Target Scenario Sweep")
+st.markdown("""
+Compare a full grid of target choices at once: every reduction level from 0% to 100% and every target year,
+under each science-based framework's post-target pathway and a choice of scope splits.
+""")
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    sweep_step = st.select_slider("Reduction Step (%)", [1, 2, 5, 10], value=5)
+with col2:
+    sweep_split = st.selectbox("Scope Split", list(SCOPE_TARGET_SPLITS.keys()))
+with col3:
+    sweep_metric = st.selectbox("Heatmap Metric", ["Cumulative Emissions to 2050", "Target Year Emissions"])
+
+sweep_frameworks = list(REDUCTION_TARGETS.keys())
+sweep_target_years = list(range(current_year + 1, 2051))
+sweep = run_target_sweep(
+    st.session_state.emissions_by_scope,
+    np.arange(0, 100 + sweep_step, sweep_step),
+    sweep_target_years,
+    frameworks=sweep_frameworks,
+    base_year=current_year
+)
+split_index = sweep['splits'].index(sweep_split)
+
+heatmap_framework = st.selectbox("Heatmap Framework", sweep_frameworks)
+framework_index = sweep_frameworks.index(heatmap_framework)
+metric_values = sweep['cumulative_emissions'] if sweep_metric.startswith("Cumulative") else sweep['target_emissions']
+
+fig_heatmap = create_sweep_heatmap(
+    metric_values[:, :, framework_index, split_index],
+    sweep['reductions'],
+    sweep['target_years'],
+    f"{sweep_metric} - {heatmap_framework}, {sweep_split}",
+    colorbar_title="tCO2e"
+)
+st.plotly_chart(fig_heatmap, use_container_width=True)
+
+multiples_year = st.select_slider("Target Year for Pathway Comparison", sweep_target_years, value=min(2030, sweep_target_years[-1]))
+multiples_reductions = [r for r in [25, 50, 75, 100] if r in sweep['reductions']]
+reduction_positions = [int(np.flatnonzero(sweep['reductions'] == r)[0]) for r in multiples_reductions]
+fig_multiples = create_sweep_small_multiples(
+    sweep['years'],
+    sweep['emissions'][reduction_positions, sweep_target_years.index(multiples_year), :, split_index, :],
+    [f"{r}%" for r in multiples_reductions],
+    sweep_frameworks,
+    f"Pathways by Framework (target year {multiples_year}, {sweep_split})"
+)
+st.plotly_chart(fig_multiples, use_container_width=True)
+
+# Business-as-usual forecast and gap to target
+st.markdown("### Business-as-Usual Forecast")
+st.markdown("""
+Project where emissions go without new reduction actions. Each emission category grows with its business
+driver (revenue or headcount) and improves in intensity at its own rate. Thousands of growth scenarios are
+sampled around your assumptions to show the range of outcomes and the gap your reduction plan must close.
+""")
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    revenue_growth = st.slider("Annual Revenue Growth (%)", -5.0, 20.0, 3.0)
+with col2:
+    employee_growth = st.slider("Annual Headcount Growth (%)", -5.0, 20.0, 1.0)
+with col3:
+    growth_volatility = st.slider("Growth Uncertainty (% std. dev.)", 0.0, 10.0, 2.0)
+
+bau_categories = []
+bau_base = []
+for breakdown_key in ['scope1_breakdown', 'scope2_breakdown', 'scope3_breakdown']:
+    for category, value in st.session_state.get(breakdown_key, {}).items():
+        bau_categories.append(category)
+        bau_base.append(value)
+
+if not bau_categories:
+    bau_categories = ['Total']
+    bau_base = [base_emissions]
+
+driver_scenarios = sample_driver_scenarios(
+    revenue_growth / 100,
+    employee_growth / 100,
+    growth_volatility / 100,
+    BAU_SCENARIOS,
+    seed=0
+)
+driver_scenarios[0, :2] = [revenue_growth / 100, employee_growth / 100]
+
+bau = project_bau_emissions(
+    np.array([bau_base]),
+    bau_categories,
+    driver_scenarios,
+    base_year=current_year,
+    start_year=current_year,
+    end_year=2050
+)
+bau_total = bau['total'][0]
+bau_central = bau_total[0]
+bau_low, bau_high = np.percentile(bau_total, [10, 90], axis=0)
+
+gap = calculate_target_gap(bau_total, emissions)
+target_2030_index = 2030 - current_year
+
+fig_bau = go.Figure()
+fig_bau.add_trace(go.Scatter(
+    x=np.concatenate([bau['years'], bau['years'][::-1]]),
+    y=np.concatenate([bau_high, bau_low[::-1]]),
+    fill='toself',
+    fillcolor='rgba(231, 76, 60, 0.15)',
+    line=dict(color='rgba(0, 0, 0, 0)'),
+    name='BAU Range (P10-P90)'
+))
+fig_bau.add_trace(go.Scatter(x=bau['years'], y=bau_central, mode='lines', name='Business as Usual', line=dict(color='#e74c3c')))
+fig_bau.add_trace(go.Scatter(x=years, y=emissions, mode='lines', name='Target Pathway', line=dict(color='#2ecc71')))
+fig_bau.update_layout(
+    title=f"Business-as-Usual vs Target Pathway ({current_year}-2050)",
+    xaxis_title="Year",
+    yaxis_title="Emissions (tCO2e)",
+    plot_bgcolor="white"
+)
+st.plotly_chart(fig_bau, use_container_width=True)
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric(
+        "BAU Emissions in 2030",
+        f"{bau_central[target_2030_index]:,.2f} tCO2e",
+        f"{(bau_central[target_2030_index] / base_emissions - 1) * 100 if base_emissions > 0 else 0:+.1f}% vs base",
+        delta_color="inverse"
+    )
+with col2:
+    st.metric(
+        "Gap to Target in 2030",
+        f"{gap['annual_gap'][0, target_2030_index]:,.2f} tCO2e",
+        f"P90: {np.percentile(gap['annual_gap'][:, target_2030_index], 90):,.2f} tCO2e",
+        delta_color="off"
+    )
+with col3:
+    st.metric(
+        "Cumulative Gap to 2050",
+        f"{gap['cumulative_gap'][0]:,.2f} tCO2e",
+        f"P90: {np.percentile(gap['cumulative_gap'], 90):,.2f} tCO2e",
+        delta_color="off"
+    )
+
+revenue = st.session_state.company_data.get('revenue', 0)
+if revenue > 0:
+    revenue_path = revenue * (1 + revenue_growth / 100) ** (bau['years'] - current_year)
+    st.info(f"BAU emissions intensity moves from {bau_central[0] / revenue:,.2f} to "
+            f"{bau_central[-1] / revenue_path[-1]:,.2f} tCO2e per $M revenue by 2050.")
+
+# Progress monitoring with rolling 12-month totals
+st.markdown("### Progress Monitoring")
+st.markdown(f"""
+Track monthly actuals against your {reduction_by_2030}% by 2030 trajectory. Each upload is added to running
+12-month totals per entity and scope, so new months can be ingested without reprocessing history. Entities
+whose last 12 months exceed the trajectory are flagged.
+""")
+
+with st.expander("Ingest Monthly Actuals"):
+    st.markdown("""
+    Upload a CSV with columns `entity_id`, `month` (YYYY-MM) and `scope1`, `scope2`, `scope3` in tCO2e.
+    An optional `base_emissions` column sets each entity's base year emissions; otherwise entities are
+    compared with your organization's base year emissions. Re-uploading a month replaces its values.
+    """)
+    actuals_file = st.file_uploader("Monthly Actuals (CSV)", type=["csv"])
+    if actuals_file is not None and st.button("Ingest Actuals"):
+        try:
+            actuals = pd.read_csv(actuals_file)
+            tracker = st.session_state.get('progress_tracker') or create_tracker()
+            st.session_state.progress_tracker = update_tracker(tracker, actuals)
+            if 'base_emissions' in actuals.columns:
+                baselines = st.session_state.get('progress_baselines', {})
+                baselines.update(actuals.groupby(actuals['entity_id'].astype(str))['base_emissions'].first().to_dict())
+                st.session_state.progress_baselines = baselines
+            st.success(f"Ingested {len(actuals):,} rows of actuals")
+        except ValueError as e:
+            st.error(str(e))
+
+    if st.session_state.get('progress_tracker') and st.button("Clear Actuals"):
+        st.session_state.progress_tracker = None
+        st.session_state.progress_baselines = {}
+
+if st.session_state.get('progress_tracker'):
+    tracker = st.session_state.progress_tracker
+    baselines = {entity_id: base_emissions for entity_id in tracker['entity_ids']}
+    baselines.update(st.session_state.get('progress_baselines', {}))
+
+    drift_tolerance = st.slider("Drift Tolerance (% above trajectory)", 0.0, 25.0, 5.0)
+    progress = evaluate_progress(
+        tracker,
+        baselines,
+        reduction_by_2030,
+        2030,
+        base_year=current_year,
+        tolerance=drift_tolerance / 100
+    )
+
+    status_counts = progress['status'].value_counts()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Entities Tracked", f"{len(progress):,}")
+    with col2:
+        st.metric("On Track", f"{status_counts.get('On Track', 0):,}")
+    with col3:
+        st.metric("At Risk", f"{status_counts.get('At Risk', 0):,}")
+    with col4:
+        st.metric("Off Track", f"{status_counts.get('Off Track', 0):,}")
+
+    status_filter = st.multiselect(
+        "Show Entities",
+        ["Off Track", "At Risk", "On Track", "Insufficient Data", "No Baseline"],
+        default=["Off Track", "At Risk"]
+    )
+    st.dataframe(
+        progress[progress['status'].isin(status_filter)].sort_values('gap', ascending=False).rename(columns={
+            'entity_id': "Entity",
+            'window_end': "12 Months Ending",
+            'months_covered': "Months Covered",
+            'scope1': "Scope 1 (tCO2e)",
+            'scope2': "Scope 2 (tCO2e)",
+            'scope3': "Scope 3 (tCO2e)",
+            'total': "Rolling Total (tCO2e)",
+            'expected': "Trajectory (tCO2e)",
+            'gap': "Gap (tCO2e)",
+            'gap_percent': "Gap (%)",
+            'status': "Status"
+        }).round(2),
+        use_container_width=True,
+        hide_index=True
+    )
+
 # Scope-based targets
 st.markdown("### Targets by Emission Scope")
 st.markdown("""
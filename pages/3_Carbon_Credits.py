@@ -1,8 +1,18 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import numpy as np
 from datetime import datetime
+from utils.constants import CARBON_CREDIT_TYPES, CREDIT_REVERSAL_RISK
+from utils.credit_portfolio import market_listings, prepare_catalog, optimize_credit_portfolio
+from utils.credit_prices import PRICE_MODELS, SIMULATION_PATHS, simulate_credit_prices, offset_spend
+from utils.credit_ledger import create_ledger, load_ledger, save_ledger, apply_transactions, find_intervals, \
+    ledger_frame, reconcile_retirements
+from utils.credit_allocation import ALLOCATION_RULES, allocate_credits
+from utils.reversal_risk import REVERSAL_SIMULATIONS, DEFAULT_CONFIDENCE, DEFAULT_EVENT_CORRELATION, \
+    simulate_reversals, reversal_summary
+from utils.data_processing import calculate_target_trajectories
 
 st.set_page_config(
     page_title="Carbon Credits Marketplace",
@@ -52,14 +62,8 @@ with col3:
 # Carbon credit price estimator
 st.markdown("### Estimated Costs")
 
-# Define different credit types and price ranges
-credit_types = {
-    "Renewable Energy": {"min_price": 3, "max_price": 15, "avg_price": 8},
-    "Forestry & Conservation": {"min_price": 5, "max_price": 25, "avg_price": 12},
-    "Methane Capture": {"min_price": 6, "max_price": 20, "avg_price": 10},
-    "Energy Efficiency": {"min_price": 4, "max_price": 18, "avg_price": 9},
-    "Direct Air Capture": {"min_price": 50, "max_price": 500, "avg_price": 100}
-}
+# Credit types and price ranges
+credit_types = CARBON_CREDIT_TYPES
 
 credit_selection = st.radio(
     "Select Carbon Credit Type",
@@ -119,6 +123,450 @@ fig.update_layout(
 
 st.plotly_chart(fig, use_container_width=True)
 
+# Least-cost credit portfolio under purchasing constraints
+st.markdown("### Credit Portfolio Optimizer")
+st.markdown(f"""
+Buy the {offset_amount:,.2f} tCO2e of credits needed at the lowest cost while meeting your portfolio rules:
+a minimum share of carbon removals, a cap on any one credit type, an allowed vintage window and a budget.
+Spot market credits are priced at the average price of each type; upload a catalog of listings to optimize
+over actual offers.
+""")
+
+with st.expander("Credit Catalog"):
+    st.markdown("""
+    Upload a CSV with columns `listing_id`, `credit_type`, `vintage`, `price` (USD/tCO2e) and `quantity` (tCO2e).
+    An optional `removal` column (true/false) marks removal credits; otherwise the credit type decides.
+    """)
+    catalog_file = st.file_uploader("Credit Listings (CSV)", type=["csv"])
+    include_market = st.checkbox("Include spot market credits", value=True)
+
+current_year = datetime.now().year
+catalog_key = ((catalog_file.name, catalog_file.size) if catalog_file is not None else None, include_market)
+if st.session_state.get('credit_solver_key') != catalog_key:
+    try:
+        catalogs = [pd.read_csv(catalog_file)] if catalog_file is not None else []
+        if include_market or not catalogs:
+            catalogs.append(market_listings(current_year))
+        st.session_state.credit_solver = prepare_catalog(pd.concat(catalogs, ignore_index=True))
+        st.session_state.credit_solver_key = catalog_key
+    except ValueError as e:
+        st.error(str(e))
+        st.session_state.credit_solver = prepare_catalog(market_listings(current_year))
+        st.session_state.credit_solver_key = None
+
+credit_solver = st.session_state.credit_solver
+vintages = credit_solver['vintage']
+
+col1, col2 = st.columns(2)
+with col1:
+    min_removal_share = st.slider("Minimum Removal Share (%)", 0, 100, 10)
+    max_type_share = st.slider("Maximum Share of Any Credit Type (%)", 10, 100, 50)
+with col2:
+    credit_budget = st.number_input("Budget (USD)", min_value=0.0, value=float(round(offset_amount * 25, -2)), step=1000.0)
+    if vintages.min() < vintages.max():
+        vintage_window = st.slider("Allowed Vintages", int(vintages.min()), int(vintages.max()), (int(vintages.min()), int(vintages.max())))
+    else:
+        vintage_window = (int(vintages.min()), int(vintages.max()))
+
+credit_mix = optimize_credit_portfolio(
+    credit_solver,
+    offset_amount,
+    min_removal_share=min_removal_share / 100,
+    max_type_share=max_type_share / 100,
+    budget=credit_budget,
+    min_vintage=vintage_window[0],
+    max_vintage=vintage_window[1]
+)
+
+if not credit_mix['feasible']:
+    st.warning(f"{credit_mix['status']}. Showing the closest least-cost mix.")
+
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("Portfolio Cost", f"${credit_mix['total_cost']:,.0f}")
+with col2:
+    st.metric("Average Price", f"${credit_mix['average_price']:,.2f}/tCO2e")
+with col3:
+    st.metric("Removal Share", f"{credit_mix['removal_share'] * 100:.1f}%")
+with col4:
+    st.metric("Removal Premium", f"${credit_mix['removal_premium']:,.2f}/tCO2e",
+              help="Extra cost per tonne of raising the minimum removal share")
+
+if not credit_mix['by_type'].empty:
+    fig_mix = px.bar(
+        credit_mix['by_type'].reset_index(),
+        x="credit_type",
+        y="quantity",
+        color="credit_type",
+        title="Least-Cost Credit Mix by Type",
+        labels={"credit_type": "Credit Type", "quantity": "Credits (tCO2e)"}
+    )
+    fig_mix.update_layout(plot_bgcolor="white", showlegend=False)
+    st.plotly_chart(fig_mix, use_container_width=True)
+
+    st.dataframe(
+        credit_mix['portfolio'].rename(columns={
+            'listing_id': "Listing",
+            'credit_type': "Credit Type",
+            'vintage': "Vintage",
+            'removal': "Removal",
+            'price': "Price (USD/tCO2e)",
+            'quantity': "Credits (tCO2e)",
+            'cost': "Cost (USD)"
+        }).round(2),
+        use_container_width=True
+    )
+
+# Multi-year offset spend under uncertain credit prices
+st.markdown("### Multi-Year Offset Budget")
+st.markdown(f"""
+Offsetting {offset_percentage}% of the residual emissions on your target pathway every year to 2050 exposes
+you to future credit prices. {SIMULATION_PATHS:,} price paths are simulated for the credit types in your
+mix, starting from today's average prices, to show the range of total spend.
+""")
+
+inventory_year = st.session_state.company_data.get('year', current_year)
+target_2030 = st.session_state.targets.get('2030', 0)
+reduction_by_2030 = (1 - target_2030 / total_emissions) * 100 if total_emissions > 0 and target_2030 > 0 else 0
+residual_pathway = calculate_target_trajectories(total_emissions, reduction_by_2030, max(2030, inventory_year + 1),
+                                                 base_year=inventory_year, end_year=2050)
+residual_years = residual_pathway['years']
+residual_emissions = residual_pathway['emissions'][0, 0]
+credit_demand = residual_emissions * offset_percentage / 100
+
+if credit_mix['by_type'].empty:
+    mix_types, mix_shares = [credit_selection], [1.0]
+else:
+    mix_types = [t for t in credit_mix['by_type'].index if t in CARBON_CREDIT_TYPES] or [credit_selection]
+    mix_shares = [credit_mix['by_type']['quantity'].get(t, 1.0) for t in mix_types]
+
+col1, col2 = st.columns(2)
+with col1:
+    price_model = st.selectbox("Price Model", PRICE_MODELS)
+    price_drift = st.slider("Expected Annual Price Growth (%)", -5.0, 15.0, 4.0)
+with col2:
+    price_correlation = st.slider("Price Correlation Between Credit Types", 0.0, 1.0, 0.5)
+    spend_discount_rate = st.slider("Discount Rate for Spend (%)", 0.0, 15.0, 0.0)
+
+simulation_key = (tuple(mix_types), tuple(mix_shares), tuple(credit_demand.round(6)), price_model,
+                  price_drift, price_correlation, spend_discount_rate)
+if st.session_state.get('spend_simulation_key') != simulation_key:
+    credit_price_paths = simulate_credit_prices(
+        mix_types,
+        residual_years,
+        model=price_model,
+        drift=price_drift / 100,
+        correlation=price_correlation,
+        seed=42
+    )
+    st.session_state.spend_simulation = offset_spend(credit_price_paths, mix_shares, credit_demand, spend_discount_rate / 100)
+    st.session_state.spend_simulation_key = simulation_key
+
+spend = st.session_state.spend_simulation
+annual_p5, annual_p25, annual_p50, annual_p75, annual_p95 = spend['annual_percentiles']
+
+fig_spend = go.Figure()
+fig_spend.add_trace(go.Scatter(
+    x=np.concatenate([residual_years, residual_years[::-1]]),
+    y=np.concatenate([annual_p95, annual_p5[::-1]]),
+    fill='toself',
+    fillcolor='rgba(31, 119, 180, 0.12)',
+    line=dict(color='rgba(0, 0, 0, 0)'),
+    name='P5-P95'
+))
+fig_spend.add_trace(go.Scatter(
+    x=np.concatenate([residual_years, residual_years[::-1]]),
+    y=np.concatenate([annual_p75, annual_p25[::-1]]),
+    fill='toself',
+    fillcolor='rgba(31, 119, 180, 0.25)',
+    line=dict(color='rgba(0, 0, 0, 0)'),
+    name='P25-P75'
+))
+fig_spend.add_trace(go.Scatter(x=residual_years, y=annual_p50, mode='lines', name='Median', line=dict(color='#1f77b4')))
+fig_spend.update_layout(
+    title=f"Annual Offset Spend ({residual_years[0]}-{residual_years[-1]})",
+    xaxis_title="Year",
+    yaxis_title="Spend (USD)",
+    plot_bgcolor="white"
+)
+st.plotly_chart(fig_spend, use_container_width=True)
+
+total_label = "Present Value of Spend" if spend_discount_rate > 0 else "Total Spend"
+col1, col2, col3 = st.columns(3)
+for col, percentile, value in zip([col1, col2, col3], [5, 50, 95], spend['total_percentiles'][[0, 2, 4]]):
+    with col:
+        st.metric(f"{total_label} (P{percentile})", f"${value:,.0f}")
+
+st.dataframe(
+    pd.DataFrame({
+        "Percentile": [f"P{p}" for p in spend['percentiles']],
+        f"{total_label} (USD)": spend['total_percentiles'],
+        f"Spend in {residual_years[-1]} (USD)": spend['annual_percentiles'][:, -1]
+    }).round(2),
+    use_container_width=True
+)
+
+# Reversal risk of nature-based credits and the buffer needed to cover it
+st.markdown("### Reversal Risk and Buffer Pool")
+st.markdown(f"""
+Carbon stored by forestry and conservation projects can be released again by fire, pests or land-use change,
+cancelling credits you have already retired. {REVERSAL_SIMULATIONS:,} simulations of reversal events across
+the projects behind your nature-based credits size the buffer of extra credits needed to stay whole.
+""")
+
+nature_type = "Forestry & Conservation"
+reversal_risk = CREDIT_REVERSAL_RISK[nature_type]
+mix_total = sum(mix_shares)
+nature_share_default = mix_shares[mix_types.index(nature_type)] / mix_total * 100 \
+    if nature_type in mix_types and mix_total > 0 else 0.0
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    nature_share = st.slider(f"Share of Credits from {nature_type} (%)", 0.0, 100.0, float(round(nature_share_default, 1)))
+    project_count = st.slider("Number of Projects", 1, 50, 10)
+with col2:
+    reversal_probability = st.slider("Annual Reversal Probability per Project (%)", 0.0, 20.0,
+                                     reversal_risk['annual_probability'] * 100)
+    reversal_severity = st.slider("Average Share of Carbon Lost per Event (%)", 1.0, 99.0,
+                                  reversal_risk['mean_severity'] * 100)
+with col3:
+    reversal_correlation = st.slider("Correlation of Events Between Projects", 0.0, 0.95, DEFAULT_EVENT_CORRELATION)
+    buffer_confidence = st.slider("Buffer Confidence Level (%)", 50.0, 99.5, DEFAULT_CONFIDENCE)
+
+nature_demand = credit_demand * nature_share / 100
+if nature_demand.sum() <= 0:
+    st.info(f"Add {nature_type} credits to your mix to size a reversal buffer.")
+else:
+    reversal_key = (tuple(nature_demand.round(6)), project_count, reversal_probability, reversal_severity,
+                    reversal_correlation)
+    if st.session_state.get('reversal_simulation_key') != reversal_key:
+        try:
+            # Credits are spread evenly across the projects
+            project_credits = np.repeat(nature_demand[None, :] / project_count, project_count, axis=0)
+            st.session_state.reversal_simulation = simulate_reversals(
+                project_credits,
+                reversal_probability / 100,
+                reversal_severity / 100,
+                correlation=reversal_correlation,
+                seed=42
+            )
+            st.session_state.reversal_simulation_key = reversal_key
+        except ValueError as e:
+            st.error(str(e))
+
+    if st.session_state.get('reversal_simulation_key') == reversal_key:
+        reversals = reversal_summary(st.session_state.reversal_simulation, residual_years, buffer_confidence)
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Nature-Based Credits Retired", f"{reversals['retired']:,.0f} tCO2e")
+        with col2:
+            st.metric("Expected Net Retired", f"{reversals['expected_net']:,.0f} tCO2e",
+                      delta=f"-{reversals['expected_reversed']:,.0f} tCO2e reversed", delta_color="off")
+        with col3:
+            st.metric(f"Buffer at {buffer_confidence:g}% Confidence", f"{reversals['buffer']:,.0f} tCO2e")
+        with col4:
+            st.metric("Buffer Contribution", f"{reversals['buffer_rate']:.1f}%",
+                      help="Buffer as a share of nature-based credits retired")
+
+        reversal_by_year = reversals['by_year']
+        fig_reversal = go.Figure()
+        fig_reversal.add_trace(go.Scatter(x=reversal_by_year['year'], y=reversal_by_year['retired'].cumsum(), mode='lines',
+                                          name='Retired', line=dict(color='#333333', dash='dash')))
+        fig_reversal.add_trace(go.Scatter(x=reversal_by_year['year'], y=reversal_by_year['expected_net'], mode='lines',
+                                          name='Expected Net', line=dict(color='#2ca02c')))
+        fig_reversal.add_trace(go.Scatter(x=reversal_by_year['year'], y=reversal_by_year['net_at_confidence'], mode='lines',
+                                          name=f'Net at {buffer_confidence:g}% Confidence', line=dict(color='#d62728')))
+        fig_reversal.update_layout(
+            title="Cumulative Nature-Based Credits Retired Net of Reversals",
+            xaxis_title="Year",
+            yaxis_title="Credits (tCO2e)",
+            plot_bgcolor="white"
+        )
+        st.plotly_chart(fig_reversal, use_container_width=True)
+
+        st.caption(f"At least one reversal occurs in {reversals['reversal_chance']:.1f}% of simulations.")
+
+# Serial-number ledger of held and retired credits
+st.markdown("### Credit Retirement Ledger")
+st.markdown("""
+Record the credits you hold and retire by serial number range. Every serial can be held by one account
+and retired once; retirements are reconciled against the credits needed for each year's residual emissions.
+""")
+
+if 'credit_ledger' not in st.session_state:
+    st.session_state.credit_ledger = load_ledger()
+credit_ledger = st.session_state.credit_ledger
+
+with st.expander("Record Transactions"):
+    st.markdown("""
+    Upload a CSV with columns `action` (issue, transfer or retire), `block` (serial block, e.g. registry,
+    project and vintage), `serial_start`, `serial_end` and `holder`. Transfers also need `to_holder` and
+    retirements `year`; issues can include `credit_type` and `vintage`. Transactions are applied in order.
+    """)
+    transactions_file = st.file_uploader("Ledger Transactions (CSV)", type=["csv"])
+    if transactions_file is not None and st.button("Apply Transactions"):
+        try:
+            outcome = apply_transactions(credit_ledger, pd.read_csv(transactions_file))
+            save_ledger(credit_ledger)
+            st.success(f"Applied {outcome['applied']:,} transactions")
+            for row, message in outcome['errors'][:10]:
+                st.warning(f"Row {row + 1}: {message}")
+            if len(outcome['errors']) > 10:
+                st.warning(f"{len(outcome['errors']) - 10:,} more transactions were rejected")
+        except ValueError as e:
+            st.error(str(e))
+
+    if st.button("Clear Ledger"):
+        st.session_state.credit_ledger = credit_ledger = create_ledger()
+        save_ledger(credit_ledger)
+
+with st.expander("Check Serial Numbers"):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        check_block = st.text_input("Serial Block")
+    with col2:
+        check_start = st.number_input("First Serial", min_value=0, value=0, step=1)
+    with col3:
+        check_end = st.number_input("Last Serial", min_value=0, value=0, step=1)
+    if check_block:
+        matches = pd.DataFrame(find_intervals(credit_ledger, check_block, int(check_start), int(check_end)))
+        if matches.empty:
+            st.info("These serials are not in the ledger")
+        else:
+            retired_matches = matches[matches['status'] == "retired"]
+            if not retired_matches.empty:
+                st.warning(f"{len(retired_matches)} serial ranges in this range have already been retired")
+            st.dataframe(matches, use_container_width=True)
+
+ledger_intervals = ledger_frame(credit_ledger)
+if ledger_intervals.empty:
+    st.info("No credits have been recorded in the ledger yet")
+else:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Credits Recorded", f"{ledger_intervals['credits'].sum():,} tCO2e")
+    with col2:
+        st.metric("Credits Retired", f"{ledger_intervals.loc[ledger_intervals['status'] == 'retired', 'credits'].sum():,} tCO2e")
+    with col3:
+        st.metric("Serial Ranges", f"{len(ledger_intervals):,}")
+
+    reconciliation = reconcile_retirements(credit_ledger, residual_years, credit_demand)
+    fig_reconciliation = go.Figure()
+    fig_reconciliation.add_trace(go.Bar(x=reconciliation['year'], y=reconciliation['retired'], name='Retired', marker_color='#2ca02c'))
+    fig_reconciliation.add_trace(go.Scatter(x=reconciliation['year'], y=reconciliation['required'], mode='lines', name='Required', line=dict(color='#ff7f0e')))
+    fig_reconciliation.update_layout(
+        title="Retired Credits vs Credits Required",
+        xaxis_title="Year",
+        yaxis_title="Credits (tCO2e)",
+        plot_bgcolor="white"
+    )
+    st.plotly_chart(fig_reconciliation, use_container_width=True)
+
+    st.dataframe(
+        reconciliation.rename(columns={
+            'year': "Year",
+            'required': "Required (tCO2e)",
+            'retired': "Retired (tCO2e)",
+            'surplus': "Surplus (tCO2e)",
+            'status': "Status"
+        }).round(2),
+        use_container_width=True
+    )
+
+    st.dataframe(
+        ledger_intervals.groupby(['holder', 'status'])['credits'].sum().reset_index().rename(columns={
+            'holder': "Account",
+            'status': "Status",
+            'credits': "Credits (tCO2e)"
+        }),
+        use_container_width=True
+    )
+
+# Allocation of credit lots to the residual emissions of each year
+st.markdown("### Vintage Allocation")
+st.markdown("""
+Plan which credits cover which year. Lots are allocated to each year's outstanding credit need under your
+vintage rules, by default oldest vintage first (FIFO) so that credits are used before they become too old.
+""")
+
+with st.expander("Credit Lots"):
+    st.markdown("""
+    Upload a CSV with columns `vintage`, `credit_type` and `quantity` (tCO2e), or leave empty to allocate
+    the active holdings in the ledger.
+    """)
+    lots_file = st.file_uploader("Credit Lots (CSV)", type=["csv"])
+
+credit_lots = None
+if lots_file is not None:
+    credit_lots = pd.read_csv(lots_file)
+elif not ledger_intervals.empty:
+    active_intervals = ledger_intervals[(ledger_intervals['status'] == "active") & ledger_intervals['vintage'].notna()]
+    credit_lots = active_intervals.groupby(['vintage', 'credit_type'], dropna=False)['credits'].sum().reset_index() \
+        .rename(columns={'credits': "quantity"}).astype({'vintage': int})
+
+if credit_lots is None or credit_lots.empty:
+    st.info("Upload credit lots or record holdings with a vintage in the ledger to plan allocations")
+else:
+    col1, col2 = st.columns(2)
+    with col1:
+        allocation_rule = st.selectbox("Allocation Rule", ALLOCATION_RULES)
+        type_priority = st.multiselect("Credit Type Priority", sorted(credit_lots['credit_type'].dropna().unique())) \
+            if allocation_rule == "Type Priority" else None
+    with col2:
+        max_vintage_age = st.slider("Maximum Vintage Age (years)", 0, 15, 5)
+        allow_future_vintages = st.checkbox("Allow vintages after the reporting year", value=False)
+
+    # Years already covered by retirements in the ledger only need the remainder
+    retired_by_year = reconcile_retirements(credit_ledger, residual_years, credit_demand)['retired'].to_numpy()
+    try:
+        allocation = allocate_credits(
+            credit_lots,
+            residual_years,
+            np.maximum(credit_demand - retired_by_year, 0.0),
+            rule=allocation_rule,
+            max_vintage_age=max_vintage_age,
+            allow_future_vintages=allow_future_vintages,
+            type_priority=type_priority
+        )
+
+        coverage = allocation['by_year']
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Credits Allocated", f"{coverage['allocated'].sum():,.2f} tCO2e")
+        with col2:
+            st.metric("Uncovered Need", f"{coverage['shortfall'].sum():,.2f} tCO2e")
+        with col3:
+            st.metric("Credits Expiring Unused", f"{allocation['lots'].loc[allocation['lots']['expired'], 'unused'].sum():,.2f} tCO2e")
+
+        allocated_by_vintage = allocation['allocations'].pivot_table(
+            index='year', columns='vintage', values='quantity', aggfunc='sum', fill_value=0.0
+        )
+        fig_allocation = go.Figure()
+        for vintage in allocated_by_vintage.columns:
+            fig_allocation.add_trace(go.Bar(x=allocated_by_vintage.index, y=allocated_by_vintage[vintage], name=f"Vintage {vintage}"))
+        fig_allocation.add_trace(go.Scatter(x=coverage['year'], y=coverage['required'], mode='lines', name='Credits Needed', line=dict(color='#333333')))
+        fig_allocation.update_layout(
+            title="Credits Allocated to Each Year by Vintage",
+            xaxis_title="Year",
+            yaxis_title="Credits (tCO2e)",
+            barmode='stack',
+            plot_bgcolor="white"
+        )
+        st.plotly_chart(fig_allocation, use_container_width=True)
+
+        st.dataframe(
+            coverage.rename(columns={
+                'year': "Year",
+                'required': "Needed (tCO2e)",
+                'allocated': "Allocated (tCO2e)",
+                'shortfall': "Uncovered (tCO2e)"
+            }).round(2),
+            use_container_width=True
+        )
+    except ValueError as e:
+        st.error(str(e))
+
 # Sample carbon credit projects
 st.markdown("### Featured Carbon Credit Projects")
 
@@ -3,6 +3,14 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+from utils.benchmark_index import ALL, SIZE_BANDS, build_benchmark_index, load_benchmark_index, resolve_group, \
+    percentile_rank, group_quantiles, size_band
+from utils.peer_finder import DEFAULT_NEIGHBORS, build_peer_index, load_peer_index, find_peers
+from utils.visualization import create_scope_comparison_radar_chart
+from utils.constants import COUNTRY_EMISSIONS, COUNTRY_TOTAL_EMISSIONS
+from utils.temperature import PATHWAY_END_YEAR, score_entities, portfolio_temperature
+from utils.country_data import TOTAL_GAS, build_country_store, load_country_store, country_series, \
+    closest_countries, nearest_country
 
 st.set_page_config(
     page_title="Global Comparison",
@@ -77,23 +85,7 @@ industry_scope_data = {
 }
 
 # Country emissions per capita (tCO2e)
-country_emissions = {
-    "Qatar": 37.0,
-    "United States": 15.5,
-    "Australia": 15.4,
-    "Canada": 15.1,
-    "Russia": 11.7,
-    "Japan": 8.7,
-    "Germany": 8.4,
-    "China": 7.4,
-    "United Kingdom": 5.5,
-    "France": 4.6,
-    "Brazil": 2.2,
-    "India": 1.9,
-    "Kenya": 0.3,
-    "Ethiopia": 0.1,
-    "Global Average": 4.5
-}
+country_emissions = COUNTRY_EMISSIONS
 
 # Introduction section
 st.markdown("""
@@ -114,6 +106,20 @@ st.markdown("### Industry Comparison")
 if company_industry and company_industry in industry_emissions_data:
     industry_data = industry_emissions_data[company_industry]
     
+    # Exact percentile rank among peers once a benchmark index has been built
+    benchmark_index = load_benchmark_index()
+    peer_percentile = None
+    if benchmark_index is not None:
+        col1, col2 = st.columns(2)
+        with col1:
+            peer_region = st.selectbox("Peer Region", [ALL] + benchmark_index['dimensions']['region'])
+        with col2:
+            company_band = size_band(st.session_state.company_data['revenue'])
+            peer_band = st.selectbox("Peer Size Band (revenue)", [ALL] + SIZE_BANDS, index=SIZE_BANDS.index(company_band) + 1)
+        peer_group, peer_count = resolve_group(benchmark_index, company_industry, peer_region, peer_band)
+        if peer_group is not None:
+            peer_percentile = percentile_rank(benchmark_index, peer_group, company_intensity)
+    
     # Create gauge chart
     fig = go.Figure(go.Indicator(
         mode = "gauge+number+delta",
@@ -150,16 +156,27 @@ if company_industry and company_industry in industry_emissions_data:
     
     st.plotly_chart(fig, use_container_width=True)
     
-    # Performance assessment
-    if company_intensity <= industry_data["best_performer"]:
+    # Performance assessment (peer quartile when a benchmark index is available)
+    if peer_percentile is not None:
+        performance_level = min(int(peer_percentile // 25), 3)
+    elif company_intensity <= industry_data["best_performer"]:
+        performance_level = 0
+    elif company_intensity <= industry_data["avg_intensity"]:
+        performance_level = 1
+    elif company_intensity <= (industry_data["avg_intensity"] + industry_data["worst_performer"])/2:
+        performance_level = 2
+    else:
+        performance_level = 3
+    
+    if performance_level == 0:
         performance_class = "Leading"
         perf_color = "green"
         description = "Your organization is among the top performers in your industry. Your carbon management strategies can serve as best practices for others."
-    elif company_intensity <= industry_data["avg_intensity"]:
+    elif performance_level == 1:
         performance_class = "Above Average"
         perf_color = "lightgreen"
         description = "Your organization is performing better than the industry average. Continue implementing your carbon reduction strategies."
-    elif company_intensity <= (industry_data["avg_intensity"] + industry_data["worst_performer"])/2:
+    elif performance_level == 2:
         performance_class = "Below Average"
         perf_color = "orange"
         description = "Your organization's emissions intensity is higher than the industry average. There is significant room for improvement."
@@ -203,6 +220,56 @@ if company_industry and company_industry in industry_emissions_data:
     
     st.plotly_chart(fig_bar, use_container_width=True)
     
+    # Peer percentile benchmark
+    st.markdown("### Peer Percentile Benchmark")
+    
+    with st.expander("Peer Benchmark Dataset"):
+        st.markdown("""
+        Upload peer records (CSV or Parquet) with columns `industry`, `region`, `intensity` (tCO2e per $M revenue)
+        and either `size_band` or `revenue` (USD millions). The index is built once and reused on every visit.
+        """)
+        peers_file = st.file_uploader("Peer Intensities", type=["csv", "parquet"])
+        if peers_file is not None and st.button("Build Benchmark Index"):
+            try:
+                peers = pd.read_parquet(peers_file) if peers_file.name.endswith(".parquet") else pd.read_csv(peers_file)
+                summary = build_benchmark_index(peers)
+                st.success(f"Indexed {summary['records']:,} peer records in {summary['groups']:,} peer groups")
+                st.rerun()
+            except ValueError as e:
+                st.error(str(e))
+    
+    if peer_percentile is None:
+        st.info("Upload a peer dataset to rank your intensity against individual peers instead of industry averages.")
+    else:
+        peer_curve = np.arange(0, 101)
+        peer_intensities = group_quantiles(benchmark_index, peer_group, peer_curve)
+        industry_label, region_label, band_label = peer_group.split("|")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Percentile Rank", f"{peer_percentile:.1f}", help="Share of peers with a lower intensity")
+        with col2:
+            st.metric("Peers with Higher Intensity", f"{100 - peer_percentile:.1f}%")
+        with col3:
+            st.metric("Peer Group Size", f"{peer_count:,}")
+        
+        if (industry_label, region_label, band_label) != (company_industry, peer_region, peer_band):
+            st.caption(f"Too few peers in the selected group; compared with {industry_label} / {region_label} / {band_label} instead.")
+        
+        fig_ecdf = go.Figure()
+        fig_ecdf.add_trace(go.Scatter(x=peer_intensities, y=peer_curve, mode='lines', name='Peers', line=dict(color='#1f77b4')))
+        fig_ecdf.add_trace(go.Scatter(
+            x=[company_intensity], y=[peer_percentile], mode='markers', name='Your Organization',
+            marker=dict(color='red', size=12)
+        ))
+        fig_ecdf.update_layout(
+            title=f"Intensity Distribution of Peers ({industry_label} / {region_label} / {band_label})",
+            xaxis_title="Emissions Intensity (tCO2e/$M revenue)",
+            yaxis_title="Percentile",
+            plot_bgcolor="white"
+        )
+        st.plotly_chart(fig_ecdf, use_container_width=True)
+    
     # Scope comparison
     st.markdown("### Emissions Scope Distribution")
     
@@ -302,6 +369,187 @@ if company_industry and company_industry in industry_emissions_data:
 else:
     st.info("Please select an industry on the home page to see industry comparisons.")
 
+# Nearest-neighbour peers by emissions profile
+st.markdown("### Companies Like Yours")
+st.markdown("""
+Instead of a single industry average, compare with the companies whose emissions profile is closest to yours:
+scope shares, revenue, headcount, emissions intensity and region.
+""")
+
+with st.expander("Peer Profiles Dataset"):
+    st.markdown("""
+    Upload peer profiles (CSV or Parquet) with columns `company_id`, `industry`, `region`, `revenue`
+    (USD millions), `employees` and `scope1`, `scope2`, `scope3` emissions in tCO2e.
+    """)
+    profiles_file = st.file_uploader("Peer Profiles", type=["csv", "parquet"])
+    if profiles_file is not None and st.button("Build Peer Index"):
+        try:
+            profiles = pd.read_parquet(profiles_file) if profiles_file.name.endswith(".parquet") else pd.read_csv(profiles_file)
+            summary = build_peer_index(profiles)
+            st.success(f"Indexed {summary['peers']:,} peer profiles")
+            st.rerun()
+        except ValueError as e:
+            st.error(str(e))
+
+peer_index = load_peer_index()
+if peer_index is None:
+    st.info("Upload peer profiles to find the companies most similar to yours.")
+else:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        company_region = st.selectbox("Your Region", peer_index['metadata']['regions'])
+    with col2:
+        neighbor_count = st.slider("Number of Peers", 5, 100, DEFAULT_NEIGHBORS)
+    with col3:
+        same_industry = st.checkbox("Same industry only", value=bool(company_industry))
+
+    company_profile = {
+        'region': company_region,
+        'revenue': st.session_state.company_data['revenue'],
+        'employees': company_employees,
+        **st.session_state.emissions_by_scope
+    }
+    nearest_peers = find_peers(
+        peer_index,
+        company_profile,
+        k=neighbor_count,
+        industry=company_industry if same_industry and company_industry else None
+    )
+
+    if nearest_peers.empty:
+        st.info("No peers found for your industry in the peer dataset.")
+    else:
+        peer_scope_shares = nearest_peers[['scope1_share', 'scope2_share', 'scope3_share']].median()
+        company_scope_shares = [st.session_state.emissions_by_scope[scope] / company_emissions * 100 if company_emissions > 0 else 0
+                                for scope in ['scope1', 'scope2', 'scope3']]
+        peer_intensity = np.expm1(nearest_peers['log_intensity'].median())
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Your Intensity", f"{company_intensity:,.2f} tCO2e/$M")
+        with col2:
+            st.metric("Peer Median Intensity", f"{peer_intensity:,.2f} tCO2e/$M",
+                      f"{(company_intensity / peer_intensity - 1) * 100 if peer_intensity > 0 else 0:+.1f}% yours vs peers",
+                      delta_color="off")
+
+        fig_peers = create_scope_comparison_radar_chart(
+            company_scope_shares,
+            peer_scope_shares.tolist(),
+            ["Scope 1 (%)", "Scope 2 (%)", "Scope 3 (%)"],
+            comparison_name=f"Median of {len(nearest_peers)} Nearest Peers"
+        )
+        st.plotly_chart(fig_peers, use_container_width=True)
+
+        st.dataframe(
+            nearest_peers[['company_id', 'industry', 'region', 'revenue', 'employees',
+                           'scope1_share', 'scope2_share', 'scope3_share', 'distance']].rename(columns={
+                'company_id': "Company",
+                'industry': "Industry",
+                'region': "Region",
+                'revenue': "Revenue ($M)",
+                'employees': "Employees",
+                'scope1_share': "Scope 1 (%)",
+                'scope2_share': "Scope 2 (%)",
+                'scope3_share': "Scope 3 (%)",
+                'distance': "Distance"
+            }).round(2),
+            use_container_width=True
+        )
+
+# Temperature alignment of targets against sector pathways
+st.markdown("### Temperature Alignment")
+st.markdown(f"""
+Implied temperature rise compares cumulative emissions on a target trajectory up to {PATHWAY_END_YEAR}
+with the budget of the same emissions following the sector's 1.5°C pathway.
+""")
+
+base_year = st.session_state.company_data['year']
+company_target = {
+    'entity_id': company_name,
+    'industry': company_industry or "Other",
+    'base_emissions': company_emissions,
+    'reduction_percentage': (1 - st.session_state.targets.get('2030', company_emissions) / company_emissions) * 100
+        if company_emissions > 0 else 0,
+    'target_year': 2030,
+    'net_zero_year': st.session_state.targets.get('net_zero_year')
+}
+company_score = None
+try:
+    company_score = score_entities(pd.DataFrame([company_target]), base_year=base_year).iloc[0]
+except ValueError as e:
+    st.error(str(e))
+
+if company_score is not None:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Your Temperature Score", f"{company_score['temperature']:.2f}°C")
+    with col2:
+        st.metric("Budget Overshoot", f"{company_score['overshoot_ratio']:.2f}x",
+                  help="Cumulative target emissions divided by the sector pathway budget")
+    with col3:
+        st.metric(f"Cumulative Emissions to {PATHWAY_END_YEAR}", f"{company_score['cumulative_emissions']:,.0f} tCO2e")
+
+with st.expander("Score Suppliers or Investees"):
+    st.markdown("""
+    Upload entity targets (CSV or Parquet) with columns `entity_id`, `industry`, `base_emissions` (tCO2e),
+    `reduction_percentage` and `target_year`, plus optional `net_zero_year` and `weight` (e.g. ownership share;
+    portfolio scores are emissions-weighted otherwise).
+    """)
+    entities_file = st.file_uploader("Entity Targets", type=["csv", "parquet"])
+
+if entities_file is not None:
+    try:
+        entities = pd.read_parquet(entities_file) if entities_file.name.endswith(".parquet") else pd.read_csv(entities_file)
+        entity_scores = score_entities(entities, base_year=base_year)
+        portfolio = portfolio_temperature(
+            entity_scores,
+            pd.to_numeric(entity_scores['weight'], errors="coerce").fillna(0).to_numpy() if 'weight' in entity_scores.columns else None
+        )
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Portfolio Temperature", f"{portfolio['temperature']:.2f}°C")
+        with col2:
+            st.metric("Aligned with 1.5°C", f"{portfolio['aligned_share']:.1f}%")
+        with col3:
+            st.metric("Below 2°C", f"{portfolio['below_2c_share']:.1f}%")
+        
+        fig_temperature = px.histogram(
+            entity_scores,
+            x='temperature',
+            nbins=50,
+            title="Distribution of Entity Temperature Scores",
+            labels={'temperature': 'Temperature Score (°C)'}
+        )
+        fig_temperature.add_vline(x=1.5, line_dash="dash", line_color="green", annotation_text="1.5°C")
+        fig_temperature.add_vline(x=2.0, line_dash="dash", line_color="orange", annotation_text="2°C")
+        if company_score is not None:
+            fig_temperature.add_vline(x=company_score['temperature'], line_color="red", annotation_text=company_name)
+        fig_temperature.update_layout(yaxis_title="Entities", plot_bgcolor="white")
+        st.plotly_chart(fig_temperature, use_container_width=True)
+        
+        fig_sectors = px.box(
+            entity_scores,
+            x='industry',
+            y='temperature',
+            title="Temperature Scores by Industry",
+            labels={'industry': '', 'temperature': 'Temperature Score (°C)'}
+        )
+        fig_sectors.update_layout(plot_bgcolor="white")
+        st.plotly_chart(fig_sectors, use_container_width=True)
+        
+        st.dataframe(
+            portfolio['by_industry'].rename(columns={
+                'industry': "Industry",
+                'entities': "Entities",
+                'temperature': "Weighted Temperature (°C)",
+                'median_temperature': "Median Temperature (°C)"
+            }).round(2),
+            use_container_width=True
+        )
+    except ValueError as e:
+        st.error(str(e))
+
 # Global comparison
 st.markdown("### Global Emissions Context")
 
@@ -409,24 +657,16 @@ else:
 # Contextualize the organization's total emissions
 st.markdown("### Contextualizing Your Organization's Total Emissions")
 
-# Sample national emissions for context
-country_total_emissions = {
-    "United States": 5.0e9,
-    "Germany": 7.0e8,
-    "Finland": 5.0e7,
-    "Jamaica": 7.8e6,
-    "Barbados": 4.4e5
-}
+# National emissions for context
+country_total_emissions = COUNTRY_TOTAL_EMISSIONS
+country_store = load_country_store()
 
 # Find the closest country match
-closest_country = None
-smallest_diff = float('inf')
-
-for country, emissions in country_total_emissions.items():
-    diff = abs(emissions - company_emissions)
-    if diff < smallest_diff:
-        smallest_diff = diff
-        closest_country = country
+if country_store is not None:
+    closest = closest_countries(country_store, company_emissions, n=1)
+    closest_country = closest["country"].iloc[0] if len(closest) else None
+else:
+    closest_country = nearest_country(country_total_emissions, company_emissions)
 
 if closest_country:
     st.markdown(f"Your organization's annual emissions ({company_emissions:.2f} tCO2e) are approximately equivalent to:")
@@ -444,6 +684,71 @@ if closest_country:
         num_flights = company_emissions / 2  # ~2 tCO2e per transatlantic flight
         st.markdown(f"- Approximately **{num_flights:.0f}** transatlantic flights")
 
+# National emissions over time
+st.markdown("### Country Emissions Over Time")
+
+with st.expander("Load Country Emissions Data"):
+    st.markdown("""
+    Upload national inventories (CSV or Parquet) with columns `country`, `year`, `gas` and `emissions` in tCO2e,
+    plus an optional `population` column for per-capita comparisons. A `Total` gas is added when it is not included.
+    """)
+    records_file = st.file_uploader("Country Inventories", type=["csv", "parquet"])
+    if records_file is not None and st.button("Build Country Dataset"):
+        try:
+            records = pd.read_parquet(records_file) if records_file.name.endswith(".parquet") else pd.read_csv(records_file)
+            summary = build_country_store(records)
+            st.success(f"Stored {summary['countries']:,} countries over {summary['years']} years and {summary['gases']} gases")
+            st.rerun()
+        except ValueError as e:
+            st.error(str(e))
+
+if country_store is None:
+    st.info("Upload national inventories to compare emissions trends between countries.")
+else:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        trend_countries = st.multiselect(
+            "Countries",
+            country_store['countries'],
+            default=[country for country in COUNTRY_EMISSIONS if country in country_store['countries']][:4]
+        )
+    with col2:
+        trend_gas = st.selectbox("Gas", country_store['gases'], index=country_store['gases'].index(TOTAL_GAS))
+    with col3:
+        per_capita = st.checkbox("Per capita", value=bool(np.isfinite(country_store['population']).any()))
+
+    if trend_countries:
+        series = country_series(country_store, trend_countries, gas=trend_gas, per_capita=per_capita)
+        fig_trend = px.line(
+            series.reset_index().melt(id_vars="year", var_name="Country", value_name="Emissions"),
+            x="year",
+            y="Emissions",
+            color="Country",
+            title=f"{trend_gas} Emissions {'per Capita ' if per_capita else ''}by Country"
+        )
+        if per_capita and per_employee > 0:
+            fig_trend.add_hline(y=per_employee, line_dash="dash", annotation_text=f"{company_name} (per employee)")
+        fig_trend.update_layout(
+            xaxis_title="Year",
+            yaxis_title="tCO2e per Capita" if per_capita else "tCO2e",
+            plot_bgcolor="white"
+        )
+        st.plotly_chart(fig_trend, use_container_width=True)
+    else:
+        st.info("Please select at least one country to compare.")
+
+    similar_countries = closest_countries(country_store, company_emissions, gas=trend_gas, n=5)
+    st.markdown(f"#### Countries with {trend_gas} Emissions Closest to Yours")
+    st.dataframe(
+        similar_countries.rename(columns={
+            'country': "Country",
+            'year': "Year",
+            'emissions': "Emissions (tCO2e)",
+            'ratio': "Your Emissions / Country"
+        }).round(2),
+        use_container_width=True
+    )
+
 # Additional context
 st.markdown("### Global Emissions Reductions Needed")
 
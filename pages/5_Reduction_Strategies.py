@@ -2,6 +2,17 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import numpy as np
+from utils.constants import CARBON_PRICE_PATHS, ENERGY_PRICE_SCENARIOS, INTERNAL_PRICE_MECHANISMS
+from utils.finance import evaluate_strategy_finances, rank_strategies, carbon_price_paths
+from utils.carbon_pricing import breakdown_rows, emissions_matrix, category_rates, price_paths_from_rows, \
+    hierarchy_matrix, carbon_charges, allocate_charges, path_summary
+from utils.data_processing import calculate_target_trajectories
+from utils.macc import (
+    MAX_COMBINATION_LEVERS, breakdown_matrix, build_macc, macc_curve, optimize_portfolio,
+    simulate_sequence, evaluate_combinations
+)
+from utils.strategy_store import load_strategy_store, recommend_strategies
+from utils.visualization import create_macc_chart
 
 st.set_page_config(
     page_title="Reduction Strategies",
@@ -62,211 +73,36 @@ else:
 
 st.markdown(f"Your largest emission source is **{dominant_scope}**, representing {max(scope1, scope2, scope3)/total_emissions*100:.1f}% of your total emissions.")
 
-# Define strategy database
-# Each strategy includes name, description, applicable_scope, reduction_potential, implementation_time, cost_level, and co-benefits
-strategies = [
-    # Scope 1 strategies
-    {
-        "name": "Electrify vehicle fleet",
-        "description": "Replace conventional fuel vehicles with electric vehicles.",
-        "applicable_scope": "Scope 1",
-        "reduction_potential": "Medium-High",
-        "implementation_time": "Medium",
-        "cost_level": "High",
-        "co_benefits": ["Air quality improvement", "Noise reduction", "Cost savings over vehicle lifetime"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Upgrade to high-efficiency HVAC systems",
-        "description": "Replace older heating, ventilation, and air conditioning systems with high-efficiency models.",
-        "applicable_scope": "Scope 1",
-        "reduction_potential": "Medium",
-        "implementation_time": "Medium",
-        "cost_level": "Medium",
-        "co_benefits": ["Cost savings", "Improved comfort", "Extended equipment life"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Optimize manufacturing processes",
-        "description": "Identify and eliminate inefficiencies in manufacturing processes to reduce direct emissions.",
-        "applicable_scope": "Scope 1",
-        "reduction_potential": "Medium-High",
-        "implementation_time": "Medium-Long",
-        "cost_level": "Medium-High",
-        "co_benefits": ["Productivity improvements", "Cost savings", "Waste reduction"],
-        "industries": ["Manufacturing", "Chemical", "Food & Beverage", "Automotive", "Mining"]
-    },
-    {
-        "name": "Switch to lower-carbon fuels",
-        "description": "Replace high-carbon fuels like coal and oil with lower-carbon alternatives like natural gas or biofuels.",
-        "applicable_scope": "Scope 1",
-        "reduction_potential": "Medium-High",
-        "implementation_time": "Short-Medium",
-        "cost_level": "Low-Medium",
-        "co_benefits": ["Reduced air pollutants", "Potential cost savings", "Improved public perception"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Implement refrigerant management program",
-        "description": "Monitor, maintain, and upgrade refrigeration systems to prevent leaks of high-GWP refrigerants.",
-        "applicable_scope": "Scope 1",
-        "reduction_potential": "Medium",
-        "implementation_time": "Short",
-        "cost_level": "Low",
-        "co_benefits": ["Compliance with regulations", "Extended equipment life", "Cost savings"],
-        "industries": ["Food & Beverage", "Retail", "Hospitality", "Healthcare"]
-    },
-    
-    # Scope 2 strategies
-    {
-        "name": "Purchase renewable energy",
-        "description": "Enter into power purchase agreements (PPAs) or buy renewable energy certificates (RECs).",
-        "applicable_scope": "Scope 2",
-        "reduction_potential": "High",
-        "implementation_time": "Short",
-        "cost_level": "Low-Medium",
-        "co_benefits": ["Energy price stability", "Marketing opportunities", "Support for renewable industry"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Install on-site renewable energy",
-        "description": "Deploy solar panels, wind turbines, or other renewable energy systems at your facilities.",
-        "applicable_scope": "Scope 2",
-        "reduction_potential": "Medium-High",
-        "implementation_time": "Medium",
-        "cost_level": "High",
-        "co_benefits": ["Energy independence", "Reduced operating costs", "Enhanced property value"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Implement energy efficiency program",
-        "description": "Conduct energy audits and implement efficiency upgrades for lighting, equipment, and building envelope.",
-        "applicable_scope": "Scope 2",
-        "reduction_potential": "Medium",
-        "implementation_time": "Short-Medium",
-        "cost_level": "Low-Medium",
-        "co_benefits": ["Cost savings", "Improved workplace comfort", "Reduced maintenance"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Smart building management systems",
-        "description": "Install automated systems to optimize energy use in heating, cooling, and lighting.",
-        "applicable_scope": "Scope 2",
-        "reduction_potential": "Medium",
-        "implementation_time": "Medium",
-        "cost_level": "Medium",
-        "co_benefits": ["Improved occupant comfort", "Detailed energy use data", "Remote management capabilities"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Green building certification",
-        "description": "Pursue LEED, BREEAM, or other green building certifications for new and existing buildings.",
-        "applicable_scope": "Scope 2",
-        "reduction_potential": "Medium",
-        "implementation_time": "Medium-Long",
-        "cost_level": "Medium-High",
-        "co_benefits": ["Improved building value", "Enhanced reputation", "Healthier workspace"],
-        "industries": ["All"]
-    },
-    
-    # Scope 3 strategies
-    {
-        "name": "Supplier engagement program",
-        "description": "Work with key suppliers to measure, report, and reduce their emissions.",
-        "applicable_scope": "Scope 3",
-        "reduction_potential": "Medium-High",
-        "implementation_time": "Medium-Long",
-        "cost_level": "Low-Medium",
-        "co_benefits": ["Strengthened supplier relationships", "Supply chain resilience", "Knowledge sharing"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Sustainable procurement policy",
-        "description": "Integrate carbon footprint criteria into purchasing decisions and supplier selection.",
-        "applicable_scope": "Scope 3",
-        "reduction_potential": "Medium",
-        "implementation_time": "Short-Medium",
-        "cost_level": "Low",
-        "co_benefits": ["Risk reduction", "Innovation encouragement", "Alignment with corporate values"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Optimize product design",
-        "description": "Redesign products to reduce material use, energy consumption during use, and end-of-life impacts.",
-        "applicable_scope": "Scope 3",
-        "reduction_potential": "Medium-High",
-        "implementation_time": "Medium-Long",
-        "cost_level": "Medium",
-        "co_benefits": ["Cost savings", "Innovation opportunities", "Customer satisfaction"],
-        "industries": ["Manufacturing", "Automotive", "Information Technology", "Retail", "Food & Beverage"]
-    },
-    {
-        "name": "Implement circular economy initiatives",
-        "description": "Develop take-back programs, use recycled materials, and design for reuse and recycling.",
-        "applicable_scope": "Scope 3",
-        "reduction_potential": "Medium",
-        "implementation_time": "Medium-Long",
-        "cost_level": "Medium",
-        "co_benefits": ["Reduced waste", "New revenue streams", "Resource security"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Logistics optimization",
-        "description": "Optimize shipping routes, modes, and loading to reduce transportation emissions.",
-        "applicable_scope": "Scope 3",
-        "reduction_potential": "Medium",
-        "implementation_time": "Short-Medium",
-        "cost_level": "Low-Medium",
-        "co_benefits": ["Cost savings", "Faster delivery times", "Reduced traffic congestion"],
-        "industries": ["Retail", "Manufacturing", "Food & Beverage", "Transportation"]
-    },
-    {
-        "name": "Remote work policy",
-        "description": "Implement flexible work arrangements to reduce commuting emissions.",
-        "applicable_scope": "Scope 3",
-        "reduction_potential": "Low-Medium",
-        "implementation_time": "Short",
-        "cost_level": "Low",
-        "co_benefits": ["Employee satisfaction", "Reduced office space needs", "Business continuity"],
-        "industries": ["All"]
-    },
-    {
-        "name": "Business travel reduction",
-        "description": "Replace unnecessary business travel with virtual meetings and implement a sustainable travel policy.",
-        "applicable_scope": "Scope 3",
-        "reduction_potential": "Low-Medium",
-        "implementation_time": "Short",
-        "cost_level": "Low",
-        "co_benefits": ["Cost savings", "Employee time savings", "Work-life balance"],
-        "industries": ["All"]
-    }
-]
-
-# Filter strategies by company's largest emission scope
-dominant_strategies = [s for s in strategies if s["applicable_scope"] == dominant_scope]
+# Strategy library with inverted indexes on scope, industry, cost level and timeframe
+strategy_store = load_strategy_store()
+strategy_industry = company_industry if company_industry and company_industry != "Other" else None
 
-# Filter by industry relevance (if industry is specified)
-if company_industry and company_industry != "Other":
-    industry_strategies = [
-        s for s in strategies if "All" in s["industries"] or company_industry in s["industries"]
-    ]
-else:
-    industry_strategies = strategies
+# Emissions breakdown used to score and quantify strategies
+emissions_breakdown = {
+    **st.session_state.get('scope1_breakdown', {}),
+    **st.session_state.get('scope2_breakdown', {}),
+    **st.session_state.get('scope3_breakdown', {})
+}
+breakdown_emissions, breakdown_categories = breakdown_matrix([emissions_breakdown or {"Total": total_emissions}])
+macc = build_macc(breakdown_emissions, breakdown_categories, strategy_store["levers"])
+curve = macc_curve(macc, 0).set_index("name")
 
-# Prioritize strategies
-top_dominant_strategies = dominant_strategies[:min(5, len(dominant_strategies))]
-other_relevant_strategies = [s for s in industry_strategies if s not in top_dominant_strategies]
+# Strategies for the company's largest emission scope, largest abatement first
+top_dominant_strategies = recommend_strategies(
+    strategy_store, emissions_breakdown, industry=strategy_industry, scope=dominant_scope, limit=5
+).to_dict("records")
 
 # Priority strategies section
 st.markdown("### Priority Reduction Strategies")
 st.markdown(f"Based on your emissions profile, these strategies targeting your largest source ({dominant_scope}) will have the greatest impact:")
 
 for i, strategy in enumerate(top_dominant_strategies, 1):
-    expander = st.expander(f"{i}. {strategy['name']} ({strategy['reduction_potential']} potential)")
+    expander = st.expander(f"{i}. {strategy['name']} ({strategy['abatement']:,.2f} tCO2e/year potential)")
     with expander:
         st.markdown(f"**Description**: {strategy['description']}")
         st.markdown(f"**Implementation Time**: {strategy['implementation_time']}")
-        st.markdown(f"**Cost Level**: {strategy['cost_level']}")
+        st.markdown(f"**Abatement Cost**: ${strategy['cost_per_tonne']:,.0f}/tCO2e "
+                    f"(${strategy['abatement'] * strategy['cost_per_tonne']:,.0f} per year)")
         st.markdown("**Co-benefits**:")
         for benefit in strategy['co_benefits']:
             st.markdown(f"- {benefit}")
@@ -275,7 +111,7 @@ for i, strategy in enumerate(top_dominant_strategies, 1):
 st.markdown("### Strategy Explorer")
 st.markdown("Explore all available reduction strategies with custom filtering:")
 
-col1, col2 = st.columns(2)
+col1, col2, col3 = st.columns(3)
 with col1:
     scope_filter = st.multiselect(
         "Filter by Scope",
@@ -290,12 +126,22 @@ with col2:
         default=["Short", "Short-Medium", "Medium"]
     )
 
+with col3:
+    cost_filter = st.multiselect(
+        "Filter by Cost Level",
+        sorted(strategy_store["indexes"]["cost_level"].keys()),
+        default=sorted(strategy_store["indexes"]["cost_level"].keys())
+    )
+
 # Apply filters
-filtered_strategies = [
-    s for s in industry_strategies 
-    if s["applicable_scope"] in scope_filter 
-    and any(time in s["implementation_time"] for time in implementation_filter)
-]
+filtered_strategies = recommend_strategies(
+    strategy_store,
+    emissions_breakdown,
+    industry=strategy_industry,
+    scope=scope_filter,
+    cost_level=cost_filter,
+    timeframe=implementation_filter
+).to_dict("records")
 
 # Display strategies in tabular format
 if filtered_strategies:
@@ -304,9 +150,10 @@ if filtered_strategies:
         strategy_data.append({
             "Strategy": s["name"],
             "Scope": s["applicable_scope"],
-            "Reduction Potential": s["reduction_potential"],
+            "Abatement (tCO2e/year)": round(s["abatement"], 2),
+            "Share of Total (%)": round(s["abatement"] / total_emissions * 100, 1) if total_emissions > 0 else 0.0,
             "Implementation Time": s["implementation_time"],
-            "Cost Level": s["cost_level"]
+            "Cost (USD/tCO2e)": s["cost_per_tonne"]
         })
     
     strategy_df = pd.DataFrame(strategy_data)
@@ -325,9 +172,9 @@ if filtered_strategies:
         st.markdown(f"### {strategy_detail['name']}")
         st.markdown(f"**Description**: {strategy_detail['description']}")
         st.markdown(f"**Applicable Scope**: {strategy_detail['applicable_scope']}")
-        st.markdown(f"**Reduction Potential**: {strategy_detail['reduction_potential']}")
+        st.markdown(f"**Abatement Potential**: {strategy_detail['abatement']:,.2f} tCO2e/year")
         st.markdown(f"**Implementation Time**: {strategy_detail['implementation_time']}")
-        st.markdown(f"**Cost Level**: {strategy_detail['cost_level']}")
+        st.markdown(f"**Abatement Cost**: ${strategy_detail['cost_per_tonne']:,.0f}/tCO2e")
         
         st.markdown("**Co-benefits**:")
         for benefit in strategy_detail['co_benefits']:
@@ -345,151 +192,308 @@ if filtered_strategies:
 else:
     st.info("No strategies match your current filters. Try adjusting your selection.")
 
+# Marginal abatement cost curve and portfolio optimizer
+st.markdown("### Marginal Abatement Cost Curve")
+st.markdown("""
+Each bar is one strategy: its width is the emissions it abates per year and its height the cost per tonne.
+Strategies are applied from cheapest to most expensive, each abating what remains after the ones before it,
+so overlapping strategies are not double counted. Bars below zero save money.
+""")
+
+col1, col2 = st.columns(2)
+with col1:
+    optimize_for = st.radio("Optimize Portfolio For", ["Annual Budget", "Reduction Target"], horizontal=True)
+with col2:
+    if optimize_for == "Annual Budget":
+        portfolio_budget = st.number_input("Annual Budget (USD)", min_value=0.0, value=float(round(total_emissions * 20, -2)), step=1000.0)
+        optimized = optimize_portfolio(macc, budget=portfolio_budget)
+    else:
+        portfolio_target = st.slider("Reduction Target (% of total emissions)", 0, 100, 30)
+        optimized = optimize_portfolio(macc, target=total_emissions * portfolio_target / 100)
+
+curve_levers = curve[(curve["abatement"] > 0) & ~curve["alternative"]]
+fig_macc = create_macc_chart(
+    list(curve_levers.index),
+    curve_levers["abatement"],
+    curve_levers["cost_per_tonne"],
+    selected=list(optimized["portfolio"]["lever"])
+)
+st.plotly_chart(fig_macc, use_container_width=True)
+
+if not optimized["feasible"]:
+    st.warning("The reduction target is out of reach with the available strategies. Showing the largest achievable reduction.")
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Portfolio Abatement", f"{optimized['total_abatement']:,.2f} tCO2e/year",
+              f"{optimized['total_abatement'] / total_emissions * 100 if total_emissions > 0 else 0:.1f}% of total")
+with col2:
+    st.metric("Net Annual Cost", f"${optimized['total_cost']:,.0f}")
+with col3:
+    st.metric("Average Cost", f"${optimized['total_cost'] / optimized['total_abatement'] if optimized['total_abatement'] > 0 else 0:,.0f}/tCO2e")
+
+st.dataframe(
+    optimized["portfolio"][["lever", "scope", "abatement", "cost_per_tonne", "annual_cost"]].rename(columns={
+        "lever": "Strategy",
+        "scope": "Scope",
+        "abatement": "Abatement (tCO2e/year)",
+        "cost_per_tonne": "Cost (USD/tCO2e)",
+        "annual_cost": "Annual Cost (USD)"
+    }),
+    use_container_width=True
+)
+
+# Overlap simulator: combined abatement of strategies applied in sequence
+st.markdown("### Strategy Overlap Simulator")
+st.markdown("""
+Adding up strategy reductions independently double counts emissions that more than one strategy targets.
+Select strategies in the order you plan to implement them: each one is applied to the emissions left
+in its categories by the strategies before it.
+""")
+
+lever_lookup = {lever["name"]: lever for lever in strategy_store["levers"]}
+overlap_selection = st.multiselect(
+    "Strategies (in order of implementation)",
+    list(lever_lookup.keys()),
+    default=[name for name in optimized["portfolio"]["lever"] if name in lever_lookup][:8]
+)
+
+if overlap_selection:
+    overlap = simulate_sequence(breakdown_emissions[0], breakdown_categories, [lever_lookup[name] for name in overlap_selection])
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Sum of Individual Reductions", f"{overlap['naive_abatement']:,.2f} tCO2e/year")
+    with col2:
+        st.metric("True Combined Reduction", f"{overlap['combined_abatement']:,.2f} tCO2e/year",
+                  f"{overlap['combined_abatement'] / total_emissions * 100 if total_emissions > 0 else 0:.1f}% of total")
+    with col3:
+        st.metric("Double Counted", f"{overlap['double_counted']:,.2f} tCO2e/year")
+
+    st.dataframe(
+        overlap["steps"].rename(columns={
+            "lever": "Strategy",
+            "standalone_abatement": "On Its Own (tCO2e/year)",
+            "sequential_abatement": "In Sequence (tCO2e/year)",
+            "overlap": "Overlap (tCO2e/year)",
+            "annual_cost": "Annual Cost (USD)",
+            "remaining_emissions": "Remaining Emissions (tCO2e)"
+        }).round(2),
+        use_container_width=True
+    )
+
+    if len(overlap_selection) <= MAX_COMBINATION_LEVERS:
+        combinations = evaluate_combinations(
+            breakdown_emissions[0], breakdown_categories, [lever_lookup[name] for name in overlap_selection]
+        )
+        st.markdown(f"#### Best Combinations ({len(combinations['combined_abatement']):,} evaluated)")
+        st.dataframe(
+            combinations["best_by_size"][combinations["best_by_size"]["size"] > 0].rename(columns={
+                "size": "Strategies",
+                "levers": "Combination",
+                "combined_abatement": "Combined Reduction (tCO2e/year)",
+                "naive_abatement": "Sum of Individual Reductions (tCO2e/year)",
+                "annual_cost": "Annual Cost (USD)"
+            }).round(2),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.info(f"Select at most {MAX_COMBINATION_LEVERS} strategies to compare every combination.")
+
+# Financial evaluation across carbon price, energy price and discount rate scenarios
+st.markdown("### Financial Evaluation")
+st.markdown("""
+Net present value (NPV) and internal rate of return (IRR) of each strategy over its lifetime, counting
+investment, operating costs, energy savings and the avoided cost of emissions at an internal carbon price.
+""")
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    ranking_carbon_path = st.selectbox("Carbon Price Path", list(CARBON_PRICE_PATHS.keys()), index=1)
+with col2:
+    ranking_energy_scenario = st.selectbox("Energy Price Scenario", list(ENERGY_PRICE_SCENARIOS.keys()), index=1)
+with col3:
+    ranking_discount_rate = st.select_slider("Discount Rate (%)", [3, 5, 8, 10, 12], value=8)
+
+finances = evaluate_strategy_finances(
+    [curve.loc[name, "abatement"] for name in lever_lookup],
+    list(lever_lookup.values()),
+    list(CARBON_PRICE_PATHS.keys()),
+    list(ENERGY_PRICE_SCENARIOS.keys()),
+    [rate / 100 for rate in [3, 5, 8, 10, 12]],
+    st.session_state.company_data['year'] + 1
+)
+ranking = rank_strategies(finances, ranking_carbon_path, ranking_energy_scenario, ranking_discount_rate / 100)
+ranking = ranking[ranking["strategy"].map(curve["abatement"]) > 0]
+
+fig_npv = px.bar(
+    ranking,
+    x="npv",
+    y="strategy",
+    orientation="h",
+    error_x=ranking["npv_max"] - ranking["npv"],
+    error_x_minus=ranking["npv"] - ranking["npv_min"],
+    color=np.where(ranking["npv"] >= 0, "Positive NPV", "Negative NPV"),
+    color_discrete_map={"Positive NPV": "#2ecc71", "Negative NPV": "#e74c3c"},
+    labels={"npv": "NPV (USD)", "strategy": "", "color": ""},
+    title=f"Strategy NPV - {ranking_carbon_path}, {ranking_energy_scenario} energy prices, {ranking_discount_rate}% discount rate"
+)
+fig_npv.update_layout(plot_bgcolor="white", yaxis=dict(autorange="reversed"))
+st.plotly_chart(fig_npv, use_container_width=True)
+st.caption("Error bars show the NPV range across all carbon price paths, energy price scenarios and discount rates.")
+
+st.dataframe(
+    ranking.assign(
+        irr=ranking["irr"] * 100,
+        positive_share=ranking["positive_share"] * 100
+    ).rename(columns={
+        "strategy": "Strategy",
+        "npv": "NPV (USD)",
+        "irr": "IRR (%)",
+        "npv_min": "Lowest NPV (USD)",
+        "npv_max": "Highest NPV (USD)",
+        "positive_share": "Scenarios with Positive NPV (%)"
+    }).round(1),
+    use_container_width=True,
+    hide_index=True
+)
+
+# Internal carbon price charges by business unit across price paths
+st.markdown("### Internal Carbon Price P&L")
+st.markdown("""
+The financial exposure of your emissions under an internal carbon price. A shadow price covers every scope
+for investment decisions; an internal fee is charged on scopes 1 and 2. Charges are rolled up to every
+business unit and compared across carbon price paths.
+""")
+
+with st.expander("Entities and Price Paths"):
+    st.markdown("""
+    Upload entity emissions (CSV) with columns `entity_id`, `scope` (scope1/scope2/scope3), `category` and
+    `emissions` (tCO2e), plus optional `parent_id` (business unit) and `share` (share of the entity's charge
+    passed to its parent). Upload price paths (CSV) with columns `path`, `year` and `price` (USD/tCO2e) to
+    compare them with the built-in paths.
+    """)
+    pricing_entities_file = st.file_uploader("Entity Emissions (CSV)", type=["csv"])
+    include_company = st.checkbox(f"Include current results as {company_name}", value=True)
+    price_paths_file = st.file_uploader("Price Paths (CSV)", type=["csv"])
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    price_mechanism = st.selectbox("Price Mechanism", list(INTERNAL_PRICE_MECHANISMS.keys()))
+with col2:
+    pricing_pathway = st.selectbox("Emissions Pathway", ["Current Emissions", "Reduction Target Pathway"])
+with col3:
+    pricing_discount_rate = st.slider("Discount Rate for Charges (%)", 0.0, 15.0, 8.0)
+
+pricing_year = st.session_state.company_data['year']
+pricing_years = np.arange(pricing_year + 1, 2051)
+builtin_paths = st.multiselect("Carbon Price Paths", list(CARBON_PRICE_PATHS.keys()), default=list(CARBON_PRICE_PATHS.keys()))
+
+try:
+    entity_tables = [pd.read_csv(pricing_entities_file)] if pricing_entities_file is not None else []
+    if include_company:
+        entity_tables.append(breakdown_rows(
+            {f'{scope}_breakdown': st.session_state.get(f'{scope}_breakdown', {}) for scope in ['scope1', 'scope2', 'scope3']},
+            company_name
+        ))
+    entity_rows = pd.concat(entity_tables, ignore_index=True) if entity_tables else pd.DataFrame()
+
+    path_names = list(builtin_paths)
+    path_prices = [carbon_price_paths(builtin_paths, pricing_years)]
+    if price_paths_file is not None:
+        uploaded_names, uploaded_prices = price_paths_from_rows(pd.read_csv(price_paths_file), pricing_years)
+        path_names += uploaded_names
+        path_prices.append(uploaded_prices)
+    path_prices = np.vstack(path_prices)
+
+    if entity_rows.empty or not path_names:
+        st.info("Include your current results or upload entity emissions, and select at least one price path.")
+    else:
+        entity_emissions = emissions_matrix(entity_rows)
+        exempt_categories = st.multiselect("Categories Exempt from the Internal Price", sorted(set(entity_emissions['categories'])))
+        rates = category_rates(
+            entity_emissions['scopes'],
+            entity_emissions['categories'],
+            price_mechanism,
+            {category: 0.0 for category in exempt_categories}
+        )
+
+        year_factors = None
+        if pricing_pathway == "Reduction Target Pathway":
+            base_emissions = st.session_state.total_emissions
+            target_2030 = st.session_state.targets.get('2030', 0)
+            reduction_by_2030 = (1 - target_2030 / base_emissions) * 100 if base_emissions > 0 and target_2030 > 0 else 0
+            year_factors = calculate_target_trajectories(
+                1.0, reduction_by_2030, max(2030, pricing_year + 1), base_year=pricing_year, end_year=2050
+            )['reduction_factors'][0, 1:]
+
+        # Parent links and shares, one row per entity
+        links = entity_rows.drop_duplicates("entity_id").assign(entity_id=lambda rows: rows['entity_id'].astype(str))
+        nodes, hierarchy = hierarchy_matrix(
+            entity_emissions['entities'],
+            dict(zip(links['entity_id'], links['parent_id'])) if 'parent_id' in links.columns else {},
+            dict(zip(links['entity_id'], links['share'])) if 'share' in links.columns else None
+        )
+        charges = carbon_charges(entity_emissions['emissions'], rates, path_prices, year_factors)
+        unit_charges = allocate_charges(charges, hierarchy)
+        summary = path_summary(charges, path_names, pricing_years, pricing_discount_rate / 100)
+
+        fig_charges = px.line(
+            pd.DataFrame(charges.sum(axis=1), index=path_names, columns=pricing_years).T.reset_index()
+                .melt(id_vars="index", var_name="Price Path", value_name="Charge"),
+            x="index",
+            y="Charge",
+            color="Price Path",
+            title=f"Annual {price_mechanism} Charge by Carbon Price Path",
+            labels={"index": "Year", "Charge": "Charge (USD)"}
+        )
+        fig_charges.update_layout(plot_bgcolor="white")
+        st.plotly_chart(fig_charges, use_container_width=True)
+
+        st.dataframe(
+            summary.rename(columns={
+                "path": "Price Path",
+                "first_year": f"Charge in {pricing_years[0]} (USD)",
+                "last_year": f"Charge in {pricing_years[-1]} (USD)",
+                "cumulative": "Cumulative Charge (USD)",
+                "present_value": "Present Value (USD)"
+            }).round(0),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        # Business unit view for one path and year
+        col1, col2 = st.columns(2)
+        with col1:
+            unit_path = st.selectbox("Price Path for Business Units", path_names)
+        with col2:
+            unit_year = st.select_slider("Year", pricing_years.tolist(), value=int(pricing_years[0]))
+        p, y = path_names.index(unit_path), int(np.searchsorted(pricing_years, unit_year))
+        business_units = [i for i, node in enumerate(nodes) if node not in set(entity_emissions['entities'])] \
+            or list(range(len(nodes)))
+        unit_table = pd.DataFrame({
+            "Business Unit": [nodes[i] for i in business_units],
+            f"Charge in {unit_year} (USD)": unit_charges[p, business_units, y],
+            "Cumulative Charge (USD)": unit_charges[p, business_units].sum(axis=1)
+        }).sort_values(f"Charge in {unit_year} (USD)", ascending=False)
+
+        fig_units = px.bar(
+            unit_table.head(20),
+            x="Business Unit",
+            y=f"Charge in {unit_year} (USD)",
+            title=f"Internal Carbon Charge by Business Unit - {unit_path}, {unit_year}"
+        )
+        fig_units.update_layout(plot_bgcolor="white", xaxis_title="")
+        st.plotly_chart(fig_units, use_container_width=True)
+        st.dataframe(unit_table.round(0), use_container_width=True, hide_index=True)
+except ValueError as e:
+    st.error(str(e))
+
 # Industry-specific recommendations
 st.markdown("### Industry-Specific Recommendations")
 
-industry_recommendations = {
-    "Agriculture": [
-        "Implement precision agriculture techniques to reduce fertilizer use",
-        "Convert to sustainable land management practices that sequester carbon",
-        "Adopt renewable energy for farm operations",
-        "Optimize livestock management to reduce methane emissions",
-        "Implement water conservation measures"
-    ],
-    "Automotive": [
-        "Accelerate transition to electric vehicle manufacturing",
-        "Redesign production processes to minimize waste and energy use",
-        "Source sustainable materials for vehicle components",
-        "Optimize supply chain logistics",
-        "Implement circular economy principles in manufacturing"
-    ],
-    "Aviation": [
-        "Invest in sustainable aviation fuels",
-        "Optimize flight routes and operations",
-        "Implement weight reduction strategies",
-        "Electrify ground operations",
-        "Collaborate on industry-wide decarbonization initiatives"
-    ],
-    "Chemical": [
-        "Redesign processes to improve energy efficiency",
-        "Implement carbon capture for high-emission processes",
-        "Switch to bio-based or recycled feedstocks",
-        "Optimize waste heat recovery",
-        "Reduce process emissions through catalytic improvements"
-    ],
-    "Construction": [
-        "Use low-carbon concrete and building materials",
-        "Implement prefabrication to reduce on-site waste",
-        "Electrify construction equipment",
-        "Design buildings for energy efficiency and low embodied carbon",
-        "Implement sustainable construction site practices"
-    ],
-    "Education": [
-        "Implement campus-wide energy efficiency programs",
-        "Install on-site renewable energy generation",
-        "Develop sustainable transportation options for students and staff",
-        "Integrate sustainability into curriculum and operations",
-        "Implement sustainable procurement policies"
-    ],
-    "Energy": [
-        "Accelerate transition to renewable energy generation",
-        "Implement energy storage solutions",
-        "Reduce methane leakage in natural gas operations",
-        "Optimize grid efficiency and demand management",
-        "Implement carbon capture and storage for remaining fossil generation"
-    ],
-    "Financial Services": [
-        "Implement sustainable finance principles and products",
-        "Reduce emissions from office operations and data centers",
-        "Develop climate risk assessment tools",
-        "Support clients' transition to low-carbon operations",
-        "Shift investment portfolios toward low-carbon assets"
-    ],
-    "Food & Beverage": [
-        "Optimize refrigeration systems and reduce leakage",
-        "Implement energy efficiency in processing operations",
-        "Source ingredients with lower carbon footprints",
-        "Reduce food waste throughout operations",
-        "Redesign packaging to reduce environmental impact"
-    ],
-    "Healthcare": [
-        "Implement energy efficiency in hospitals and facilities",
-        "Optimize medical waste management and recycling",
-        "Reduce emissions from anesthetic gases",
-        "Develop telemedicine to reduce patient travel",
-        "Source sustainable medical supplies and pharmaceuticals"
-    ],
-    "Hospitality": [
-        "Implement building energy management systems",
-        "Reduce food waste in food service operations",
-        "Optimize laundry operations and water use",
-        "Install on-site renewable energy where possible",
-        "Develop sustainable tourism offerings"
-    ],
-    "Information Technology": [
-        "Increase data center energy efficiency",
-        "Source renewable energy for operations",
-        "Design energy-efficient hardware and software",
-        "Implement circular economy principles for electronic waste",
-        "Develop remote work tools to reduce commuting emissions"
-    ],
-    "Manufacturing": [
-        "Optimize process energy efficiency",
-        "Electrify manufacturing processes where possible",
-        "Implement waste heat recovery systems",
-        "Redesign products for lower lifecycle emissions",
-        "Develop closed-loop material systems"
-    ],
-    "Mining": [
-        "Electrify mining equipment and operations",
-        "Implement energy efficiency in processing",
-        "Optimize transportation logistics",
-        "Develop renewable energy for remote operations",
-        "Implement water conservation and land reclamation"
-    ],
-    "Real Estate": [
-        "Retrofit existing buildings for energy efficiency",
-        "Implement building automation systems",
-        "Install on-site renewable energy generation",
-        "Develop green leasing programs",
-        "Design new buildings to net-zero energy standards"
-    ],
-    "Retail": [
-        "Optimize store energy use and refrigeration",
-        "Implement sustainable packaging initiatives",
-        "Develop low-carbon logistics and delivery options",
-        "Source sustainable products with lower emissions",
-        "Implement efficient inventory management to reduce waste"
-    ],
-    "Telecommunications": [
-        "Improve energy efficiency of network infrastructure",
-        "Implement renewable energy for cell towers and data centers",
-        "Extend equipment lifecycle and improve recycling",
-        "Optimize field service operations to reduce travel",
-        "Develop smart solutions that enable customer emission reductions"
-    ],
-    "Transportation": [
-        "Transition fleet to electric or low-carbon vehicles",
-        "Optimize routes and loading to maximize efficiency",
-        "Implement driver training for fuel-efficient operations",
-        "Develop intermodal solutions using lower-carbon transport modes",
-        "Implement logistics optimization software"
-    ],
-    "Utilities": [
-        "Accelerate transition to renewable energy generation",
-        "Modernize grid infrastructure to support renewables",
-        "Implement energy storage solutions",
-        "Develop customer energy efficiency programs",
-        "Reduce methane leakage from gas distribution"
-    ],
-    "Other": [
-        "Implement organization-wide energy efficiency measures",
-        "Transition to renewable energy through on-site generation or purchasing",
-        "Develop a sustainable procurement policy",
-        "Reduce business travel and support remote work",
-        "Engage suppliers on emissions reduction initiatives"
-    ]
-}
+industry_recommendations = strategy_store["industry_recommendations"]
 
 if company_industry and company_industry in industry_recommendations:
     st.markdown(f"Based on your industry ({company_industry}), consider these specific recommendations:")
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from utils.credit_ledger import create_ledger, issue_credits, retire_credits, ledger_frame, save_ledger, load_ledger
+
+
+def test_save_load_round_trip_keeps_years_and_merges(tmp_path):
+    url = f"sqlite:///{tmp_path / 'ledger.db'}"
+    ledger = create_ledger()
+    issue_credits(ledger, "VCS-1", 1, 100, "Acme", credit_type="Forestry & Conservation", vintage=2022)
+    issue_credits(ledger, "VCS-2", 1, 100, "Acme")
+    retire_credits(ledger, "VCS-1", 1, 10, "Acme", 2024)
+    save_ledger(ledger, url)
+
+    loaded = load_ledger(url)
+    retired = loaded["blocks"]["VCS-1"]["chunks"][0][1][0]
+    assert type(retired[5]) is int and type(retired[6]) is int
+
+    with pytest.raises(ValueError, match="already retired in 2024$"):
+        retire_credits(loaded, "VCS-1", 5, 6, "Acme", 2025)
+
+    # Credits without a vintage merge with loaded neighbours without a vintage
+    issue_credits(loaded, "VCS-2", 101, 200, "Acme")
+    retire_credits(loaded, "VCS-1", 11, 20, "Acme", 2024)
+    intervals = ledger_frame(loaded)
+    assert len(intervals) == 3
+    assert intervals.loc[intervals["block"] == "VCS-2", "credits"].tolist() == [200]
+    assert intervals.loc[intervals["block"] == "VCS-1", "credits"].tolist() == [20, 80]
@@ -0,0 +1,14 @@
+import pytest
+
+from utils.finance import strategy_cash_flows
+from utils.strategy_store import load_strategy_store
+
+
+def test_cash_flows_require_financial_data_for_every_lever():
+    levers = load_strategy_store()["levers"]
+    flows = strategy_cash_flows([100.0] * len(levers), levers, ["Current Policies"], ["Reference"], 2025)
+    assert flows["cash_flows"].shape[0] == len(levers)
+
+    renamed = dict(levers[0], name="Renamed lever", capex_per_tonne=None)
+    with pytest.raises(ValueError, match="Renamed lever"):
+        strategy_cash_flows([100.0], [renamed], ["Current Policies"], ["Reference"], 2025)
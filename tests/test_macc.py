@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from utils.macc import optimize_portfolio
+
+
+def _macc(values, costs):
+    values, costs = np.asarray(values, dtype=np.float64), np.asarray(costs, dtype=np.float64)
+    levers = pd.DataFrame({
+        "name": [f"Lever {i}" for i in range(len(values))],
+        "scope": "Scope 1",
+        "cost_per_tonne": costs / values,
+        "exclusive_group": None
+    })
+    return {"levers": levers, "abatement": values[None, :], "cost": costs[None, :]}
+
+
+def test_auto_target_costs_no_more_than_merit_order():
+    macc = _macc([186.3, 89.8, 302.8, 47.7, 99.7, 322.7],
+                 [7233.76, 6354.37, 15177.79, 3063.1, 1899.81, 9266.86])
+    auto = optimize_portfolio(macc, target=512.3)
+    lp = optimize_portfolio(macc, target=512.3, method="lp")
+    assert auto["feasible"] and auto["total_abatement"] >= 512.3
+    assert auto["total_cost"] <= lp["total_cost"] + 1e-9
+
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        n = rng.integers(2, 9)
+        macc = _macc(rng.uniform(10, 400, n).round(1), rng.uniform(100, 20000, n).round(2))
+        target = rng.uniform(0.2, 0.8) * macc["abatement"].sum()
+        auto = optimize_portfolio(macc, target=target)
+        lp = optimize_portfolio(macc, target=target, method="lp")
+        assert auto["total_abatement"] >= target - 1e-9
+        assert auto["total_cost"] <= lp["total_cost"] + 1e-9
@@ -0,0 +1,9 @@
+from utils.strategy_store import load_strategy_store, query_strategies, recommend_strategies
+
+
+def test_unmatched_or_empty_filter_recommends_nothing():
+    store = load_strategy_store()
+    for filters in ({"cost_level": "Nonexistent"}, {"scope": []}, {"timeframe": "Nonexistent"}):
+        rows = query_strategies(store, **filters)
+        assert rows.dtype.kind == "i" and len(rows) == 0
+        assert recommend_strategies(store, {"Natural Gas": 100}, **filters).empty
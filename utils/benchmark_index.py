@@ -0,0 +1,206 @@
+import itertools
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Peer benchmark index
+# Peer intensities are grouped by industry x region x size band, including
+# 'All' rollups of every dimension, and written once as a single sorted
+# float64 array with group offsets. The array is memory-mapped on load, so
+# opening the index is instant and only the pages of the requested group are
+# read. Within a group the exact percentile rank of an intensity is two
+# binary searches (searchsorted) and any quantile is a direct array lookup.
+
+BENCHMARK_INDEX_DIR = os.path.join("data", "benchmark_index")
+PEER_COLUMNS = ["industry", "region", "intensity"]
+GROUP_DIMENSIONS = ["industry", "region", "size_band"]
+ALL = "All"
+SIZE_BANDS = ["Small", "Medium", "Large", "Enterprise"]
+SIZE_BAND_EDGES = [50, 500, 5000]  # Revenue in USD millions
+MIN_PEERS = 20
+
+_INTENSITY_FILE = "intensities.npy"
+_OFFSETS_FILE = "offsets.npy"
+_GROUPS_FILE = "groups.json"
+
+# Indexes already opened, keyed by (directory, modification time)
+_index_cache = {}
+
+def size_band(revenue):
+    """
+    Size band for revenue in USD millions
+
+    Args:
+        revenue (float or array): Annual revenue in USD millions
+
+    Returns:
+        str or numpy.ndarray: Size band label(s) from SIZE_BANDS
+    """
+    bands = np.asarray(SIZE_BANDS)[np.searchsorted(SIZE_BAND_EDGES, np.asarray(revenue, dtype=np.float64), side="right")]
+    return bands if bands.ndim else str(bands)
+
+def group_key(industry=ALL, region=ALL, band=ALL):
+    """Key of a benchmark group"""
+    return f"{industry}|{region}|{band}"
+
+def build_benchmark_index(peers, index_dir=BENCHMARK_INDEX_DIR):
+    """
+    Build the benchmark index from peer intensity records and write it to disk
+
+    Args:
+        peers (pandas.DataFrame): Records with industry, region and intensity
+            (tCO2e per $M revenue), plus size_band or revenue (USD millions)
+        index_dir (str): Directory of the index files
+
+    Returns:
+        dict: Summary of the index (records, groups)
+    """
+    missing = set(PEER_COLUMNS) - set(peers.columns)
+    if missing:
+        raise ValueError(f"Peer data is missing required columns: {', '.join(sorted(missing))}")
+    if "size_band" not in peers.columns and "revenue" not in peers.columns:
+        raise ValueError("Peer data needs a size_band or revenue column")
+
+    records = pd.DataFrame({
+        "industry": peers["industry"].astype(str).to_numpy(),
+        "region": peers["region"].astype(str).to_numpy(),
+        "size_band": peers["size_band"].astype(str).to_numpy() if "size_band" in peers.columns
+            else size_band(pd.to_numeric(peers["revenue"], errors="coerce").fillna(0).to_numpy()),
+        "intensity": pd.to_numeric(peers["intensity"], errors="coerce").to_numpy()
+    }).dropna(subset=["intensity"])
+    if records.empty:
+        raise ValueError("Peer data has no valid intensity values")
+
+    # Every record belongs to one group per combination of dimensions rolled up to 'All'
+    expanded = []
+    for rolled_up in itertools.product([False, True], repeat=len(GROUP_DIMENSIONS)):
+        keys = [
+            np.full(len(records), ALL) if rollup else records[dimension].to_numpy()
+            for dimension, rollup in zip(GROUP_DIMENSIONS, rolled_up)
+        ]
+        expanded.append(pd.DataFrame({
+            "group": pd.Series(keys[0]) + "|" + pd.Series(keys[1]) + "|" + pd.Series(keys[2]),
+            "intensity": records["intensity"].to_numpy()
+        }))
+    expanded = pd.concat(expanded, ignore_index=True)
+
+    groups, codes = np.unique(expanded["group"].to_numpy(), return_inverse=True)
+    intensity = expanded["intensity"].to_numpy(dtype=np.float64)
+    order = np.lexsort((intensity, codes))
+    offsets = np.searchsorted(codes[order], np.arange(len(groups) + 1))
+
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, _INTENSITY_FILE), intensity[order])
+    np.save(os.path.join(index_dir, _OFFSETS_FILE), offsets.astype(np.int64))
+    with open(os.path.join(index_dir, _GROUPS_FILE), "w") as f:
+        json.dump({"groups": list(groups), "records": len(records)}, f)
+    _index_cache.pop(index_dir, None)
+
+    return {"records": len(records), "groups": len(groups)}
+
+def load_benchmark_index(index_dir=BENCHMARK_INDEX_DIR):
+    """
+    Open the benchmark index, reusing the open index when the files are unchanged
+
+    Args:
+        index_dir (str): Directory of the index files
+
+    Returns:
+        dict: Memory-mapped sorted intensities, group offsets and group positions,
+            or None when no index has been built
+    """
+    groups_path = os.path.join(index_dir, _GROUPS_FILE)
+    if not os.path.exists(groups_path):
+        return None
+
+    mtime = os.path.getmtime(groups_path)
+    cached = _index_cache.get(index_dir)
+    if cached is not None and cached["mtime"] == mtime:
+        return cached
+
+    with open(groups_path) as f:
+        metadata = json.load(f)
+    index = {
+        "mtime": mtime,
+        "records": metadata["records"],
+        "groups": {group: i for i, group in enumerate(metadata["groups"])},
+        "offsets": np.load(os.path.join(index_dir, _OFFSETS_FILE)),
+        "intensities": np.load(os.path.join(index_dir, _INTENSITY_FILE), mmap_mode="r")
+    }
+    index["dimensions"] = {
+        dimension: sorted({group.split("|")[d] for group in index["groups"]} - {ALL})
+        for d, dimension in enumerate(GROUP_DIMENSIONS)
+    }
+    _index_cache[index_dir] = index
+    return index
+
+def resolve_group(index, industry=ALL, region=ALL, band=ALL, min_peers=MIN_PEERS):
+    """
+    Find the most specific group with enough peers
+
+    Size band is rolled up first, then region, then industry.
+
+    Args:
+        index (dict): Output of load_benchmark_index
+        industry (str): Industry
+        region (str): Region
+        band (str): Size band
+        min_peers (int): Smallest acceptable number of peers
+
+    Returns:
+        tuple: (group key, number of peers)
+    """
+    candidates = [(industry, region, band), (industry, region, ALL), (industry, ALL, ALL), (ALL, ALL, ALL)]
+    for candidate in candidates:
+        key = group_key(*candidate)
+        if key in index["groups"]:
+            g = index["groups"][key]
+            peers = int(index["offsets"][g + 1] - index["offsets"][g])
+            if peers >= min_peers or candidate == candidates[-1]:
+                return key, peers
+    return None, 0
+
+def group_intensities(index, key):
+    """Sorted intensities of a group (a view into the memory-mapped array)"""
+    g = index["groups"][key]
+    return index["intensities"][index["offsets"][g]:index["offsets"][g + 1]]
+
+def percentile_rank(index, key, intensity):
+    """
+    Exact percentile rank of intensities within a group
+
+    Ties count half, so an intensity equal to every peer ranks at 50.
+
+    Args:
+        index (dict): Output of load_benchmark_index
+        key (str): Group key
+        intensity (float or array): Intensities in tCO2e per $M revenue
+
+    Returns:
+        float or numpy.ndarray: Share of peers with a lower intensity in percent
+    """
+    peers = group_intensities(index, key)
+    values = np.asarray(intensity, dtype=np.float64)
+    below = np.searchsorted(peers, values, side="left")
+    at_or_below = np.searchsorted(peers, values, side="right")
+    rank = (below + at_or_below) / 2 / max(len(peers), 1) * 100
+    return rank if rank.ndim else float(rank)
+
+def group_quantiles(index, key, percentiles):
+    """
+    Intensity at given percentiles of a group
+
+    Args:
+        index (dict): Output of load_benchmark_index
+        key (str): Group key
+        percentiles (array): Percentiles (0-100)
+
+    Returns:
+        numpy.ndarray: Intensities at the percentiles
+    """
+    peers = group_intensities(index, key)
+    positions = np.asarray(percentiles, dtype=np.float64) / 100 * (len(peers) - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, len(peers) - 1)
+    return peers[lower] + (peers[upper] - peers[lower]) * (positions - lower)
@@ -51,7 +51,50 @@ EMISSION_FACTORS = {
     "investments": 0.00001  # tCO2e per USD
 }
 
-def calculate_emissions(scope1_data, scope2_data, scope3_data):
+# Breakdown category produced by each numeric calculator input
+INPUT_CATEGORIES = {
+    "scope1": {
+        "natural_gas": "Natural Gas",
+        "diesel_stationary": "Stationary Diesel",
+        "fuel_oil": "Fuel Oil",
+        "propane": "Propane",
+        "coal": "Coal",
+        "gasoline": "Gasoline",
+        "diesel_mobile": "Mobile Diesel",
+        "jet_fuel": "Jet Fuel",
+        "marine_fuel": "Marine Fuel",
+        "refrigerant_r22": "R-22 Refrigerant",
+        "refrigerant_r410a": "R-410A Refrigerant",
+        "process_emissions": "Process Emissions",
+        "other_direct": "Other Direct"
+    },
+    "scope2": {
+        "purchased_electricity": "Purchased Electricity",
+        "purchased_steam": "Purchased Steam",
+        "purchased_cooling": "Purchased Cooling",
+        "purchased_heating": "Purchased Heating"
+    },
+    "scope3": {
+        "purchased_goods": "Purchased Goods & Services",
+        "capital_goods": "Capital Goods",
+        "fuel_energy_related": "Fuel & Energy-Related",
+        "upstream_transport": "Upstream Transportation",
+        "waste_operations": "Waste in Operations",
+        "business_travel": "Business Travel",
+        "employee_commuting": "Employee Commuting",
+        "upstream_leased": "Upstream Leased Assets",
+        "downstream_transport": "Downstream Transportation",
+        "processing_products": "Processing of Sold Products",
+        "use_of_products": "Use of Sold Products",
+        "end_of_life": "End-of-Life Treatment",
+        "downstream_leased": "Downstream Leased Assets",
+        "franchises": "Franchises",
+        "investments": "Investments",
+        "cloud_services": "Cloud Services"
+    }
+}
+
+def calculate_emissions(scope1_data, scope2_data, scope3_data, data_quality=None):
     """
     Calculate total emissions from all scopes
     
@@ -59,6 +102,8 @@ def calculate_emissions(scope1_data, scope2_data, scope3_data):
         scope1_data (dict): Dictionary of scope 1 emission sources and values
         scope2_data (dict): Dictionary of scope 2 emission sources and values
         scope3_data (dict): Dictionary of scope 3 emission sources and values
+        data_quality (dict): Optional data quality scores of imputed inputs by scope
+            (e.g. {'scope1': {'natural_gas': 0.6}}); reported inputs score 1.0
         
     Returns:
         dict: Dictionary containing total emissions and breakdown by scope
@@ -135,6 +180,13 @@ def calculate_emissions(scope1_data, scope2_data, scope3_data):
         scope1_emissions += r410a_emissions
         scope1_breakdown['R-410A Refrigerant'] = r410a_emissions
     
+    # Refrigerant equipment inventory (already in tCO2e per gas)
+    if 'refrigerant_inventory' in scope1_data:
+        for gas, gas_emissions in scope1_data['refrigerant_inventory'].items():
+            scope1_emissions += gas_emissions
+            category = f'{gas} Refrigerant'
+            scope1_breakdown[category] = scope1_breakdown.get(category, 0) + gas_emissions
+    
     if 'process_emissions' in scope1_data:
         process_emissions = scope1_data['process_emissions']  # Already in tCO2e
         scope1_emissions += process_emissions
@@ -268,6 +320,12 @@ def calculate_emissions(scope1_data, scope2_data, scope3_data):
         scope3_emissions += investment_emissions
         scope3_breakdown['Investments'] = investment_emissions
     
+    # Cloud services (already in tCO2e)
+    if 'cloud_services' in scope3_data:
+        cloud_emissions = scope3_data['cloud_services']
+        scope3_emissions += cloud_emissions
+        scope3_breakdown['Cloud Services'] = cloud_emissions
+    
     # Set results
     results['scope1_total'] = scope1_emissions
     results['scope2_total'] = scope2_emissions
@@ -279,4 +337,19 @@ def calculate_emissions(scope1_data, scope2_data, scope3_data):
     results['scope2_breakdown'] = {k: v for k, v in scope2_breakdown.items() if v > 0}
     results['scope3_breakdown'] = {k: v for k, v in scope3_breakdown.items() if v > 0}
     
+    # Carry imputation flags and data quality scores through to the breakdown
+    if data_quality:
+        weighted_score = 0
+        results['data_quality'] = {}
+        for scope in ['scope1', 'scope2', 'scope3']:
+            scope_quality = {
+                INPUT_CATEGORIES[scope][field]: score
+                for field, score in data_quality.get(scope, {}).items()
+                if field in INPUT_CATEGORIES[scope]
+            }
+            results['data_quality'][scope] = scope_quality
+            for category, value in results[f'{scope}_breakdown'].items():
+                weighted_score += value * scope_quality.get(category, 1.0)
+        results['data_quality']['overall'] = weighted_score / results['total'] if results['total'] > 0 else 1.0
+    
     return results
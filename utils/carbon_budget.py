@@ -0,0 +1,91 @@
+import numpy as np
+
+# Carbon-budget pathway solver
+# Pathways follow E_t = E_0 * (1 - t/n)^k, which reaches zero exactly in the
+# net zero year for any shape exponent k. Larger k front-loads reductions and
+# lowers cumulative emissions. For each entity the solver finds the smallest
+# k that keeps cumulative emissions within the budget, bounded by the largest
+# annual cut allowed. All entities are solved together by vectorized bisection.
+
+MIN_EXPONENT = 0.05
+MAX_EXPONENT = 50.0
+BISECTION_STEPS = 60
+
+def _power_pathways(exponents, horizons, elapsed):
+    """Remaining share of base emissions for each entity and year"""
+    remaining = np.clip(1 - elapsed[None, :] / horizons[:, None], 0, 1)
+    return remaining ** exponents[:, None]
+
+def solve_budget_pathways(base_emissions, budgets, net_zero_years, max_annual_cut, base_year=2023):
+    """
+    Solve budget-constrained pathways to net zero for many entities at once
+
+    The cumulative budget covers emissions from the base year up to the net
+    zero year. The maximum annual cut is a fraction of base emissions. The
+    returned pathway uses the whole budget where possible, keeping reductions
+    as gradual as the budget allows.
+
+    Args:
+        base_emissions (float or array): Base year emissions per entity in tCO2e
+        budgets (float or array): Cumulative carbon budget per entity in tCO2e
+        net_zero_years (int or array): Net zero year per entity
+        max_annual_cut (float or array): Largest allowed annual cut as a fraction of base emissions
+        base_year (int): Base year for calculations
+
+    Returns:
+        dict: Years, emissions per entity and year, shape exponents, cumulative
+            emissions, largest annual cut and feasibility flags
+    """
+    base = np.atleast_1d(np.asarray(base_emissions, dtype=np.float64))
+    budgets = np.broadcast_to(np.asarray(budgets, dtype=np.float64), base.shape)
+    net_zero_years = np.broadcast_to(np.asarray(net_zero_years, dtype=np.int64), base.shape)
+    max_cut = np.broadcast_to(np.asarray(max_annual_cut, dtype=np.float64), base.shape)
+
+    horizons = np.maximum(net_zero_years - base_year, 1).astype(np.float64)
+    years = np.arange(base_year, int(net_zero_years.max()) + 1)
+    elapsed = (years - base_year).astype(np.float64)
+
+    # Closed-form bounds on k from the maximum annual cut. The largest cut is
+    # in the first year when k >= 1 and in the last year when k < 1.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        upper = np.log1p(-np.minimum(max_cut, 1 - 1e-12)) / np.log1p(-1 / horizons)
+        lower = np.log(max_cut) / -np.log(horizons)
+    upper = np.where(horizons > 1, upper, MAX_EXPONENT)
+    lower = np.where(horizons > 1, lower, MIN_EXPONENT)
+    upper = np.clip(np.nan_to_num(upper, nan=MIN_EXPONENT), MIN_EXPONENT, MAX_EXPONENT)
+    lower = np.clip(np.nan_to_num(lower, nan=MAX_EXPONENT), MIN_EXPONENT, MAX_EXPONENT)
+    reaches_net_zero = max_cut * horizons >= 1
+
+    # Bisection in log space for the smallest k whose cumulative emissions fit the budget
+    budget_share = budgets / np.where(base > 0, base, 1)
+    log_low = np.full(base.shape, np.log(MIN_EXPONENT))
+    log_high = np.full(base.shape, np.log(MAX_EXPONENT))
+    for _ in range(BISECTION_STEPS):
+        log_mid = (log_low + log_high) / 2
+        cumulative_share = _power_pathways(np.exp(log_mid), horizons, elapsed).sum(axis=1)
+        within_budget = cumulative_share <= budget_share
+        log_high = np.where(within_budget, log_mid, log_high)
+        log_low = np.where(within_budget, log_low, log_mid)
+    budget_exponent = np.exp(log_high)
+
+    exponents = np.clip(budget_exponent, lower, upper)
+    emissions = base[:, None] * _power_pathways(exponents, horizons, elapsed)
+
+    # Without enough cut capacity to reach zero, decline at the maximum cut
+    capped = base[:, None] * np.clip(1 - max_cut[:, None] * elapsed[None, :], 0, 1)
+    emissions = np.where(reaches_net_zero[:, None], emissions, capped)
+
+    cumulative = emissions.sum(axis=1)
+    cuts = -np.diff(emissions, axis=1)
+    largest_cut = cuts.max(axis=1) / np.where(base > 0, base, 1) if cuts.shape[1] else np.zeros(base.shape)
+
+    return {
+        'years': years,
+        'emissions': emissions,
+        'exponents': np.where(reaches_net_zero, exponents, np.nan),
+        'cumulative_emissions': cumulative,
+        'largest_annual_cut': largest_cut,
+        'within_budget': cumulative <= budgets * (1 + 1e-9),
+        'reaches_net_zero': reaches_net_zero,
+        'feasible': reaches_net_zero & (cumulative <= budgets * (1 + 1e-9))
+    }
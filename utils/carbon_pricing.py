@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+from utils.constants import INTERNAL_PRICE_MECHANISMS
+
+# Internal carbon price P&L
+# Entity emissions are stacked into an entity x category x year array (a
+# single year is held across the horizon). Each category gets the share of
+# the price its scope carries under the chosen mechanism (a shadow price
+# covers every scope, an internal fee only scopes 1 and 2), optionally
+# overridden per category. Charges for every price path are one einsum of
+# emissions, category rates and price paths. Business units receive the
+# charges of all entities below them through an ancestor matrix built from
+# the parent links (with ownership shares multiplied along the path), so the
+# roll-up to every level of the hierarchy is one more matrix product.
+
+ENTITY_COLUMNS = ["entity_id", "scope", "category", "emissions"]
+SCOPES = ["scope1", "scope2", "scope3"]
+PRICE_PATH_COLUMNS = ["path", "year", "price"]
+
+def breakdown_rows(results, entity_id, parent_id=None):
+    """
+    Convert a calculate_emissions result into entity emissions rows
+
+    Args:
+        results (dict): Output of calculate_emissions (or the scope breakdowns in session state)
+        entity_id (str): Entity identifier
+        parent_id (str): Business unit the entity belongs to (None for a top-level entity)
+
+    Returns:
+        pandas.DataFrame: Rows with entity_id, parent_id, scope, category and emissions
+    """
+    rows = [
+        (scope, category, emissions)
+        for scope in SCOPES
+        for category, emissions in results.get(f'{scope}_breakdown', {}).items()
+    ]
+    return pd.DataFrame({
+        "entity_id": str(entity_id),
+        "parent_id": parent_id,
+        "scope": [scope for scope, _, _ in rows],
+        "category": [category for _, category, _ in rows],
+        "emissions": [emissions for _, _, emissions in rows]
+    })
+
+def emissions_matrix(rows):
+    """
+    Pivot entity emissions rows into a matrix
+
+    Args:
+        rows (pandas.DataFrame): Rows with entity_id, scope, category and emissions (tCO2e)
+
+    Returns:
+        dict: Entity ids, (scope, category) columns and emissions indexed [entity, category]
+    """
+    missing = set(ENTITY_COLUMNS) - set(rows.columns)
+    if missing:
+        raise ValueError(f"Entity emissions are missing required columns: {', '.join(sorted(missing))}")
+    unknown = set(rows["scope"].astype(str)) - set(SCOPES)
+    if unknown:
+        raise ValueError(f"Scopes must be one of: {', '.join(SCOPES)}")
+
+    pivot = rows.assign(
+        entity_id=rows["entity_id"].astype(str),
+        scope=rows["scope"].astype(str),
+        emissions=pd.to_numeric(rows["emissions"], errors="coerce").fillna(0.0)
+    ).pivot_table(index="entity_id", columns=["scope", "category"], values="emissions", aggfunc="sum", fill_value=0.0)
+
+    return {
+        "entities": list(pivot.index),
+        "scopes": list(pivot.columns.get_level_values(0)),
+        "categories": list(pivot.columns.get_level_values(1)),
+        "emissions": pivot.to_numpy(dtype=np.float64)
+    }
+
+def category_rates(scopes, categories, mechanism="Shadow Price", category_overrides=None):
+    """
+    Share of the carbon price charged on each category
+
+    Args:
+        scopes (list): Scope of each category
+        categories (list): Category names
+        mechanism (str): Name from INTERNAL_PRICE_MECHANISMS
+        category_overrides (dict): Share of the price for specific categories
+
+    Returns:
+        numpy.ndarray: Price share per category
+    """
+    if mechanism not in INTERNAL_PRICE_MECHANISMS:
+        raise ValueError(f"Price mechanism must be one of: {', '.join(INTERNAL_PRICE_MECHANISMS)}")
+    overrides = category_overrides or {}
+    coverage = INTERNAL_PRICE_MECHANISMS[mechanism]
+    return np.array([overrides.get(category, coverage[scope]) for scope, category in zip(scopes, categories)],
+                    dtype=np.float64)
+
+def price_paths_from_rows(rows, years):
+    """
+    Interpolate uploaded price paths over years
+
+    Args:
+        rows (pandas.DataFrame): Rows with path, year and price (USD/tCO2e)
+        years (array): Calendar years
+
+    Returns:
+        tuple: (path names, prices indexed [path, year])
+    """
+    missing = set(PRICE_PATH_COLUMNS) - set(rows.columns)
+    if missing:
+        raise ValueError(f"Price paths are missing required columns: {', '.join(sorted(missing))}")
+
+    rows = rows.assign(
+        path=rows["path"].astype(str),
+        year=pd.to_numeric(rows["year"], errors="coerce"),
+        price=pd.to_numeric(rows["price"], errors="coerce")
+    ).dropna(subset=["year", "price"]).sort_values(["path", "year"])
+    names = list(rows["path"].unique())
+    prices = np.array([
+        np.interp(years, group["year"].to_numpy(), group["price"].to_numpy())
+        for _, group in rows.groupby("path", sort=False)
+    ]).reshape(len(names), len(years))
+    return names, prices
+
+def hierarchy_matrix(entities, parents, shares=None):
+    """
+    Build the matrix that rolls entity charges up to every business unit
+
+    Args:
+        entities (list): Entity ids (columns of the matrix)
+        parents (dict): Parent id of each entity or business unit (None or missing at the top)
+        shares (dict): Share of a unit's charges passed to its parent (defaults to 1.0)
+
+    Returns:
+        tuple: (node ids, matrix indexed [node, entity]); each entity is a node with weight 1.0
+    """
+    parents = {str(node): str(parent) for node, parent in parents.items()
+               if parent is not None and not pd.isna(parent) and str(parent) != ""}
+    shares = {str(node): float(share) for node, share in (shares or {}).items() if not pd.isna(share)}
+    nodes = list(dict.fromkeys([str(e) for e in entities] + list(parents) + list(parents.values())))
+    position = {node: i for i, node in enumerate(nodes)}
+
+    # Parent position and share of every node (-1 at the top)
+    parent_of = np.array([position.get(parents.get(node), -1) for node in nodes])
+    share_of = np.array([shares.get(node, 1.0) for node in nodes])
+
+    # Walk every entity up the tree one level at a time
+    n_entities = len(entities)
+    matrix = np.zeros((len(nodes), n_entities))
+    columns = np.arange(n_entities)
+    current = np.arange(n_entities)
+    weight = np.ones(n_entities)
+    matrix[current, columns] = 1.0
+    for _ in range(len(nodes)):
+        weight = weight * share_of[current]
+        current = parent_of[current]
+        climbing = current >= 0
+        if not climbing.any():
+            return nodes, matrix
+        current, weight, columns = current[climbing], weight[climbing], columns[climbing]
+        matrix[current, columns] += weight
+    raise ValueError("Entity hierarchy contains a cycle")
+
+def carbon_charges(emissions, rates, prices, year_factors=None):
+    """
+    Internal carbon charges for every price path, entity and year
+
+    Args:
+        emissions (array): Emissions indexed [entity, category] in tCO2e
+        rates (array): Price share per category
+        prices (array): Carbon prices indexed [path, year] in USD/tCO2e
+        year_factors (array): Emissions in each year relative to the inventory (defaults to 1.0)
+
+    Returns:
+        numpy.ndarray: Charges in USD indexed [path, entity, year]
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=np.float64))
+    factors = np.ones(prices.shape[1]) if year_factors is None else np.asarray(year_factors, dtype=np.float64)
+    return np.einsum("ec,c,py,y->pey", np.asarray(emissions, dtype=np.float64), rates, prices, factors, optimize=True)
+
+def allocate_charges(charges, hierarchy):
+    """
+    Roll charges up the entity hierarchy
+
+    Args:
+        charges (array): Charges indexed [path, entity, year]
+        hierarchy (numpy.ndarray): Matrix from hierarchy_matrix indexed [node, entity]
+
+    Returns:
+        numpy.ndarray: Charges indexed [path, node, year]
+    """
+    return np.einsum("ne,pey->pny", hierarchy, charges, optimize=True)
+
+def path_summary(charges, path_names, years, discount_rate=0.0):
+    """
+    Summarize total charges per price path
+
+    Args:
+        charges (array): Charges indexed [path, entity, year]
+        path_names (list): Name of each price path
+        years (array): Calendar years
+        discount_rate (float): Annual discount rate for the present value
+
+    Returns:
+        pandas.DataFrame: First-year, last-year, cumulative and present-value charge per path
+    """
+    annual = charges.sum(axis=1)
+    discount = (1 + discount_rate) ** -np.arange(len(years), dtype=np.float64)
+    return pd.DataFrame({
+        "path": path_names,
+        "first_year": annual[:, 0],
+        "last_year": annual[:, -1],
+        "cumulative": annual.sum(axis=1),
+        "present_value": annual @ discount
+    })
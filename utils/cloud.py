@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from utils.calculations import EMISSION_FACTORS
+from utils.constants import CLOUD_USAGE_ENERGY, CLOUD_PUE, CLOUD_REGION_INTENSITY
+
+# Cloud billing and usage exports
+# Exports are streamed in chunks and each chunk is reduced to per account,
+# service and month totals before being merged, so memory is bounded by the
+# number of groups rather than the size of the export.
+
+CLOUD_CHUNK_SIZE = 500_000
+CLOUD_COLUMNS = ["account_id", "service", "region", "usage_type", "usage_date", "usage_amount"]
+GROUP_COLUMNS = ["account_id", "service", "month"]
+
+def _read_export(source, chunksize):
+    """Yield chunks from a CSV or JSON lines export"""
+    name = str(getattr(source, "name", source))
+    if name.endswith((".jsonl", ".json")):
+        reader = pd.read_json(source, lines=True, chunksize=chunksize)
+    else:
+        reader = pd.read_csv(source, usecols=lambda c: c in CLOUD_COLUMNS, chunksize=chunksize)
+
+    for chunk in reader:
+        missing = set(CLOUD_COLUMNS) - set(chunk.columns)
+        if missing:
+            raise ValueError(f"Cloud export is missing required columns: {', '.join(sorted(missing))}")
+        yield chunk[CLOUD_COLUMNS]
+
+def _chunk_emissions(chunk, energy_per_unit, usage_types, regions, intensities, default_intensity):
+    """Convert one chunk of usage records into energy and emissions"""
+    usage_codes = pd.Categorical(chunk["usage_type"], categories=usage_types).codes
+    region_codes = pd.Categorical(chunk["region"], categories=regions).codes
+
+    amount = pd.to_numeric(chunk["usage_amount"], errors="coerce").fillna(0.0).to_numpy()
+    known_usage = usage_codes >= 0
+    energy = np.where(known_usage, amount * energy_per_unit[usage_codes] * CLOUD_PUE, 0.0)
+    intensity = np.where(region_codes >= 0, intensities[region_codes], default_intensity)
+
+    return pd.DataFrame({
+        "account_id": chunk["account_id"].astype(str).to_numpy(),
+        "service": chunk["service"].astype(str).to_numpy(),
+        "month": pd.to_datetime(chunk["usage_date"]).dt.to_period("M").astype(str).to_numpy(),
+        "energy_kwh": energy,
+        "emissions": energy * intensity,
+        "unmapped_records": (~known_usage).astype(np.int64),
+        "default_region_records": ((region_codes < 0) & known_usage).astype(np.int64)
+    })
+
+def calculate_cloud_emissions(sources, chunksize=CLOUD_CHUNK_SIZE):
+    """
+    Calculate cloud emissions from billing or usage exports
+
+    Usage is converted to energy with per-usage-type coefficients and the
+    data center PUE, then to emissions with the region grid intensity.
+    Regions without an intensity use the default North America grid factor.
+    Files ending in .jsonl or .json are read as JSON lines, all others as CSV.
+
+    Args:
+        sources (list): CSV or JSON lines paths or file-like objects
+        chunksize (int): Number of records read per chunk
+
+    Returns:
+        dict: Totals per account, service and month plus the Scope 3 input
+    """
+    usage_types = list(CLOUD_USAGE_ENERGY.keys())
+    energy_per_unit = np.array([CLOUD_USAGE_ENERGY[t]["kwh_per_unit"] for t in usage_types])
+    regions = list(CLOUD_REGION_INTENSITY.keys())
+    intensities = np.array([CLOUD_REGION_INTENSITY[r] for r in regions])
+    default_intensity = EMISSION_FACTORS["electricity"]["North America"]
+
+    totals = None
+    for source in sources:
+        for chunk in _read_export(source, chunksize):
+            chunk_totals = _chunk_emissions(
+                chunk, energy_per_unit, usage_types, regions, intensities, default_intensity
+            ).groupby(GROUP_COLUMNS).sum()
+
+            # Merge into the running totals; size is bounded by the number of groups
+            totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0)
+
+    if totals is None:
+        totals = pd.DataFrame(columns=GROUP_COLUMNS + ["energy_kwh", "emissions", "unmapped_records", "default_region_records"])
+    else:
+        totals = totals.reset_index()
+        counts = ["unmapped_records", "default_region_records"]
+        totals[counts] = totals[counts].astype(np.int64)
+
+    return {
+        "by_account_service_month": totals,
+        "by_service": totals.groupby("service")[["energy_kwh", "emissions"]].sum().sort_values("emissions", ascending=False),
+        "total_energy_kwh": float(totals["energy_kwh"].sum()),
+        "total_emissions": float(totals["emissions"].sum()),
+        "unmapped_records": int(totals["unmapped_records"].sum()),
+        "default_region_records": int(totals["default_region_records"].sum())
+    }
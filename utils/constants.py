@@ -114,6 +114,30 @@ REDUCTION_TARGETS = {
     }
 }
 
+# Sector 1.5°C decarbonization pathways (% reduction from base year by milestone year)
+SECTOR_PATHWAYS = {
+    "Agriculture": {2030: 25, 2040: 50, 2050: 75},
+    "Automotive": {2030: 45, 2040: 75, 2050: 95},
+    "Aviation": {2030: 20, 2040: 50, 2050: 80},
+    "Chemical": {2030: 35, 2040: 65, 2050: 90},
+    "Construction": {2030: 40, 2040: 70, 2050: 90},
+    "Education": {2030: 45, 2040: 75, 2050: 90},
+    "Energy": {2030: 50, 2040: 85, 2050: 97},
+    "Financial Services": {2030: 45, 2040: 75, 2050: 90},
+    "Food & Beverage": {2030: 35, 2040: 60, 2050: 85},
+    "Healthcare": {2030: 42, 2040: 72, 2050: 90},
+    "Hospitality": {2030: 42, 2040: 72, 2050: 90},
+    "Information Technology": {2030: 50, 2040: 80, 2050: 95},
+    "Manufacturing": {2030: 38, 2040: 68, 2050: 90},
+    "Mining": {2030: 35, 2040: 65, 2050: 88},
+    "Real Estate": {2030: 45, 2040: 75, 2050: 95},
+    "Retail": {2030: 42, 2040: 72, 2050: 90},
+    "Telecommunications": {2030: 45, 2040: 75, 2050: 92},
+    "Transportation": {2030: 35, 2040: 65, 2050: 90},
+    "Utilities": {2030: 55, 2040: 88, 2050: 98},
+    "Other": {2030: 42, 2040: 72, 2050: 90}
+}
+
 # Country emissions per capita (tCO2e)
 COUNTRY_EMISSIONS = {
     "Qatar": 37.0,
@@ -133,13 +157,28 @@ COUNTRY_EMISSIONS = {
     "Global Average": 4.5
 }
 
+# Country total annual emissions (tCO2e)
+COUNTRY_TOTAL_EMISSIONS = {
+    "United States": 5.0e9,
+    "Germany": 7.0e8,
+    "Finland": 5.0e7,
+    "Jamaica": 7.8e6,
+    "Barbados": 4.4e5
+}
+
 # Carbon credit types and price ranges
 CARBON_CREDIT_TYPES = {
-    "Renewable Energy": {"min_price": 3, "max_price": 15, "avg_price": 8},
-    "Forestry & Conservation": {"min_price": 5, "max_price": 25, "avg_price": 12},
-    "Methane Capture": {"min_price": 6, "max_price": 20, "avg_price": 10},
-    "Energy Efficiency": {"min_price": 4, "max_price": 18, "avg_price": 9},
-    "Direct Air Capture": {"min_price": 50, "max_price": 500, "avg_price": 100}
+    "Renewable Energy": {"min_price": 3, "max_price": 15, "avg_price": 8, "removal": False},
+    "Forestry & Conservation": {"min_price": 5, "max_price": 25, "avg_price": 12, "removal": False},
+    "Methane Capture": {"min_price": 6, "max_price": 20, "avg_price": 10, "removal": False},
+    "Energy Efficiency": {"min_price": 4, "max_price": 18, "avg_price": 9, "removal": False},
+    "Direct Air Capture": {"min_price": 50, "max_price": 500, "avg_price": 100, "removal": True}
+}
+
+# Reversal risk of nature-based credits (annual chance of a reversal event per project,
+# mean share of the project's stored carbon lost in an event)
+CREDIT_REVERSAL_RISK = {
+    "Forestry & Conservation": {"annual_probability": 0.02, "mean_severity": 0.25}
 }
 
 # Industry-specific recommendations for emissions reduction
@@ -201,3 +240,146 @@ INDUSTRY_RECOMMENDATIONS = {
         "Engage suppliers on emissions reduction initiatives"
     ]
 }
+
+# Vehicle classes for fleet telematics (fuel type and typical consumption)
+VEHICLE_CLASSES = {
+    "Passenger Car - Gasoline": {"fuel": "gasoline", "liters_per_100km": 8.0},
+    "Passenger Car - Diesel": {"fuel": "diesel_mobile", "liters_per_100km": 6.5},
+    "Light Truck - Gasoline": {"fuel": "gasoline", "liters_per_100km": 11.5},
+    "Light Commercial Van - Diesel": {"fuel": "diesel_mobile", "liters_per_100km": 9.5},
+    "Medium Truck - Diesel": {"fuel": "diesel_mobile", "liters_per_100km": 22.0},
+    "Heavy Truck - Diesel": {"fuel": "diesel_mobile", "liters_per_100km": 33.0}
+}
+
+# Refrigerant global warming potentials (100-year, IPCC AR4, kgCO2e per kg)
+REFRIGERANT_GWP = {
+    "R-11": 4750,
+    "R-12": 10900,
+    "R-22": 1810,
+    "R-23": 14800,
+    "R-32": 675,
+    "R-125": 3500,
+    "R-134a": 1430,
+    "R-143a": 4470,
+    "R-152a": 124,
+    "R-290": 3,
+    "R-404A": 3922,
+    "R-407A": 2107,
+    "R-407C": 1774,
+    "R-407F": 1825,
+    "R-410A": 2088,
+    "R-422D": 2729,
+    "R-427A": 2138,
+    "R-438A": 2265,
+    "R-448A": 1387,
+    "R-449A": 1397,
+    "R-452A": 2140,
+    "R-502": 4657,
+    "R-507A": 3985,
+    "R-508B": 13396,
+    "R-513A": 631,
+    "R-600a": 3,
+    "R-717": 0,
+    "R-744": 1,
+    "R-1234yf": 4,
+    "R-1234ze": 7
+}
+
+# Screening method default annual leak rates by equipment type (% of charge)
+EQUIPMENT_LEAK_RATES = {
+    "Domestic Refrigeration": 0.5,
+    "Stand-alone Commercial": 15,
+    "Medium/Large Commercial Refrigeration": 35,
+    "Transport Refrigeration": 50,
+    "Industrial Refrigeration": 25,
+    "Chillers": 15,
+    "Residential and Commercial AC": 10
+}
+
+# Cloud usage energy coefficients (kWh per usage unit, excluding PUE)
+CLOUD_USAGE_ENERGY = {
+    "compute": {"unit": "vCPU-hour", "kwh_per_unit": 0.0024},
+    "gpu": {"unit": "GPU-hour", "kwh_per_unit": 0.25},
+    "memory": {"unit": "GB-hour", "kwh_per_unit": 0.000392},
+    "storage_ssd": {"unit": "TB-hour", "kwh_per_unit": 0.0012},
+    "storage_hdd": {"unit": "TB-hour", "kwh_per_unit": 0.00065},
+    "networking": {"unit": "GB", "kwh_per_unit": 0.001}
+}
+
+# Data center power usage effectiveness
+CLOUD_PUE = 1.135
+
+# Cloud region grid intensity (tCO2e per kWh)
+CLOUD_REGION_INTENSITY = {
+    "us-east-1": 0.000379,
+    "us-east-2": 0.000411,
+    "us-west-1": 0.000190,
+    "us-west-2": 0.000136,
+    "ca-central-1": 0.000013,
+    "eu-west-1": 0.000279,
+    "eu-west-2": 0.000225,
+    "eu-west-3": 0.000051,
+    "eu-central-1": 0.000311,
+    "eu-north-1": 0.000009,
+    "ap-south-1": 0.000708,
+    "ap-northeast-1": 0.000457,
+    "ap-southeast-1": 0.000408,
+    "ap-southeast-2": 0.000790,
+    "sa-east-1": 0.000074,
+    "af-south-1": 0.000900
+}
+
+# Company size bands by number of employees (used for peer grouping)
+SIZE_BANDS = {
+    "Small": (0, 50),
+    "Medium": (50, 250),
+    "Large": (250, 1000),
+    "Enterprise": (1000, float("inf"))
+}
+
+# Scope splits applied to a headline reduction target (multiplier per scope)
+SCOPE_TARGET_SPLITS = {
+    "Uniform": {"scope1": 1.0, "scope2": 1.0, "scope3": 1.0},
+    "Operational Focus": {"scope1": 1.2, "scope2": 1.5, "scope3": 0.8},
+    "Value Chain Focus": {"scope1": 0.8, "scope2": 1.0, "scope3": 1.2}
+}
+
+# Business-as-usual growth drivers by emission category (default: revenue)
+CATEGORY_GROWTH_DRIVERS = {
+    "Business Travel": "employees",
+    "Employee Commuting": "employees",
+    "Upstream Leased Assets": "employees",
+    "Process Emissions": "revenue",
+    "Investments": "none",
+    "Franchises": "none"
+}
+
+# Annual emissions intensity improvement under business-as-usual (%, default 1.0)
+CATEGORY_INTENSITY_IMPROVEMENT = {
+    "Purchased Electricity": 3.0,
+    "Purchased Steam": 1.5,
+    "Purchased Cooling": 1.5,
+    "Purchased Heating": 1.5,
+    "Cloud Services": 5.0
+}
+
+# Internal carbon price paths (USD/tCO2e at anchor years, interpolated linearly between them)
+CARBON_PRICE_PATHS = {
+    "No Carbon Price": {2024: 0, 2050: 0},
+    "Current Policies": {2024: 25, 2030: 40, 2050: 75},
+    "Announced Pledges": {2024: 40, 2030: 90, 2050: 160},
+    "Net Zero 2050": {2024: 60, 2030: 140, 2050: 250}
+}
+
+# Internal carbon price mechanisms: share of the price applied to each scope
+INTERNAL_PRICE_MECHANISMS = {
+    "Shadow Price": {"scope1": 1.0, "scope2": 1.0, "scope3": 1.0},
+    "Internal Fee": {"scope1": 1.0, "scope2": 1.0, "scope3": 0.0}
+}
+
+# Energy price scenarios (annual real price change, %)
+ENERGY_PRICE_SCENARIOS = {
+    "Low": -1.0,
+    "Reference": 1.5,
+    "High": 4.0
+}
@@ -0,0 +1,204 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Country emissions time series
+# National inventories (country x year x gas) are stored as a dense float32
+# cube with a population matrix, one .npy file per array, so ~200 countries
+# over 1990-2024 fit in a few hundred kilobytes and are memory-mapped on first
+# use. For every year and gas the countries are also stored ranked by
+# emissions, so the country closest to an emissions total is a searchsorted
+# on the ranked column instead of a scan over all countries.
+
+COUNTRY_STORE_DIR = os.path.join("data", "country_store")
+RECORD_COLUMNS = ["country", "year", "gas", "emissions"]
+TOTAL_GAS = "Total"
+
+_ARRAY_FILES = {
+    "emissions": "emissions.npy",
+    "population": "population.npy",
+    "ranked_countries": "ranked_countries.npy",
+    "ranked_emissions": "ranked_emissions.npy",
+    "ranked_counts": "ranked_counts.npy"
+}
+_META_FILE = "countries.json"
+
+# Stores already opened, keyed by (directory, modification time)
+_store_cache = {}
+
+def build_country_store(records, store_dir=COUNTRY_STORE_DIR):
+    """
+    Build the country store from long-format inventory records and write it to disk
+
+    A 'Total' gas is added as the sum of all gases when the records do not include it.
+
+    Args:
+        records (pandas.DataFrame): Rows with country, year, gas and emissions (tCO2e),
+            plus an optional population column
+        store_dir (str): Directory of the store files
+
+    Returns:
+        dict: Summary of the store (countries, years, gases)
+    """
+    missing = set(RECORD_COLUMNS) - set(records.columns)
+    if missing:
+        raise ValueError(f"Country records are missing required columns: {', '.join(sorted(missing))}")
+
+    records = records.assign(
+        country=records["country"].astype(str),
+        gas=records["gas"].astype(str),
+        year=pd.to_numeric(records["year"], errors="coerce"),
+        emissions=pd.to_numeric(records["emissions"], errors="coerce")
+    ).dropna(subset=["year", "emissions"])
+    if records.empty:
+        raise ValueError("Country records have no valid emissions")
+    records["year"] = records["year"].astype(np.int64)
+
+    emissions = records.pivot_table(index=["country", "year"], columns="gas", values="emissions", aggfunc="sum")
+    if TOTAL_GAS not in emissions.columns:
+        emissions[TOTAL_GAS] = emissions.sum(axis=1, min_count=1)
+
+    countries = sorted(records["country"].unique())
+    years = np.arange(records["year"].min(), records["year"].max() + 1)
+    gases = [TOTAL_GAS] + sorted(gas for gas in emissions.columns if gas != TOTAL_GAS)
+    grid = pd.MultiIndex.from_product([countries, years], names=["country", "year"])
+    cube = emissions.reindex(index=grid, columns=gases).to_numpy(dtype=np.float32).reshape(len(countries), len(years), len(gases))
+
+    population = np.full((len(countries), len(years)), np.nan, dtype=np.float32)
+    if "population" in records.columns:
+        population = records.groupby(["country", "year"])["population"].first().reindex(grid) \
+            .to_numpy(dtype=np.float32).reshape(len(countries), len(years))
+
+    # Countries ranked by emissions for every year and gas (missing values last)
+    ranked_countries = np.argsort(cube, axis=0, kind="stable").astype(np.int16)
+    ranked_emissions = np.take_along_axis(cube, ranked_countries.astype(np.int64), axis=0)
+    ranked_counts = (~np.isnan(cube)).sum(axis=0)
+
+    arrays = {
+        "emissions": cube,
+        "population": population,
+        "ranked_countries": ranked_countries,
+        "ranked_emissions": ranked_emissions,
+        "ranked_counts": ranked_counts
+    }
+    os.makedirs(store_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(store_dir, _ARRAY_FILES[name]), array)
+    with open(os.path.join(store_dir, _META_FILE), "w") as f:
+        json.dump({"countries": countries, "years": years.tolist(), "gases": gases}, f)
+    _store_cache.pop(store_dir, None)
+
+    return {"countries": len(countries), "years": len(years), "gases": len(gases)}
+
+def load_country_store(store_dir=COUNTRY_STORE_DIR):
+    """
+    Open the country store, reusing the open store when the files are unchanged
+
+    Args:
+        store_dir (str): Directory of the store files
+
+    Returns:
+        dict: Countries, years, gases and memory-mapped arrays, or None when no store has been built
+    """
+    meta_path = os.path.join(store_dir, _META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+
+    mtime = os.path.getmtime(meta_path)
+    cached = _store_cache.get(store_dir)
+    if cached is not None and cached["mtime"] == mtime:
+        return cached
+
+    with open(meta_path) as f:
+        metadata = json.load(f)
+    store = {
+        "mtime": mtime,
+        "countries": metadata["countries"],
+        "years": np.asarray(metadata["years"]),
+        "gases": metadata["gases"],
+        **{name: np.load(os.path.join(store_dir, file), mmap_mode="r") for name, file in _ARRAY_FILES.items()}
+    }
+    _store_cache[store_dir] = store
+    return store
+
+def country_series(store, countries, gas=TOTAL_GAS, per_capita=False):
+    """
+    Emissions time series for countries
+
+    Args:
+        store (dict): Output of load_country_store
+        countries (list): Country names
+        gas (str): Gas from the store (defaults to the total)
+        per_capita (bool): Divide by population
+
+    Returns:
+        pandas.DataFrame: Emissions in tCO2e (or tCO2e per person) indexed by year, one column per country
+    """
+    rows = [store["countries"].index(country) for country in countries]
+    values = np.asarray(store["emissions"][rows, :, store["gases"].index(gas)], dtype=np.float64)
+    if per_capita:
+        population = np.asarray(store["population"][rows], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(population > 0, values / population, np.nan)
+    return pd.DataFrame(values.T, index=pd.Index(store["years"], name="year"), columns=list(countries))
+
+def latest_year(store, gas=TOTAL_GAS):
+    """Latest year with emissions for any country"""
+    counts = store["ranked_counts"][:, store["gases"].index(gas)]
+    years_with_data = np.flatnonzero(counts > 0)
+    return int(store["years"][years_with_data[-1]]) if len(years_with_data) else None
+
+def closest_countries(store, emissions, year=None, gas=TOTAL_GAS, n=3):
+    """
+    Find the countries whose emissions are closest to a total
+
+    Args:
+        store (dict): Output of load_country_store
+        emissions (float): Annual emissions in tCO2e
+        year (int): Inventory year (defaults to the latest year with data)
+        gas (str): Gas from the store (defaults to the total)
+        n (int): Number of countries
+
+    Returns:
+        pandas.DataFrame: Closest countries with their emissions, nearest first
+    """
+    year = latest_year(store, gas) if year is None else year
+    if year not in store["years"]:
+        raise ValueError(f"No country emissions for {year}")
+    y = int(np.searchsorted(store["years"], year))
+    g = store["gases"].index(gas)
+    count = int(store["ranked_counts"][y, g])
+    ranked = np.asarray(store["ranked_emissions"][:count, y, g], dtype=np.float64)
+
+    # The n closest lie within n positions either side of the insertion point
+    position = int(np.searchsorted(ranked, emissions))
+    window = np.arange(max(position - n, 0), min(position + n, count))
+    nearest = window[np.argsort(np.abs(ranked[window] - emissions), kind="stable")[:n]]
+
+    return pd.DataFrame({
+        "country": [store["countries"][c] for c in store["ranked_countries"][nearest, y, g]],
+        "year": year,
+        "emissions": ranked[nearest],
+        "ratio": emissions / ranked[nearest]
+    })
+
+def nearest_country(values_by_country, emissions):
+    """
+    Closest country in a mapping of country to emissions
+
+    Args:
+        values_by_country (dict): Emissions by country
+        emissions (float): Emissions to match
+
+    Returns:
+        str: Country with the closest emissions (None for an empty mapping)
+    """
+    if not values_by_country:
+        return None
+    names = np.array(list(values_by_country.keys()))
+    values = np.array(list(values_by_country.values()), dtype=np.float64)
+    order = np.argsort(values)
+    position = int(np.searchsorted(values[order], emissions))
+    candidates = order[max(position - 1, 0):position + 1]
+    return str(names[candidates[np.argmin(np.abs(values[candidates] - emissions))]])
@@ -0,0 +1,364 @@
+import os
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, inspect
+
+# Credit retirement ledger
+# Credits are identified by integer serial numbers within a serial block
+# (registry, project and vintage batch). Each block keeps its holdings as
+# disjoint serial intervals sorted by start, stored in chunks of at most
+# MAX_CHUNK intervals with the first start of every chunk kept for binary
+# search. Finding the interval holding a serial is two bisections, and
+# inserting or deleting an interval only shifts one chunk, so operations stay
+# logarithmic in the number of intervals. An operation on a serial range
+# splits the intervals at the range boundaries, updates the intervals inside
+# and merges neighbours with identical attributes again. The ledger is saved
+# to any SQLAlchemy database (SQLite by default, Postgres via DATABASE_URL).
+
+LEDGER_DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///" + os.path.join("data", "credit_ledger.db"))
+LEDGER_TABLE = "credit_intervals"
+LEDGER_COLUMNS = ["block", "serial_start", "serial_end", "holder", "status", "credit_type", "vintage", "retirement_year"]
+TRANSACTION_COLUMNS = ["action", "block", "serial_start", "serial_end", "holder"]
+ACTIONS = ["issue", "transfer", "retire"]
+MAX_CHUNK = 1024
+
+# Interval fields: [start, end, holder, status, credit_type, vintage, retirement_year]
+START, END, HOLDER, STATUS, CREDIT_TYPE, VINTAGE, RETIREMENT_YEAR = range(7)
+UPDATABLE_FIELDS = {"holder": HOLDER, "status": STATUS, "retirement_year": RETIREMENT_YEAR}
+
+def create_ledger():
+    """
+    Create an empty credit ledger
+
+    Returns:
+        dict: Ledger state with serial blocks
+    """
+    return {"blocks": {}}
+
+def _block(ledger, block):
+    """Get a serial block, creating it when needed"""
+    return ledger["blocks"].setdefault(str(block), {"firsts": [], "chunks": []})
+
+def _position(block, serial):
+    """Chunk and offset of the last interval starting at or before serial (None if there is none)"""
+    c = bisect_right(block["firsts"], serial) - 1
+    if c < 0:
+        return None
+    return c, bisect_right(block["chunks"][c][0], serial) - 1
+
+def _next(block, c, i):
+    """Position of the interval after (c, i) (None at the end of the block)"""
+    if i + 1 < len(block["chunks"][c][0]):
+        return c, i + 1
+    return (c + 1, 0) if c + 1 < len(block["chunks"]) else None
+
+def _interval(block, c, i):
+    return block["chunks"][c][1][i]
+
+def _insert(block, c, i, interval):
+    """Insert an interval at (c, i), splitting the chunk when it grows past MAX_CHUNK"""
+    if not block["chunks"]:
+        block["chunks"].append(([], []))
+        block["firsts"].append(interval[START])
+    starts, intervals = block["chunks"][c]
+    starts.insert(i, interval[START])
+    intervals.insert(i, interval)
+    if i == 0:
+        block["firsts"][c] = interval[START]
+    if len(starts) > MAX_CHUNK:
+        half = len(starts) // 2
+        block["chunks"].insert(c + 1, (starts[half:], intervals[half:]))
+        block["firsts"].insert(c + 1, starts[half])
+        del starts[half:], intervals[half:]
+
+def _delete(block, c, i):
+    """Delete the interval at (c, i), dropping the chunk when it becomes empty"""
+    starts, intervals = block["chunks"][c]
+    del starts[i], intervals[i]
+    if not starts:
+        del block["chunks"][c], block["firsts"][c]
+    elif i == 0:
+        block["firsts"][c] = starts[0]
+
+def _walk(block, serial_start, serial_end):
+    """Yield the intervals overlapping a serial range in order"""
+    position = _position(block, serial_start)
+    if position is None:
+        position = (0, 0) if block["chunks"] else None
+    elif _interval(block, *position)[END] < serial_start:
+        position = _next(block, *position)
+    while position is not None:
+        interval = _interval(block, *position)
+        if interval[START] > serial_end:
+            break
+        yield interval
+        position = _next(block, *position)
+
+def _split(block, serial):
+    """Make serial the start of an interval if it falls inside one"""
+    position = _position(block, serial)
+    if position is not None:
+        interval = _interval(block, *position)
+        if interval[START] < serial <= interval[END]:
+            right = list(interval)
+            right[START] = serial
+            interval[END] = serial - 1
+            _insert(block, position[0], position[1] + 1, right)
+
+def _merge_range(block, serial_start, serial_end):
+    """Merge adjacent intervals with identical attributes from just before to just after a range"""
+    position = _position(block, serial_start - 1) or ((0, 0) if block["chunks"] else None)
+    while position is not None:
+        left = _interval(block, *position)
+        if left[START] > serial_end:
+            break
+        following = _next(block, *position)
+        if following is None:
+            break
+        right = _interval(block, *following)
+        if left[END] + 1 == right[START] and left[HOLDER:] == right[HOLDER:]:
+            left[END] = right[END]
+            _delete(block, *following)
+        else:
+            position = following
+
+def find_intervals(ledger, block, serial_start, serial_end):
+    """
+    Find ledger intervals overlapping a serial range
+
+    Args:
+        ledger (dict): Output of create_ledger
+        block (str): Serial block
+        serial_start (int): First serial of the range
+        serial_end (int): Last serial of the range
+
+    Returns:
+        list: Overlapping intervals as dicts
+    """
+    block_state = ledger["blocks"].get(str(block))
+    if block_state is None:
+        return []
+    return [
+        dict(zip(LEDGER_COLUMNS, [str(block)] + interval))
+        for interval in _walk(block_state, serial_start, serial_end)
+    ]
+
+def issue_credits(ledger, block, serial_start, serial_end, holder, credit_type=None, vintage=None):
+    """
+    Record newly issued or acquired credits
+
+    Args:
+        ledger (dict): Output of create_ledger
+        block (str): Serial block
+        serial_start (int): First serial of the range
+        serial_end (int): Last serial of the range
+        holder (str): Holding account
+        credit_type (str): Credit type (e.g. a CARBON_CREDIT_TYPES name)
+        vintage (int): Vintage year
+
+    Returns:
+        dict: The updated ledger
+    """
+    if serial_end < serial_start:
+        raise ValueError(f"Serial range {serial_start}-{serial_end} is empty")
+    if find_intervals(ledger, block, serial_start, serial_end):
+        raise ValueError(f"Serials {block} {serial_start}-{serial_end} overlap credits already in the ledger")
+
+    block_state = _block(ledger, block)
+    position = _position(block_state, serial_start)
+    c, i = (position[0], position[1] + 1) if position is not None else (0, 0)
+    _insert(block_state, c, i, [serial_start, serial_end, holder, "active", credit_type, vintage, None])
+    _merge_range(block_state, serial_start, serial_end)
+    return ledger
+
+def _update_holding(ledger, block, serial_start, serial_end, holder, changes):
+    """Update a range that must be held in full and unretired by the holder"""
+    if serial_end < serial_start:
+        raise ValueError(f"Serial range {serial_start}-{serial_end} is empty")
+    retired = [i for i in find_intervals(ledger, block, serial_start, serial_end) if i["status"] == "retired"]
+    if retired:
+        first = retired[0]
+        raise ValueError(
+            f"Serials {block} {max(first['serial_start'], serial_start)}-{min(first['serial_end'], serial_end)} "
+            f"were already retired in {first['retirement_year']}"
+        )
+
+    block_state = ledger["blocks"].get(str(block))
+    if block_state is None:
+        raise ValueError(f"Serial block {block} is not in the ledger")
+    _split(block_state, serial_start)
+    _split(block_state, serial_end + 1)
+
+    intervals = list(_walk(block_state, serial_start, serial_end))
+    covered = bool(intervals) and intervals[0][START] == serial_start and intervals[-1][END] == serial_end and \
+        all(left[END] + 1 == right[START] for left, right in zip(intervals, intervals[1:]))
+    held = covered and all(interval[HOLDER] == holder for interval in intervals)
+    if held:
+        for interval in intervals:
+            for name, value in changes.items():
+                interval[UPDATABLE_FIELDS[name]] = value
+
+    _merge_range(block_state, serial_start, serial_end)
+    if not held:
+        raise ValueError(f"{holder} does not hold all of serials {block} {serial_start}-{serial_end}")
+
+def transfer_credits(ledger, block, serial_start, serial_end, holder, to_holder):
+    """
+    Transfer a serial range between accounts
+
+    Args:
+        ledger (dict): Output of create_ledger
+        block (str): Serial block
+        serial_start (int): First serial of the range
+        serial_end (int): Last serial of the range
+        holder (str): Account holding the credits
+        to_holder (str): Receiving account
+
+    Returns:
+        dict: The updated ledger
+    """
+    _update_holding(ledger, block, serial_start, serial_end, holder, {"holder": to_holder})
+    return ledger
+
+def retire_credits(ledger, block, serial_start, serial_end, holder, retirement_year):
+    """
+    Retire a serial range against a reporting year
+
+    Raises a ValueError when any serial in the range has already been retired.
+
+    Args:
+        ledger (dict): Output of create_ledger
+        block (str): Serial block
+        serial_start (int): First serial of the range
+        serial_end (int): Last serial of the range
+        holder (str): Account holding the credits
+        retirement_year (int): Reporting year the retirement is claimed against
+
+    Returns:
+        dict: The updated ledger
+    """
+    _update_holding(ledger, block, serial_start, serial_end, holder,
+                    {"status": "retired", "retirement_year": int(retirement_year)})
+    return ledger
+
+def apply_transactions(ledger, transactions):
+    """
+    Apply a table of ledger transactions in order
+
+    Args:
+        ledger (dict): Output of create_ledger
+        transactions (pandas.DataFrame): Rows with action (issue, transfer or retire), block,
+            serial_start, serial_end and holder, plus to_holder for transfers, year for
+            retirements and optional credit_type and vintage for issues
+
+    Returns:
+        dict: Number of applied transactions and a list of (row, error message) for rejected ones
+    """
+    missing = set(TRANSACTION_COLUMNS) - set(transactions.columns)
+    if missing:
+        raise ValueError(f"Transactions are missing required columns: {', '.join(sorted(missing))}")
+
+    applied, errors = 0, []
+    for row, transaction in enumerate(transactions.to_dict("records")):
+        action = str(transaction["action"]).strip().lower()
+        try:
+            start, end = int(transaction["serial_start"]), int(transaction["serial_end"])
+            if action == "issue":
+                credit_type, vintage = transaction.get("credit_type"), transaction.get("vintage")
+                issue_credits(ledger, transaction["block"], start, end, transaction["holder"],
+                              credit_type=credit_type if pd.notna(credit_type) else None,
+                              vintage=int(vintage) if pd.notna(vintage) else None)
+            elif action == "transfer":
+                transfer_credits(ledger, transaction["block"], start, end, transaction["holder"], transaction["to_holder"])
+            elif action == "retire":
+                retire_credits(ledger, transaction["block"], start, end, transaction["holder"], transaction["year"])
+            else:
+                raise ValueError(f"Unknown action '{transaction['action']}' (use {', '.join(ACTIONS)})")
+            applied += 1
+        except (ValueError, KeyError, TypeError) as e:
+            errors.append((row, str(e)))
+
+    return {"applied": applied, "errors": errors}
+
+def ledger_frame(ledger):
+    """
+    Flatten the ledger into one row per interval
+
+    Args:
+        ledger (dict): Output of create_ledger
+
+    Returns:
+        pandas.DataFrame: Intervals with block, serial range, holder, status and credit count
+    """
+    rows = [
+        [block] + interval
+        for block, state in ledger["blocks"].items()
+        for _, intervals in state["chunks"]
+        for interval in intervals
+    ]
+    frame = pd.DataFrame(rows, columns=LEDGER_COLUMNS)
+    frame["credits"] = frame["serial_end"] - frame["serial_start"] + 1
+    return frame
+
+def reconcile_retirements(ledger, years, credit_demand):
+    """
+    Compare retired credits per reporting year with the credits needed
+
+    Args:
+        ledger (dict): Output of create_ledger
+        years (array): Reporting years
+        credit_demand (array): Credits needed per year in tCO2e
+
+    Returns:
+        pandas.DataFrame: Required, retired and surplus credits per year
+    """
+    intervals = ledger_frame(ledger)
+    retired = intervals[intervals["status"] == "retired"].groupby("retirement_year")["credits"].sum()
+    reconciliation = pd.DataFrame({"year": np.asarray(years), "required": np.asarray(credit_demand, dtype=np.float64)})
+    reconciliation["retired"] = retired.reindex(reconciliation["year"], fill_value=0).to_numpy(dtype=np.float64)
+    reconciliation["surplus"] = reconciliation["retired"] - reconciliation["required"]
+    reconciliation["status"] = np.where(reconciliation["surplus"] >= 0, "Covered", "Shortfall")
+    return reconciliation
+
+def save_ledger(ledger, url=LEDGER_DATABASE_URL):
+    """
+    Save the ledger intervals to a database, replacing the stored snapshot
+
+    Args:
+        ledger (dict): Output of create_ledger
+        url (str): SQLAlchemy database URL
+    """
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        ledger_frame(ledger)[LEDGER_COLUMNS].to_sql(LEDGER_TABLE, connection, if_exists="replace", index=False)
+
+def load_ledger(url=LEDGER_DATABASE_URL):
+    """
+    Load the ledger from a database
+
+    Args:
+        url (str): SQLAlchemy database URL
+
+    Returns:
+        dict: Ledger state (empty when nothing has been saved yet)
+    """
+    engine = create_engine(url)
+    ledger = create_ledger()
+    if not inspect(engine).has_table(LEDGER_TABLE):
+        return ledger
+
+    intervals = pd.read_sql_table(LEDGER_TABLE, engine).sort_values(["block", "serial_start"])
+    # Nullable years are read back as floats with NaN; restore int or None
+    for column in ["vintage", "retirement_year"]:
+        intervals[column] = intervals[column].astype("Int64").astype(object)
+    intervals = intervals.astype(object).where(intervals.notna(), None)
+
+    for block, rows in intervals.groupby("block", sort=False):
+        records = rows[LEDGER_COLUMNS[1:]].to_numpy().tolist()
+        state = _block(ledger, block)
+        for offset in range(0, len(records), MAX_CHUNK // 2):
+            chunk = [[int(r[START]), int(r[END])] + r[HOLDER:] for r in records[offset:offset + MAX_CHUNK // 2]]
+            state["chunks"].append(([r[START] for r in chunk], chunk))
+            state["firsts"].append(chunk[0][START])
+    return ledger
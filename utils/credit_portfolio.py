@@ -0,0 +1,238 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from utils.constants import CARBON_CREDIT_TYPES
+
+# Least-cost carbon credit portfolios
+# The purchase is a linear program: buy the demanded volume from the
+# cheapest listings while keeping at least a minimum share of removals, no
+# credit type above a maximum share, and only vintages inside the allowed
+# window. The type caps alone are solved exactly by a greedy fill in price
+# order. The removal constraint is priced with a Lagrange multiplier (a
+# discount on removal listings) found by bisection; the two greedy fills
+# either side of the multiplier are blended to hit the removal share exactly.
+# Eligible listings and solutions are cached on the solver, so moving the
+# budget costs nothing and moving other constraints reuses the filtered arrays.
+
+CATALOG_COLUMNS = ["listing_id", "credit_type", "vintage", "price", "quantity"]
+SHADOW_PRICE_STEPS = 60
+MAX_CACHED_SOLUTIONS = 64
+
+def market_listings(vintage):
+    """
+    Spot market listings for every type in CARBON_CREDIT_TYPES at the average price
+
+    Args:
+        vintage (int): Vintage year of the spot credits
+
+    Returns:
+        pandas.DataFrame: One listing per credit type with unlimited quantity
+    """
+    return pd.DataFrame({
+        "listing_id": [f"Market: {credit_type}" for credit_type in CARBON_CREDIT_TYPES],
+        "credit_type": list(CARBON_CREDIT_TYPES.keys()),
+        "vintage": int(vintage),
+        "price": [prices["avg_price"] for prices in CARBON_CREDIT_TYPES.values()],
+        "quantity": np.inf,
+        "removal": [prices.get("removal", False) for prices in CARBON_CREDIT_TYPES.values()]
+    })
+
+def prepare_catalog(catalog):
+    """
+    Validate a credit catalog and build the solver state
+
+    Args:
+        catalog (pandas.DataFrame): Listings with listing_id, credit_type, vintage, price
+            and quantity (tCO2e); an optional removal column overrides the removal flag
+            of the credit type
+
+    Returns:
+        dict: Listing arrays and solution caches
+    """
+    missing = set(CATALOG_COLUMNS) - set(catalog.columns)
+    if missing:
+        raise ValueError(f"Credit catalog is missing required columns: {', '.join(sorted(missing))}")
+
+    listings = catalog.copy()
+    listings["price"] = pd.to_numeric(listings["price"], errors="coerce")
+    listings["quantity"] = pd.to_numeric(listings["quantity"], errors="coerce")
+    listings["vintage"] = pd.to_numeric(listings["vintage"], errors="coerce")
+    listings = listings.dropna(subset=["price", "quantity", "vintage"])
+    listings = listings[(listings["quantity"] > 0) & (listings["price"] >= 0)].reset_index(drop=True)
+    if listings.empty:
+        raise ValueError("Credit catalog has no listings with a valid price, quantity and vintage")
+
+    type_removal = listings["credit_type"].map(
+        {credit_type: prices.get("removal", False) for credit_type, prices in CARBON_CREDIT_TYPES.items()}
+    ).fillna(False)
+    if "removal" in listings.columns:
+        listings["removal"] = listings["removal"].map(
+            lambda value: str(value).strip().lower() in ("true", "1", "yes") if pd.notna(value) else np.nan
+        ).fillna(type_removal)
+    else:
+        listings["removal"] = type_removal
+    listings["removal"] = listings["removal"].astype(bool)
+
+    types, type_codes = np.unique(listings["credit_type"].astype(str).to_numpy(), return_inverse=True)
+    return {
+        "listings": listings,
+        "types": list(types),
+        "type_codes": type_codes.astype(np.int64),
+        "price": listings["price"].to_numpy(dtype=np.float64),
+        "quantity": listings["quantity"].to_numpy(dtype=np.float64),
+        "removal": listings["removal"].to_numpy(dtype=bool),
+        "vintage": listings["vintage"].to_numpy(dtype=np.int64),
+        "eligible": {},
+        "solutions": OrderedDict()
+    }
+
+def _eligible(solver, min_vintage, max_vintage):
+    """Row positions of listings inside the vintage window, cached per window"""
+    key = (min_vintage, max_vintage)
+    if key not in solver["eligible"]:
+        vintage = solver["vintage"]
+        mask = np.ones(len(vintage), dtype=bool)
+        if min_vintage is not None:
+            mask &= vintage >= min_vintage
+        if max_vintage is not None:
+            mask &= vintage <= max_vintage
+        solver["eligible"][key] = np.flatnonzero(mask)
+    return solver["eligible"][key]
+
+def _greedy_fill(price, quantity, removal, type_codes, demand, type_cap, removal_discount):
+    """Cheapest fill of the demand under per-type caps with removal listings discounted"""
+    if not len(price):
+        return np.zeros(0)
+    adjusted = price - removal_discount * removal
+
+    # Within each type the cheapest listings take the type's capped volume
+    by_type = np.lexsort((adjusted, type_codes))
+    q = quantity[by_type]
+    codes = type_codes[by_type]
+    cumulative = np.cumsum(q)
+    segment_start = np.r_[0, np.flatnonzero(np.diff(codes)) + 1]
+    offset = np.repeat(cumulative[segment_start] - q[segment_start], np.diff(np.r_[segment_start, len(q)]))
+    before_in_type = cumulative - q - offset
+    capped = np.empty_like(q)
+    capped[by_type] = np.clip(type_cap - before_in_type, 0.0, q)
+
+    # Across types the cheapest capped volume fills the demand
+    order = np.argsort(adjusted, kind="stable")
+    available = capped[order]
+    before = np.cumsum(available) - available
+    purchase = np.empty_like(available)
+    purchase[order] = np.clip(demand - before, 0.0, available)
+    return purchase
+
+def _solve(solver, demand, min_removal_share, max_type_share, min_vintage, max_vintage):
+    """Least-cost purchase per eligible listing ignoring the budget"""
+    rows = _eligible(solver, min_vintage, max_vintage)
+    price = solver["price"][rows]
+    quantity = np.minimum(solver["quantity"][rows], demand)
+    removal = solver["removal"][rows]
+    type_codes = solver["type_codes"][rows]
+    type_cap = max_type_share * demand
+    removal_target = min_removal_share * demand
+
+    def fill(discount):
+        purchase = _greedy_fill(price, quantity, removal, type_codes, demand, type_cap, discount)
+        return purchase, purchase[removal].sum()
+
+    purchase, removed = fill(0.0)
+    shadow_price = 0.0
+    if removed < removal_target * (1 - 1e-9) and len(rows):
+        # Any discount above the full price spread puts every removal listing first
+        low, high = 0.0, float(price.max() - price.min()) + 1.0
+        high_purchase, high_removed = fill(high)
+        if high_removed < removal_target * (1 - 1e-9):
+            purchase, removed, shadow_price = high_purchase, high_removed, high
+        else:
+            low_purchase, low_removed = purchase, removed
+            for _ in range(SHADOW_PRICE_STEPS):
+                mid = (low + high) / 2
+                mid_purchase, mid_removed = fill(mid)
+                if mid_removed < removal_target:
+                    low, low_purchase, low_removed = mid, mid_purchase, mid_removed
+                else:
+                    high, high_purchase, high_removed = mid, mid_purchase, mid_removed
+            # Blending the fills either side of the multiplier meets the removal share exactly
+            weight = (high_removed - removal_target) / (high_removed - low_removed) if high_removed > low_removed else 0.0
+            purchase = weight * low_purchase + (1 - weight) * high_purchase
+            removed = purchase[removal].sum()
+            shadow_price = (low + high) / 2
+
+    return {
+        "rows": rows,
+        "purchase": purchase,
+        "total_quantity": float(purchase.sum()),
+        "total_cost": float(purchase @ price),
+        "removal_quantity": float(removed),
+        "shadow_price": shadow_price
+    }
+
+def optimize_credit_portfolio(solver, demand, min_removal_share=0.0, max_type_share=1.0, budget=None,
+                              min_vintage=None, max_vintage=None):
+    """
+    Find the least-cost mix of credit listings under portfolio constraints
+
+    Args:
+        solver (dict): Output of prepare_catalog
+        demand (float): Credits to buy in tCO2e
+        min_removal_share (float): Minimum share of removal credits (0-1)
+        max_type_share (float): Maximum share of any one credit type (0-1)
+        budget (float): Maximum spend in USD (None for no limit)
+        min_vintage (int): Oldest allowed vintage (None for no limit)
+        max_vintage (int): Newest allowed vintage (None for no limit)
+
+    Returns:
+        dict: Portfolio of listings, mix by credit type, totals, the removal premium
+            implied by the removal share, and feasibility with a status message
+    """
+    if demand < 0:
+        raise ValueError("Credit demand cannot be negative")
+    if not 0 <= min_removal_share <= 1 or not 0 <= max_type_share <= 1:
+        raise ValueError("Removal and credit type shares must be between 0 and 1")
+
+    key = (float(demand), float(min_removal_share), float(max_type_share), min_vintage, max_vintage)
+    solutions = solver["solutions"]
+    if key in solutions:
+        solutions.move_to_end(key)
+    else:
+        solutions[key] = _solve(solver, demand, min_removal_share, max_type_share, min_vintage, max_vintage)
+        if len(solutions) > MAX_CACHED_SOLUTIONS:
+            solutions.popitem(last=False)
+    solution = solutions[key]
+
+    bought = solution["purchase"] > 0
+    portfolio = solver["listings"].iloc[solution["rows"][bought]][
+        ["listing_id", "credit_type", "vintage", "removal", "price"]
+    ].assign(quantity=solution["purchase"][bought])
+    portfolio["cost"] = portfolio["price"] * portfolio["quantity"]
+    portfolio = portfolio.sort_values(["price", "listing_id"]).reset_index(drop=True)
+
+    by_type = portfolio.groupby("credit_type")[["quantity", "cost"]].sum()
+    by_type["share"] = by_type["quantity"] / demand if demand > 0 else 0.0
+    by_type["average_price"] = by_type["cost"] / by_type["quantity"]
+
+    total_quantity = solution["total_quantity"]
+    total_cost = solution["total_cost"]
+    if total_quantity < demand * (1 - 1e-9):
+        status = "Not enough eligible credits within the vintage window and credit type cap"
+    elif solution["removal_quantity"] < min_removal_share * demand * (1 - 1e-9):
+        status = "Not enough eligible removal credits for the minimum removal share"
+    elif budget is not None and total_cost > budget:
+        status = f"The least-cost mix exceeds the budget by ${total_cost - budget:,.0f}"
+    else:
+        status = "Optimal"
+
+    return {
+        "portfolio": portfolio,
+        "by_type": by_type.sort_values("quantity", ascending=False),
+        "total_quantity": total_quantity,
+        "total_cost": total_cost,
+        "average_price": total_cost / total_quantity if total_quantity > 0 else 0.0,
+        "removal_share": solution["removal_quantity"] / total_quantity if total_quantity > 0 else 0.0,
+        "removal_premium": solution["shadow_price"],
+        "feasible": status == "Optimal",
+        "status": status
+    }
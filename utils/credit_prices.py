@@ -0,0 +1,125 @@
+import numpy as np
+from utils.constants import CARBON_CREDIT_TYPES
+
+# Stochastic carbon credit prices
+# Log prices follow either geometric Brownian motion or an Ornstein-Uhlenbeck
+# process that reverts to a trend growing from today's average price. The
+# min-max range of each credit type in CARBON_CREDIT_TYPES is read as a 90%
+# interval of the long-run price distribution, which sets the volatility.
+# All paths are simulated as one (path, credit type, year) float32 array with
+# a shock common to all credit types to correlate the market, then combined
+# with yearly credit demand into a distribution of total spend.
+
+PRICE_MODELS = ["Mean Reverting", "Geometric Brownian Motion"]
+SIMULATION_PATHS = 100_000
+DEFAULT_PRICE_DRIFT = 0.04
+DEFAULT_REVERSION = 0.15
+DEFAULT_CORRELATION = 0.5
+PRICE_RANGE_Z = 1.645
+SPEND_PERCENTILES = [5, 25, 50, 75, 95]
+
+def price_model_parameters(credit_types, reversion=DEFAULT_REVERSION):
+    """
+    Derive start prices and volatilities from the CARBON_CREDIT_TYPES ranges
+
+    Args:
+        credit_types (list): Names from CARBON_CREDIT_TYPES
+        reversion (float): Mean reversion speed per year
+
+    Returns:
+        dict: Start price, long-run log price spread and annual volatility per credit type
+    """
+    prices = [CARBON_CREDIT_TYPES[credit_type] for credit_type in credit_types]
+    spread = np.array([np.log(p["max_price"] / p["min_price"]) for p in prices]) / (2 * PRICE_RANGE_Z)
+    return {
+        "start_price": np.array([p["avg_price"] for p in prices], dtype=np.float64),
+        "log_spread": spread,
+        # The stationary spread of the mean-reverting process is volatility / sqrt(2 * reversion)
+        "volatility": spread * np.sqrt(2 * reversion)
+    }
+
+def simulate_credit_prices(credit_types, years, n_paths=SIMULATION_PATHS, model="Mean Reverting",
+                           drift=DEFAULT_PRICE_DRIFT, reversion=DEFAULT_REVERSION,
+                           correlation=DEFAULT_CORRELATION, seed=None):
+    """
+    Simulate annual price paths for credit types
+
+    Args:
+        credit_types (list): Names from CARBON_CREDIT_TYPES
+        years (array): Calendar years; the first year is priced at the average price
+        n_paths (int): Number of simulated paths
+        model (str): One of PRICE_MODELS
+        drift (float): Expected annual price growth
+        reversion (float): Mean reversion speed per year
+        correlation (float): Correlation of annual price shocks between credit types
+        seed (int): Random seed
+
+    Returns:
+        numpy.ndarray: Prices in USD/tCO2e indexed [path, credit_type, year] (float32)
+    """
+    if model not in PRICE_MODELS:
+        raise ValueError(f"Price model must be one of: {', '.join(PRICE_MODELS)}")
+    if not 0 <= correlation <= 1:
+        raise ValueError("Correlation must be between 0 and 1")
+
+    params = price_model_parameters(credit_types, reversion)
+    n_types, n_years = len(credit_types), len(years)
+    rng = np.random.default_rng(seed)
+
+    shocks = rng.standard_normal((n_paths, n_types, n_years), dtype=np.float32)
+    shocks *= np.float32(np.sqrt(1 - correlation))
+    shocks += np.float32(np.sqrt(correlation)) * rng.standard_normal((n_paths, 1, n_years), dtype=np.float32)
+    shocks[:, :, 0] = 0.0
+
+    volatility = params["volatility"].astype(np.float32)[None, :]
+    log_start = np.log(params["start_price"]).astype(np.float32)[None, :]
+
+    if model == "Geometric Brownian Motion":
+        # Drift is the expected growth, so the log step subtracts half the variance
+        step = np.float32(np.log1p(drift)) - volatility[..., None] ** 2 / 2 + volatility[..., None] * shocks
+        step[:, :, 0] = 0.0
+        log_prices = np.cumsum(step, axis=2, out=shocks)
+        log_prices += log_start[..., None]
+    else:
+        # Exact annual discretization of the Ornstein-Uhlenbeck process around a growing trend
+        decay = np.float32(np.exp(-reversion))
+        step_volatility = volatility * np.float32(np.sqrt((1 - np.exp(-2 * reversion)) / (2 * reversion)))
+        trend = log_start[..., None] + np.float32(np.log1p(drift)) * np.arange(n_years, dtype=np.float32)
+        log_prices = shocks
+        deviation = np.zeros((n_paths, n_types), dtype=np.float32)
+        for y in range(1, n_years):
+            deviation = deviation * decay + step_volatility * shocks[:, :, y]
+            log_prices[:, :, y] = deviation
+        log_prices += trend
+
+    return np.exp(log_prices, out=log_prices)
+
+def offset_spend(prices, mix_shares, credit_demand, discount_rate=0.0):
+    """
+    Combine price paths with yearly credit demand into spend distributions
+
+    Args:
+        prices (array): Prices indexed [path, credit_type, year]
+        mix_shares (array): Share of credits bought of each credit type
+        credit_demand (array): Credits needed per year in tCO2e
+        discount_rate (float): Annual discount rate for the present value of spend
+
+    Returns:
+        dict: Annual spend indexed [path, year], total (discounted) spend per path,
+            and spend percentiles per year and in total
+    """
+    shares = np.asarray(mix_shares, dtype=np.float32)
+    shares = shares / shares.sum() if shares.sum() > 0 else shares
+    demand = np.asarray(credit_demand, dtype=np.float32)
+
+    annual = np.einsum("sty,t->sy", prices, shares) * demand[None, :]
+    discount = (1 + discount_rate) ** -np.arange(len(demand), dtype=np.float32)
+    total = annual @ discount.astype(np.float32)
+
+    return {
+        "annual": annual,
+        "total": total,
+        "percentiles": SPEND_PERCENTILES,
+        "annual_percentiles": np.percentile(annual, SPEND_PERCENTILES, axis=0),
+        "total_percentiles": np.percentile(total, SPEND_PERCENTILES)
+    }
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 from utils.constants import INDUSTRY_BENCHMARKS, SCOPE_DISTRIBUTIONS
+from utils.macc import breakdown_matrix, build_macc, macc_curve
+from utils.strategy_store import load_strategy_store
 
 def validate_input_data(data_dict, data_type):
     """
@@ -79,16 +81,15 @@ def calculate_targets(base_emissions, reduction_percentage, target_year, base_ye
     target_emissions = base_emissions * (1 - reduction_percentage/100)
     
     # Create yearly trajectory
-    trajectory = []
-    for i in range(years + 1):
-        year = base_year + i
-        reduction_factor = (1 - annual_reduction_rate) ** i
-        yearly_emissions = base_emissions * reduction_factor
-        trajectory.append({
-            'year': year,
-            'emissions': yearly_emissions,
-            'reduction_from_base': (1 - reduction_factor) * 100
-        })
+    trajectories = calculate_target_trajectories(base_emissions, reduction_percentage, target_year, base_year)
+    trajectory = [
+        {'year': year, 'emissions': emissions, 'reduction_from_base': (1 - factor) * 100}
+        for year, emissions, factor in zip(
+            trajectories['years'].tolist(),
+            trajectories['emissions'][0, 0].tolist(),
+            trajectories['reduction_factors'][0].tolist()
+        )
+    ]
     
     return {
         'base_emissions': base_emissions,
@@ -101,64 +102,156 @@ def calculate_targets(base_emissions, reduction_percentage, target_year, base_ye
         'trajectory': trajectory
     }
 
-def generate_sample_strategies(emissions_data, industry):
+def calculate_target_trajectories(base_emissions, reduction_percentages, target_years, base_year=2023,
+                                  end_year=None, method="compound", dtype=np.float64):
+    """
+    Calculate reduction trajectories for many entities and targets at once
+    
+    Base emissions (entities), reduction percentages (targets, e.g. frameworks)
+    and years are broadcast into a single entity x target x year array. Each
+    target reaches its reduction in its target year and holds that level
+    until end_year.
+    
+    Args:
+        base_emissions (float or array): Base year emissions per entity in tCO2e
+        reduction_percentages (float or array): Reduction by target year per target
+        target_years (int or array): Target year per target
+        base_year (int): Base year for calculations
+        end_year (int): Last year of the trajectory (defaults to the latest target year)
+        method (str): 'compound' (constant annual rate) or 'linear' (constant absolute cut)
+        dtype (numpy.dtype): Dtype of the emissions array
+    
+    Returns:
+        dict: Columnar result with years, per-target reduction factors and a 3-D emissions array
+    """
+    if method not in ("compound", "linear"):
+        raise ValueError("Method must be 'compound' or 'linear'")
+    
+    base = np.atleast_1d(np.asarray(base_emissions, dtype=dtype))
+    reductions = np.atleast_1d(np.asarray(reduction_percentages, dtype=np.float64)) / 100
+    target_years = np.broadcast_to(np.atleast_1d(np.asarray(target_years, dtype=np.int64)), reductions.shape)
+    
+    if end_year is None:
+        end_year = int(target_years.max())
+    years = np.arange(base_year, end_year + 1)
+    
+    horizon = np.maximum(target_years - base_year, 1)[:, None]
+    elapsed = np.minimum((years - base_year)[None, :], horizon)
+    
+    if method == "compound":
+        reduction_factors = (1 - reductions[:, None]) ** (elapsed / horizon)
+    else:
+        reduction_factors = 1 - reductions[:, None] * elapsed / horizon
+    
+    emissions = base[:, None, None] * reduction_factors.astype(dtype)[None, :, :]
+    
+    return {
+        'years': years,
+        'base_emissions': base,
+        'reduction_percentages': reductions * 100,
+        'target_years': np.asarray(target_years),
+        'reduction_factors': reduction_factors,
+        'emissions': emissions
+    }
+
+def calculate_annual_reduction_pathway(base_emissions, annual_reduction, net_zero_year, start_year, end_year=2050):
+    """
+    Calculate pathways with a fixed annual cut (% of base) reaching zero at the net zero year
+    
+    Args:
+        base_emissions (float or array): Base year emissions per entity in tCO2e
+        annual_reduction (float): Annual reduction as a percentage of base emissions
+        net_zero_year (int): Year from which emissions are zero
+        start_year (int): First year of the pathway (base year)
+        end_year (int): Last year of the pathway
+    
+    Returns:
+        tuple: (years, emissions) arrays; emissions has one row per entity
+    """
+    base = np.atleast_1d(np.asarray(base_emissions, dtype=np.float64))
+    years = np.arange(start_year, end_year + 1)
+    
+    remaining = np.clip(1 - (years - start_year) * annual_reduction / 100, 0, None)
+    remaining = np.where((years >= net_zero_year) & (years > start_year), 0.0, remaining)
+    
+    return years, base[:, None] * remaining[None, :]
+
+def trajectories_to_frame(trajectories, entity_names=None, target_names=None):
+    """
+    Convert trajectory arrays into a long-format DataFrame for plotting
+    
+    Args:
+        trajectories (dict): Output of calculate_target_trajectories
+        entity_names (list): Labels for the entity axis (optional)
+        target_names (list): Labels for the target axis (optional)
+    
+    Returns:
+        pandas.DataFrame: One row per entity, target and year
+    """
+    num_entities, num_targets, num_years = trajectories['emissions'].shape
+    entity_names = entity_names if entity_names is not None else list(range(num_entities))
+    target_names = target_names if target_names is not None else list(range(num_targets))
+    
+    index = pd.MultiIndex.from_product(
+        [pd.Categorical(entity_names), pd.Categorical(target_names), trajectories['years']],
+        names=['Entity', 'Target', 'Year']
+    )
+    return pd.DataFrame(
+        {'Emissions (tCO2e)': trajectories['emissions'].reshape(-1)},
+        index=index
+    ).reset_index()
+
+def generate_sample_strategies(emissions_data, industry, breakdown=None):
     """
     Generate sample emission reduction strategies based on emissions profile
     
+    Strategies are quantified with the marginal abatement cost curve. Without
+    a category breakdown each lever is applied to its whole scope, which gives
+    an upper bound on its abatement.
+    
     Args:
         emissions_data (dict): Dictionary containing emissions by scope
         industry (str): Industry name
+        breakdown (dict): Emissions by breakdown category across all scopes (optional)
     
     Returns:
         list: List of recommended strategies
     """
     # Get total emissions and breakdown by scope
     total_emissions = sum(emissions_data.values())
-    scope_percentages = {
-        scope: (emissions / total_emissions) * 100 if total_emissions > 0 else 0
-        for scope, emissions in emissions_data.items()
-    }
     
     # Identify dominant scope
     dominant_scope = max(emissions_data.items(), key=lambda x: x[1])[0] if total_emissions > 0 else "scope1"
     
-    # Get industry-specific strategies from constants
-    industry_strategies = []
-    # This would be populated from a database or a more complex system in a real app
-    
-    # Basic strategies for all scopes
-    basic_strategies = {
-        "scope1": [
-            {"name": "Energy efficiency improvements", "potential": "Medium", "timeframe": "Short-term"},
-            {"name": "Switch to low-carbon fuels", "potential": "High", "timeframe": "Medium-term"},
-            {"name": "Electrify vehicle fleet", "potential": "High", "timeframe": "Medium-term"},
-            {"name": "Optimize HVAC systems", "potential": "Medium", "timeframe": "Short-term"},
-            {"name": "Reduce refrigerant leaks", "potential": "Medium", "timeframe": "Short-term"}
-        ],
-        "scope2": [
-            {"name": "Purchase renewable energy", "potential": "High", "timeframe": "Short-term"},
-            {"name": "Install on-site renewables", "potential": "High", "timeframe": "Medium-term"},
-            {"name": "Energy efficiency in buildings", "potential": "Medium", "timeframe": "Short-term"},
-            {"name": "Smart building management", "potential": "Medium", "timeframe": "Medium-term"},
-            {"name": "LED lighting upgrades", "potential": "Low", "timeframe": "Short-term"}
-        ],
-        "scope3": [
-            {"name": "Supplier engagement program", "potential": "High", "timeframe": "Long-term"},
-            {"name": "Optimize logistics", "potential": "Medium", "timeframe": "Medium-term"},
-            {"name": "Reduce business travel", "potential": "Low", "timeframe": "Short-term"},
-            {"name": "Sustainable procurement policy", "potential": "High", "timeframe": "Medium-term"},
-            {"name": "Product redesign for efficiency", "potential": "High", "timeframe": "Long-term"}
-        ]
-    }
+    # Quantify levers against the category breakdown (or scope totals)
+    levers = load_strategy_store()["levers"]
+    if breakdown is None:
+        breakdown = emissions_data
+        levers = [dict(lever, categories=[lever["scope"]]) for lever in levers]
+    emissions, categories = breakdown_matrix([breakdown])
+    curve = macc_curve(build_macc(emissions, categories, levers), 0)
+    
+    strategies = {}
+    for lever in curve.itertuples():
+        share = lever.abatement / total_emissions if total_emissions > 0 else 0
+        strategies.setdefault(lever.scope, []).append({
+            "name": lever.name,
+            "potential": "High" if share >= 0.10 else "Medium" if share >= 0.03 else "Low",
+            "timeframe": lever.timeframe,
+            "abatement": lever.abatement,
+            "cost_per_tonne": lever.cost_per_tonne
+        })
+    for scope_strategies in strategies.values():
+        scope_strategies.sort(key=lambda strategy: strategy["abatement"], reverse=True)
     
     # Prioritize strategies for dominant scope
     prioritized_strategies = []
-    prioritized_strategies.extend(basic_strategies[dominant_scope])
+    prioritized_strategies.extend(strategies.get(dominant_scope, []))
     
-    # Add some strategies from other scopes
-    for scope, strategies in basic_strategies.items():
+    # Add the two largest strategies from other scopes
+    for scope, scope_strategies in strategies.items():
         if scope != dominant_scope:
-            prioritized_strategies.extend(strategies[:2])  # Add top 2 strategies from other scopes
+            prioritized_strategies.extend(scope_strategies[:2])
     
     return prioritized_strategies
 
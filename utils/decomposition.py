@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+# Year-over-year decomposition with the additive Log-Mean Divisia Index (LMDI-I)
+# Emissions are written as E = sum over entities e and categories c of
+#   Q * (Q_e / Q) * (E_ec / Q_e)
+# i.e. total activity x structure (entity share of activity) x intensity.
+# Each effect is the log-mean weighted log change of its factor; the effects
+# add up exactly to the change in emissions. All entities and categories are
+# decomposed in one array pass.
+
+EFFECTS = ["activity", "structure", "intensity"]
+ZERO_REPLACEMENT = 1e-10
+INVENTORY_COLUMNS = ["entity_id", "year", "category", "emissions", "activity"]
+
+def log_mean(a, b):
+    """Logarithmic mean L(a, b) = (a - b) / (ln a - ln b), with L(a, a) = a"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (a - b) / (np.log(a) - np.log(b))
+    return np.where(np.isclose(a, b), a, np.nan_to_num(mean))
+
+def inventory_rows(results, entity_id, year, activity):
+    """
+    Convert a calculate_emissions result into inventory rows for decomposition
+
+    Args:
+        results (dict): Output of calculate_emissions
+        entity_id (str): Entity identifier
+        year (int): Inventory year
+        activity (float): Activity level of the entity (e.g. revenue)
+
+    Returns:
+        pandas.DataFrame: Rows with entity_id, year, category, emissions and activity
+    """
+    categories = {
+        **results.get('scope1_breakdown', {}),
+        **results.get('scope2_breakdown', {}),
+        **results.get('scope3_breakdown', {})
+    }
+    return pd.DataFrame({
+        "entity_id": str(entity_id),
+        "year": int(year),
+        "category": list(categories.keys()),
+        "emissions": list(categories.values()),
+        "activity": float(activity)
+    }, columns=INVENTORY_COLUMNS)
+
+def lmdi_decomposition(emissions_0, emissions_1, activity_0, activity_1):
+    """
+    Decompose the change in emissions between two years into driver effects
+
+    Args:
+        emissions_0 (array): Base year emissions indexed [entity, category] in tCO2e
+        emissions_1 (array): Comparison year emissions indexed [entity, category] in tCO2e
+        activity_0 (array): Base year activity per entity
+        activity_1 (array): Comparison year activity per entity
+
+    Returns:
+        dict: Total effects, effects per entity indexed [entity, effect], intensity
+            effect per category, and the totals in both years
+    """
+    e0 = np.atleast_2d(np.asarray(emissions_0, dtype=np.float64))
+    e1 = np.atleast_2d(np.asarray(emissions_1, dtype=np.float64))
+    q0 = np.maximum(np.asarray(activity_0, dtype=np.float64), ZERO_REPLACEMENT)
+    q1 = np.maximum(np.asarray(activity_1, dtype=np.float64), ZERO_REPLACEMENT)
+
+    # Zero emissions are replaced by a small value so that the log terms stay finite
+    e0_safe = np.maximum(e0, ZERO_REPLACEMENT)
+    e1_safe = np.maximum(e1, ZERO_REPLACEMENT)
+    weights = log_mean(e1_safe, e0_safe)
+
+    activity_log = np.log(q1.sum() / q0.sum())
+    structure_log = np.log((q1 / q1.sum()) / (q0 / q0.sum()))
+    intensity_log = np.log((e1_safe / q1[:, None]) / (e0_safe / q0[:, None]))
+
+    by_entity = np.stack([
+        weights.sum(axis=1) * activity_log,
+        weights.sum(axis=1) * structure_log,
+        (weights * intensity_log).sum(axis=1)
+    ], axis=1)
+
+    return {
+        "effects": {effect: float(value) for effect, value in zip(EFFECTS, by_entity.sum(axis=0))},
+        "by_entity": by_entity,
+        "intensity_by_category": (weights * intensity_log).sum(axis=0),
+        "total_0": float(e0.sum()),
+        "total_1": float(e1.sum()),
+        "residual": float(e1.sum() - e0.sum() - by_entity.sum())
+    }
+
+def decompose_inventories(inventories, base_year, comparison_year):
+    """
+    Decompose year-over-year change across all entities in an inventory table
+
+    Only entities with activity data in both years are decomposed; entities
+    reported (or with activity) in just one of the years are left out. For the
+    entities kept, categories missing in one year count as zero emissions there.
+    Activity is taken per entity and year (e.g. revenue or production).
+
+    Args:
+        inventories (pandas.DataFrame): Rows with entity_id, year, category, emissions and activity
+        base_year (int): Base year
+        comparison_year (int): Comparison year
+
+    Returns:
+        dict: Output of lmdi_decomposition plus per-entity and per-category tables
+    """
+    missing = set(INVENTORY_COLUMNS) - set(inventories.columns)
+    if missing:
+        raise ValueError(f"Inventory is missing required columns: {', '.join(sorted(missing))}")
+
+    rows = inventories[inventories["year"].isin([base_year, comparison_year])].copy()
+    rows["entity_id"] = rows["entity_id"].astype(str)
+    emissions = rows.pivot_table(
+        index=["year", "entity_id"], columns="category", values="emissions", aggfunc="sum", fill_value=0.0
+    )
+    activity = rows.groupby(["year", "entity_id"])["activity"].first()
+
+    # Only entities with activity in both years can be decomposed
+    entities = sorted(
+        set(activity.loc[base_year].index) & set(activity.loc[comparison_year].index)
+    ) if {base_year, comparison_year} <= set(activity.index.get_level_values(0)) else []
+    if not entities:
+        raise ValueError(f"No entities have inventories for both {base_year} and {comparison_year}")
+
+    decomposition = lmdi_decomposition(
+        emissions.loc[base_year].reindex(entities, fill_value=0.0).to_numpy(),
+        emissions.loc[comparison_year].reindex(entities, fill_value=0.0).to_numpy(),
+        activity.loc[base_year].reindex(entities).to_numpy(),
+        activity.loc[comparison_year].reindex(entities).to_numpy()
+    )
+
+    by_entity = pd.DataFrame(decomposition["by_entity"], index=entities, columns=EFFECTS)
+    by_entity.insert(0, "emissions_0", emissions.loc[base_year].reindex(entities, fill_value=0.0).sum(axis=1))
+    by_entity.insert(1, "emissions_1", emissions.loc[comparison_year].reindex(entities, fill_value=0.0).sum(axis=1))
+    decomposition["entity_table"] = by_entity
+    decomposition["category_table"] = pd.Series(
+        decomposition["intensity_by_category"], index=emissions.columns, name="intensity"
+    ).sort_values()
+
+    return decomposition
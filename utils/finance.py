@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+from utils.constants import CARBON_PRICE_PATHS, ENERGY_PRICE_SCENARIOS
+
+# Strategy financials
+# Cash flows per strategy are built once for every carbon price path, energy
+# price scenario and year, then discounted for every rate in one broadcast.
+# Operating cost per tonne is derived so that capex spread over the lifetime
+# plus operating cost minus energy savings equals the lever's cost per tonne.
+
+FINANCIAL_FIELDS = ["capex_per_tonne", "lifetime", "energy_savings_per_tonne"]
+IRR_BOUNDS = (-0.99, 10.0)
+IRR_STEPS = 80
+
+def carbon_price_paths(names, years):
+    """
+    Interpolate carbon price paths over years
+
+    Args:
+        names (list): Names from CARBON_PRICE_PATHS
+        years (array): Calendar years
+
+    Returns:
+        numpy.ndarray: Prices in USD/tCO2e indexed [path, year]
+    """
+    paths = []
+    for name in names:
+        anchors = sorted(CARBON_PRICE_PATHS[name].items())
+        paths.append(np.interp(years, [year for year, _ in anchors], [price for _, price in anchors]))
+    return np.array(paths).reshape(len(names), len(years))
+
+def energy_price_indices(names, years, base_year):
+    """
+    Energy price index relative to the base year for each scenario
+
+    Args:
+        names (list): Names from ENERGY_PRICE_SCENARIOS
+        years (array): Calendar years
+        base_year (int): Year in which the index is 1.0
+
+    Returns:
+        numpy.ndarray: Price index indexed [scenario, year]
+    """
+    rates = np.array([ENERGY_PRICE_SCENARIOS[name] for name in names]) / 100
+    return (1 + rates[:, None]) ** (np.asarray(years)[None, :] - base_year)
+
+def strategy_cash_flows(abatement, levers, carbon_paths, energy_scenarios, start_year):
+    """
+    Build annual cash flows for strategies under every price scenario
+
+    Year 0 (the start year) carries the investment; abatement, energy savings
+    and avoided carbon cost accrue over the following lifetime years.
+
+    Args:
+        abatement (array): Annual abatement per strategy in tCO2e
+        levers (list): Lever definitions with name, cost_per_tonne, capex_per_tonne,
+            lifetime and energy_savings_per_tonne, e.g. the levers of load_strategy_store
+        carbon_paths (list): Names from CARBON_PRICE_PATHS
+        energy_scenarios (list): Names from ENERGY_PRICE_SCENARIOS
+        start_year (int): Year the strategies are implemented
+
+    Returns:
+        dict: Years and cash flows in USD indexed [strategy, carbon_path, energy_scenario, year]
+    """
+    abatement = np.asarray(abatement, dtype=np.float64)
+    incomplete = [lever["name"] for lever in levers
+                  if any(pd.isna(lever.get(field)) for field in FINANCIAL_FIELDS)]
+    if incomplete:
+        raise ValueError(f"No financial data for strategies: {', '.join(incomplete)}")
+    capex = np.array([lever["capex_per_tonne"] for lever in levers], dtype=np.float64)
+    lifetime = np.array([lever["lifetime"] for lever in levers], dtype=np.int64)
+    energy_savings = np.array([lever["energy_savings_per_tonne"] for lever in levers], dtype=np.float64)
+    cost_per_tonne = np.array([lever["cost_per_tonne"] for lever in levers], dtype=np.float64)
+    operating_cost = cost_per_tonne + energy_savings - capex / lifetime
+
+    elapsed = np.arange(int(lifetime.max()) + 1 if len(lifetime) else 1)
+    years = start_year + elapsed
+    active = (elapsed[None, :] >= 1) & (elapsed[None, :] <= lifetime[:, None])
+
+    carbon = carbon_price_paths(carbon_paths, years)
+    energy = energy_price_indices(energy_scenarios, years, start_year)
+
+    # Net benefit per tonne abated: (strategy, carbon path, energy scenario, year)
+    per_tonne = (
+        energy_savings[:, None, None, None] * energy[None, None, :, :]
+        + carbon[None, :, None, :]
+        - operating_cost[:, None, None, None]
+    ) * active[:, None, None, :]
+    per_tonne[..., 0] -= capex[:, None, None]
+
+    return {
+        "years": years,
+        "cash_flows": per_tonne * abatement[:, None, None, None]
+    }
+
+def _npv(cash_flows, rates):
+    """Net present value with rates broadcast against the leading axes of the cash flows"""
+    periods = np.arange(cash_flows.shape[-1])
+    return (cash_flows / (1 + rates[..., None]) ** periods).sum(axis=-1)
+
+def irr(cash_flows):
+    """
+    Internal rate of return for every cash flow series by vectorized bisection
+
+    Args:
+        cash_flows (array): Cash flows with years on the last axis
+
+    Returns:
+        numpy.ndarray: IRR per series (NaN when NPV does not change sign within IRR_BOUNDS)
+    """
+    shape = cash_flows.shape[:-1]
+    low = np.full(shape, IRR_BOUNDS[0])
+    high = np.full(shape, IRR_BOUNDS[1])
+    npv_low = _npv(cash_flows, low)
+    npv_high = _npv(cash_flows, high)
+    valid = np.sign(npv_low) * np.sign(npv_high) < 0
+
+    for _ in range(IRR_STEPS):
+        mid = (low + high) / 2
+        npv_mid = _npv(cash_flows, mid)
+        same_side = np.sign(npv_mid) == np.sign(npv_low)
+        low = np.where(same_side, mid, low)
+        npv_low = np.where(same_side, npv_mid, npv_low)
+        high = np.where(same_side, high, mid)
+
+    return np.where(valid, (low + high) / 2, np.nan)
+
+def evaluate_strategy_finances(abatement, levers, carbon_paths, energy_scenarios, discount_rates, start_year):
+    """
+    Evaluate NPV and IRR of strategies across price scenarios and discount rates
+
+    Args:
+        abatement (array): Annual abatement per strategy in tCO2e
+        levers (list): Lever definitions with name, cost_per_tonne and the financial fields of strategy_cash_flows
+        carbon_paths (list): Names from CARBON_PRICE_PATHS
+        energy_scenarios (list): Names from ENERGY_PRICE_SCENARIOS
+        discount_rates (list): Discount rates as fractions
+        start_year (int): Year the strategies are implemented
+
+    Returns:
+        dict: Scenario axes, cash flows, NPV indexed [strategy, carbon_path, energy_scenario, rate]
+            and IRR indexed [strategy, carbon_path, energy_scenario]
+    """
+    flows = strategy_cash_flows(abatement, levers, carbon_paths, energy_scenarios, start_year)
+    cash_flows = flows["cash_flows"]
+    rates = np.asarray(discount_rates, dtype=np.float64)
+
+    periods = np.arange(cash_flows.shape[-1])
+    discount = (1 + rates[:, None]) ** -periods[None, :]
+
+    return {
+        "strategies": [lever["name"] for lever in levers],
+        "carbon_paths": list(carbon_paths),
+        "energy_scenarios": list(energy_scenarios),
+        "discount_rates": rates,
+        "years": flows["years"],
+        "cash_flows": cash_flows,
+        "npv": np.einsum("lcpy,dy->lcpd", cash_flows, discount),
+        "irr": irr(cash_flows)
+    }
+
+def rank_strategies(finances, carbon_path, energy_scenario, discount_rate):
+    """
+    Rank strategies by NPV in one scenario, with the NPV range across all scenarios
+
+    Args:
+        finances (dict): Output of evaluate_strategy_finances
+        carbon_path (str): Carbon price path to rank by
+        energy_scenario (str): Energy price scenario to rank by
+        discount_rate (float): Discount rate to rank by
+
+    Returns:
+        pandas.DataFrame: One row per strategy sorted by NPV
+    """
+    c = finances["carbon_paths"].index(carbon_path)
+    p = finances["energy_scenarios"].index(energy_scenario)
+    d = int(np.argmin(np.abs(finances["discount_rates"] - discount_rate)))
+    npv = finances["npv"]
+    flat_npv = npv.reshape(npv.shape[0], -1)
+
+    ranking = pd.DataFrame({
+        "strategy": finances["strategies"],
+        "npv": npv[:, c, p, d],
+        "irr": finances["irr"][:, c, p],
+        "npv_min": flat_npv.min(axis=1),
+        "npv_max": flat_npv.max(axis=1),
+        "positive_share": (flat_npv > 0).mean(axis=1)
+    })
+    return ranking.sort_values("npv", ascending=False).reset_index(drop=True)
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from utils.calculations import EMISSION_FACTORS
+from utils.constants import VEHICLE_CLASSES
+
+# Fleet telematics processing
+# Trip exports are streamed in chunks and accumulated per vehicle with
+# bincount, so a year of trips is processed in a single pass without
+# holding the raw records in memory.
+
+TRIP_CHUNK_SIZE = 1_000_000
+TRIP_COLUMNS = ["vehicle_id", "distance_km", "fuel_liters"]
+
+def build_vehicle_lookup(vehicle_table, vehicle_classes=VEHICLE_CLASSES):
+    """
+    Build array lookups from vehicle ID to vehicle class attributes
+
+    Integer vehicle IDs index directly into a position array. Other IDs are
+    resolved through a pandas Index, which is still a vectorized lookup.
+
+    Args:
+        vehicle_table (pandas.DataFrame): Table with vehicle_id and vehicle_class columns
+        vehicle_classes (dict): Vehicle class definitions
+
+    Returns:
+        dict: Lookup arrays for resolving trip records
+    """
+    class_names = list(vehicle_classes.keys())
+    fuels = sorted({attrs["fuel"] for attrs in vehicle_classes.values()})
+
+    vehicle_table = vehicle_table.drop_duplicates(subset="vehicle_id", keep="last").reset_index(drop=True)
+    unknown = set(vehicle_table["vehicle_class"].unique()) - set(class_names)
+    if unknown:
+        raise ValueError(f"Unknown vehicle classes: {', '.join(sorted(map(str, unknown)))}")
+
+    class_codes = pd.Categorical(vehicle_table["vehicle_class"], categories=class_names).codes
+    vehicle_ids = vehicle_table["vehicle_id"]
+
+    lookup = {
+        "vehicle_ids": vehicle_ids.to_numpy(),
+        "class_names": class_names,
+        "class_codes": class_codes.astype(np.int64),
+        "fuels": fuels,
+        "class_fuel_codes": np.array([fuels.index(vehicle_classes[c]["fuel"]) for c in class_names]),
+        "class_liters_per_km": np.array([vehicle_classes[c]["liters_per_100km"] / 100 for c in class_names]),
+        "fuel_factors": np.array([EMISSION_FACTORS[fuel] for fuel in fuels])
+    }
+
+    if pd.api.types.is_integer_dtype(vehicle_ids) and len(vehicle_ids) and vehicle_ids.min() >= 0:
+        positions = np.full(int(vehicle_ids.max()) + 1, -1, dtype=np.int64)
+        positions[vehicle_ids.to_numpy()] = np.arange(len(vehicle_ids))
+        lookup["positions"] = positions
+    else:
+        lookup["index"] = pd.Index(vehicle_ids.astype(str))
+
+    return lookup
+
+def _resolve_vehicles(lookup, vehicle_ids):
+    """Map trip vehicle IDs to vehicle table positions (-1 when unknown)"""
+    if "positions" in lookup:
+        ids = pd.to_numeric(vehicle_ids, errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+        positions = np.full(len(ids), -1, dtype=np.int64)
+        in_range = (ids >= 0) & (ids < len(lookup["positions"]))
+        positions[in_range] = lookup["positions"][ids[in_range]]
+        return positions
+
+    return lookup["index"].get_indexer(vehicle_ids.astype(str))
+
+def calculate_fleet_emissions(trip_sources, vehicle_table, method="fuel", chunksize=TRIP_CHUNK_SIZE):
+    """
+    Calculate mobile combustion emissions from per-trip telematics records
+
+    With the 'fuel' method reported fuel is used and trips without fuel data
+    fall back to the class consumption rate. The 'distance' method always
+    estimates fuel from distance.
+
+    Args:
+        trip_sources (list): CSV paths or file-like objects with trip records
+        vehicle_table (pandas.DataFrame): Vehicle ID to vehicle class table
+        method (str): 'fuel' or 'distance'
+        chunksize (int): Number of trips read per chunk
+
+    Returns:
+        dict: Per-vehicle and per-class results plus Scope 1 calculator inputs
+    """
+    if method not in ("fuel", "distance"):
+        raise ValueError("Method must be 'fuel' or 'distance'")
+
+    lookup = build_vehicle_lookup(vehicle_table)
+    num_vehicles = len(lookup["vehicle_ids"])
+
+    distance = np.zeros(num_vehicles)
+    liters = np.zeros(num_vehicles)
+    estimated_liters = np.zeros(num_vehicles)
+    trips = np.zeros(num_vehicles, dtype=np.int64)
+    unmatched_trips = 0
+    unmatched_distance = 0.0
+
+    for source in trip_sources:
+        for chunk in pd.read_csv(source, usecols=lambda c: c in TRIP_COLUMNS, chunksize=chunksize):
+            positions = _resolve_vehicles(lookup, chunk["vehicle_id"])
+            matched = positions >= 0
+            unmatched_trips += int((~matched).sum())
+
+            trip_distance = pd.to_numeric(chunk["distance_km"], errors="coerce").fillna(0.0).to_numpy()
+            unmatched_distance += float(trip_distance[~matched].sum())
+
+            positions = positions[matched]
+            trip_distance = trip_distance[matched]
+            if "fuel_liters" in chunk.columns and method == "fuel":
+                trip_fuel = pd.to_numeric(chunk["fuel_liters"], errors="coerce").to_numpy()[matched]
+            else:
+                trip_fuel = np.full(len(positions), np.nan)
+
+            # Fill trips without reported fuel from the class consumption rate
+            class_rate = lookup["class_liters_per_km"][lookup["class_codes"][positions]]
+            needs_estimate = ~(trip_fuel > 0)
+            trip_fuel = np.where(needs_estimate, trip_distance * class_rate, trip_fuel)
+
+            distance += np.bincount(positions, weights=trip_distance, minlength=num_vehicles)
+            liters += np.bincount(positions, weights=trip_fuel, minlength=num_vehicles)
+            estimated_liters += np.bincount(
+                positions, weights=np.where(needs_estimate, trip_fuel, 0.0), minlength=num_vehicles
+            )
+            trips += np.bincount(positions, minlength=num_vehicles)
+
+    vehicle_fuel_codes = lookup["class_fuel_codes"][lookup["class_codes"]]
+    emissions = liters * lookup["fuel_factors"][vehicle_fuel_codes]
+
+    per_vehicle = pd.DataFrame({
+        "vehicle_id": lookup["vehicle_ids"],
+        "vehicle_class": np.array(lookup["class_names"])[lookup["class_codes"]],
+        "fuel": np.array(lookup["fuels"])[vehicle_fuel_codes],
+        "trips": trips,
+        "distance_km": distance,
+        "fuel_liters": liters,
+        "estimated_liters": estimated_liters,
+        "emissions": emissions
+    })
+
+    per_class = (
+        per_vehicle.assign(vehicles=per_vehicle["trips"] > 0)
+        .groupby(["vehicle_class", "fuel"], as_index=False)[
+            ["vehicles", "trips", "distance_km", "fuel_liters", "estimated_liters", "emissions"]
+        ]
+        .sum()
+    )
+
+    scope1_inputs = per_class.groupby("fuel")["fuel_liters"].sum().to_dict()
+
+    return {
+        "per_vehicle": per_vehicle,
+        "per_class": per_class,
+        "scope1_inputs": {fuel: float(total) for fuel, total in scope1_inputs.items()},
+        "total_emissions": float(emissions.sum()),
+        "unmatched_trips": unmatched_trips,
+        "unmatched_distance": unmatched_distance
+    }
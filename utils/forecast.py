@@ -0,0 +1,136 @@
+import numpy as np
+from utils.constants import CATEGORY_GROWTH_DRIVERS, CATEGORY_INTENSITY_IMPROVEMENT
+
+# Business-as-usual (BAU) forecasts
+# Each emission category grows with its driver (revenue, headcount or none)
+# and improves in intensity at its own annual rate. Projections broadcast
+# over entity x driver scenario x year; per-category detail is only
+# materialized when requested.
+
+GROWTH_DRIVERS = ["revenue", "employees", "none"]
+DEFAULT_INTENSITY_IMPROVEMENT = 1.0
+BAU_START_YEAR = 2024
+BAU_END_YEAR = 2050
+BAU_SCENARIOS = 10_000
+
+def get_category_drivers(categories):
+    """
+    Get growth driver indexes and intensity improvement rates for categories
+
+    Args:
+        categories (list): Emission breakdown categories
+
+    Returns:
+        tuple: (driver_index, intensity_improvement) arrays, one entry per category
+    """
+    driver_index = np.array([
+        GROWTH_DRIVERS.index(CATEGORY_GROWTH_DRIVERS.get(category, "revenue"))
+        for category in categories
+    ], dtype=np.int64)
+    intensity_improvement = np.array([
+        CATEGORY_INTENSITY_IMPROVEMENT.get(category, DEFAULT_INTENSITY_IMPROVEMENT) / 100
+        for category in categories
+    ])
+    return driver_index, intensity_improvement
+
+def sample_driver_scenarios(revenue_growth, employee_growth, volatility, n_scenarios, seed=None):
+    """
+    Sample annual driver growth scenarios around central growth rates
+
+    Args:
+        revenue_growth (float): Central annual revenue growth (fraction)
+        employee_growth (float): Central annual headcount growth (fraction)
+        volatility (float): Standard deviation of each growth rate (fraction)
+        n_scenarios (int): Number of scenarios to sample
+        seed (int): Random seed for reproducible samples
+
+    Returns:
+        numpy.ndarray: Growth rates indexed [scenario, driver] in GROWTH_DRIVERS order
+    """
+    rng = np.random.default_rng(seed)
+    growth = np.zeros((n_scenarios, len(GROWTH_DRIVERS)))
+    growth[:, 0] = revenue_growth
+    growth[:, 1] = employee_growth
+    growth[:, :2] += rng.normal(0.0, volatility, size=(n_scenarios, 2))
+    return np.maximum(growth, -0.99)
+
+def project_bau_emissions(base_emissions, categories, driver_growth, base_year=2023,
+                          start_year=BAU_START_YEAR, end_year=BAU_END_YEAR,
+                          intensity_improvement=None, by_category=False):
+    """
+    Project business-as-usual emissions for entities under driver growth scenarios
+
+    Args:
+        base_emissions (array): Base year emissions indexed [entity, category] in tCO2e
+        categories (list): Emission category of each column
+        driver_growth (array): Annual growth rates (fractions) indexed [scenario, driver]
+            in GROWTH_DRIVERS order; the 'none' driver is always held flat
+        base_year (int): Year of the base emissions
+        start_year (int): First projected year
+        end_year (int): Last projected year
+        intensity_improvement (array): Annual intensity improvement per category
+            (fractions); defaults to CATEGORY_INTENSITY_IMPROVEMENT
+        by_category (bool): Also return emissions per category
+
+    Returns:
+        dict: Years and total emissions indexed [entity, scenario, year]
+            (plus [entity, scenario, category, year] when by_category is set)
+    """
+    base = np.atleast_2d(np.asarray(base_emissions, dtype=np.float64))
+    growth = np.atleast_2d(np.asarray(driver_growth, dtype=np.float64))
+    if growth.shape[1] == len(GROWTH_DRIVERS) - 1:
+        growth = np.hstack([growth, np.zeros((growth.shape[0], 1))])
+    growth[:, GROWTH_DRIVERS.index("none")] = 0.0
+
+    driver_index, default_improvement = get_category_drivers(categories)
+    improvement = default_improvement if intensity_improvement is None else np.asarray(intensity_improvement, dtype=np.float64)
+
+    years = np.arange(start_year, end_year + 1)
+    elapsed = (years - base_year).astype(np.float64)
+
+    # Driver growth factors: (scenario, driver, year)
+    driver_factors = np.exp(np.log1p(growth)[:, :, None] * elapsed[None, None, :])
+    # Intensity factors: (category, year)
+    intensity_factors = np.exp(np.log1p(-improvement)[:, None] * elapsed[None, :])
+
+    # Base emissions pooled by driver after intensity improvement: (entity, driver, year)
+    driver_onehot = np.eye(len(GROWTH_DRIVERS))[driver_index]
+    pooled = np.einsum("ec,cd,cy->edy", base, driver_onehot, intensity_factors)
+
+    results = {
+        'years': years,
+        'categories': list(categories),
+        'total': np.einsum("edy,sdy->esy", pooled, driver_factors)
+    }
+
+    if by_category:
+        results['by_category'] = (
+            base[:, None, :, None]
+            * intensity_factors[None, None, :, :]
+            * driver_factors[:, driver_index, :][None, :, :, :]
+        )
+
+    return results
+
+def calculate_target_gap(bau_emissions, target_emissions):
+    """
+    Calculate the gap between business-as-usual emissions and a target pathway
+
+    Args:
+        bau_emissions (array): BAU emissions with years on the last axis
+        target_emissions (array): Target pathway emissions for the same years
+
+    Returns:
+        dict: Annual gap (tCO2e to abate), cumulative gap and the share of BAU to abate
+    """
+    bau = np.asarray(bau_emissions, dtype=np.float64)
+    gap = np.maximum(bau - np.asarray(target_emissions, dtype=np.float64), 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(bau > 0, gap / bau, 0.0)
+
+    return {
+        'annual_gap': gap,
+        'cumulative_gap': gap.sum(axis=-1),
+        'abatement_share': share
+    }
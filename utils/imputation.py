@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+from utils.calculations import INPUT_CATEGORIES
+from utils.constants import INDUSTRY_BENCHMARKS, SIZE_BANDS
+
+# Data-gap imputation for facility portfolios
+# Missing inputs are filled from peer groups, moving from the narrowest
+# group to the whole portfolio until enough peers report the input. Each
+# level is one grouped transform over the whole portfolio.
+
+# Peer group hierarchy and the data quality score of values imputed at each level
+IMPUTATION_LEVELS = [
+    (["industry", "region", "size_band"], 0.6),
+    (["industry", "size_band"], 0.5),
+    (["industry"], 0.4),
+    ([], 0.2)
+]
+
+MIN_PEERS = 3
+
+def assign_size_band(employees):
+    """
+    Assign size bands from employee counts
+
+    Args:
+        employees (pandas.Series): Number of employees per entity
+
+    Returns:
+        pandas.Series: Size band label per entity
+    """
+    edges = [bounds[0] for bounds in SIZE_BANDS.values()] + [list(SIZE_BANDS.values())[-1][1]]
+    return pd.cut(employees, bins=edges, labels=list(SIZE_BANDS.keys()), right=False)
+
+def _hierarchical_fill(values, missing, groups, min_peers):
+    """Fill missing cells from peer group medians, narrowest group first"""
+    filled = pd.DataFrame(np.nan, index=values.index, columns=values.columns)
+    quality = pd.DataFrame(0.0, index=values.index, columns=values.columns)
+
+    for keys, score in IMPUTATION_LEVELS:
+        if keys:
+            grouped = values.groupby([groups[key] for key in keys], observed=True, dropna=False)
+            medians = grouped.transform("median")
+            peers = grouped.transform("count")
+        else:
+            medians = pd.DataFrame(
+                np.broadcast_to(values.median().to_numpy(), values.shape),
+                index=values.index, columns=values.columns
+            )
+            peers = pd.DataFrame(
+                np.broadcast_to(values.count().to_numpy(), values.shape),
+                index=values.index, columns=values.columns
+            )
+
+        usable = missing & filled.isna() & (peers >= min_peers) & medians.notna()
+        filled = filled.mask(usable, medians)
+        quality = quality.mask(usable, score)
+
+    return filled, quality
+
+def impute_portfolio(portfolio, method="intensity", min_peers=MIN_PEERS):
+    """
+    Fill missing calculator inputs across a facility portfolio
+
+    Peer groups are formed by industry (as in INDUSTRY_BENCHMARKS), region and
+    size band. With the 'intensity' method the peer median of input per $M
+    revenue is scaled by the facility's revenue, unless the absolute peer
+    median comes from a narrower peer group. Facilities without revenue and
+    the 'median' method use the peer median of the input itself.
+
+    Args:
+        portfolio (pandas.DataFrame): One row per facility with facility_id, industry,
+            region, employees, revenue and calculator input columns (blank when unknown)
+        method (str): 'intensity' or 'median'
+        min_peers (int): Minimum number of reporting peers required at a level
+
+    Returns:
+        dict: Completed inputs, imputation flags, data quality scores and a summary
+    """
+    if method not in ("intensity", "median"):
+        raise ValueError("Method must be 'intensity' or 'median'")
+
+    fields = [
+        field for scope_fields in INPUT_CATEGORIES.values() for field in scope_fields
+        if field in portfolio.columns
+    ]
+    if not fields:
+        raise ValueError("Portfolio has no calculator input columns")
+
+    portfolio = portfolio.reset_index(drop=True)
+    groups = pd.DataFrame({
+        "industry": portfolio["industry"].where(portfolio["industry"].isin(list(INDUSTRY_BENCHMARKS)), "Other"),
+        "region": portfolio["region"].fillna("Unknown") if "region" in portfolio.columns else "Unknown",
+        "size_band": assign_size_band(portfolio["employees"].fillna(0))
+    })
+
+    values = portfolio[fields].apply(pd.to_numeric, errors="coerce")
+    missing = values.isna()
+
+    # Absolute peer medians are the fallback for facilities without revenue
+    filled, quality = _hierarchical_fill(values, missing, groups, min_peers)
+
+    if method == "intensity":
+        revenue = portfolio["revenue"].where(portfolio["revenue"] > 0)
+        ratios = values.div(revenue, axis=0)
+        ratio_missing = pd.DataFrame(
+            missing.to_numpy() & revenue.notna().to_numpy()[:, None],
+            index=missing.index, columns=missing.columns
+        )
+        ratio_filled, ratio_quality = _hierarchical_fill(ratios, ratio_missing, groups, min_peers)
+        scaled = ratio_filled.mul(revenue, axis=0)
+        use_ratio = scaled.notna() & (ratio_quality >= quality)
+        filled = filled.mask(use_ratio, scaled)
+        quality = quality.mask(use_ratio, ratio_quality)
+
+    imputed = missing & filled.notna()
+    completed = values.fillna(filled).fillna(0.0)
+    quality = quality.mask(~missing, 1.0)
+
+    id_columns = [c for c in ["facility_id", "industry", "region", "employees", "revenue"] if c in portfolio.columns]
+    summary = pd.DataFrame({
+        "missing": missing.sum(),
+        "imputed": imputed.sum(),
+        "unfilled": (missing & ~imputed).sum(),
+        "mean_quality": quality.mean()
+    })
+
+    return {
+        "values": pd.concat([portfolio[id_columns], completed], axis=1),
+        "imputed": imputed,
+        "quality": quality,
+        "summary": summary
+    }
+
+def get_facility_inputs(imputation, position):
+    """
+    Get calculator inputs and data quality scores for one facility
+
+    Args:
+        imputation (dict): Output of impute_portfolio
+        position (int): Row position of the facility
+
+    Returns:
+        tuple: (scope_data, data_quality) where scope_data maps scope to input dict
+            and data_quality maps scope to scores of imputed inputs
+    """
+    row = imputation["values"].iloc[position]
+    imputed = imputation["imputed"].iloc[position]
+    quality = imputation["quality"].iloc[position]
+
+    scope_data = {}
+    data_quality = {}
+    for scope, scope_fields in INPUT_CATEGORIES.items():
+        present = [field for field in scope_fields if field in imputed.index]
+        scope_data[scope] = {field: float(row[field]) for field in present}
+        data_quality[scope] = {field: float(quality[field]) for field in present if imputed[field]}
+
+    return scope_data, data_quality
+
+def retain_quality_flags(scope_quality, previous, saved):
+    """
+    Keep imputation flags only for inputs the user has not since changed
+
+    Args:
+        scope_quality (dict): Data quality scores of imputed inputs for one scope
+        previous (dict): Inputs before saving
+        saved (dict): Inputs being saved
+
+    Returns:
+        dict: Scores for inputs whose value is unchanged
+    """
+    return {
+        field: score for field, score in scope_quality.items()
+        if field in saved and previous.get(field) == saved[field]
+    }
@@ -0,0 +1,414 @@
+from fnmatch import fnmatchcase
+import numpy as np
+import pandas as pd
+
+# Marginal abatement cost curves (MACC)
+# Levers are ordered by cost per tonne. Each lever abates a share of the
+# emissions left in its categories after cheaper levers have been applied,
+# so overlapping levers are not double counted. Alternatives in an exclusive
+# group do not stack on each other. Abatement for every entity and lever is
+# one matrix product of the entity breakdowns with a category x lever matrix.
+
+KNAPSACK_STEPS = 1000
+KNAPSACK_STEPS_PER_ITEM = 20
+MAX_KNAPSACK_CELLS = 20_000_000
+MAX_KNAPSACK_ITEMS = 5000
+MAX_COMBINATION_LEVERS = 20
+COMBINATION_BLOCK_ELEMENTS = 4_000_000
+
+def breakdown_matrix(breakdowns):
+    """
+    Stack per-entity category breakdowns into a matrix
+
+    Args:
+        breakdowns (list): One dict per entity mapping category to emissions in tCO2e
+
+    Returns:
+        tuple: (emissions indexed [entity, category], category names)
+    """
+    frame = pd.DataFrame(list(breakdowns)).fillna(0.0)
+    return frame.to_numpy(dtype=np.float64), list(frame.columns)
+
+def category_incidence(categories, levers):
+    """
+    Map levers to the categories they cover
+
+    Lever categories may use shell-style wildcards, e.g. '* Refrigerant'.
+
+    Args:
+        categories (list): Breakdown category names
+        levers (list): Lever definitions
+
+    Returns:
+        numpy.ndarray: Boolean matrix indexed [category, lever]
+    """
+    return np.array([
+        [any(fnmatchcase(category, pattern) for pattern in lever["categories"]) for lever in levers]
+        for category in categories
+    ], dtype=bool).reshape(len(categories), len(levers))
+
+def build_macc(entity_emissions, categories, levers):
+    """
+    Build marginal abatement cost curves for many entities at once
+
+    Args:
+        entity_emissions (array): Emissions indexed [entity, category] in tCO2e
+        categories (list): Category name of each column
+        levers (list): Lever definitions, e.g. the levers of load_strategy_store
+
+    Returns:
+        dict: Levers in merit order and arrays indexed [entity, lever] of covered
+            emissions, abatement (tCO2e/year) and annual cost (USD)
+    """
+    emissions = np.atleast_2d(np.asarray(entity_emissions, dtype=np.float64))
+
+    table = pd.DataFrame([
+        {
+            "name": lever["name"],
+            "scope": lever.get("scope"),
+            "abatement_share": lever["abatement"],
+            "cost_per_tonne": lever["cost_per_tonne"],
+            "timeframe": lever.get("timeframe"),
+            "exclusive_group": lever.get("exclusive_group")
+        }
+        for lever in levers
+    ])
+    order = np.argsort(table["cost_per_tonne"].to_numpy(), kind="stable")
+    table = table.iloc[order].reset_index(drop=True)
+    incidence = category_incidence(categories, [levers[i] for i in order])
+
+    # Only the cheapest member of an exclusive group reduces the base of later levers
+    groups = table["exclusive_group"]
+    first_in_group = ~groups.duplicated() | groups.isna()
+    table["alternative"] = ~first_in_group.to_numpy()
+
+    share = np.clip(table["abatement_share"].to_numpy(), 0, 1 - 1e-12)
+    log_remaining = np.log1p(-share[None, :] * incidence)
+    stacked = log_remaining * first_in_group.to_numpy()[None, :]
+    before = np.cumsum(stacked, axis=1) - stacked
+
+    # Alternatives see the residual before their group's first member
+    for group in groups.dropna().unique():
+        members = np.flatnonzero((groups == group).to_numpy())
+        before[:, members[1:]] -= stacked[:, [members[0]]]
+
+    per_unit = incidence * share[None, :] * np.exp(before)
+    abatement = emissions @ per_unit
+
+    return {
+        "levers": table,
+        "categories": list(categories),
+        "covered_emissions": emissions @ incidence,
+        "abatement": abatement,
+        "cost": abatement * table["cost_per_tonne"].to_numpy()[None, :],
+        "total_emissions": emissions.sum(axis=1)
+    }
+
+def macc_curve(macc, entity=None):
+    """
+    Tabulate the abatement cost curve for one entity or the whole portfolio
+
+    Args:
+        macc (dict): Output of build_macc
+        entity (int): Entity position, or None to sum over all entities
+
+    Returns:
+        pandas.DataFrame: Levers in merit order with abatement, cost and cumulative abatement
+    """
+    abatement = macc["abatement"].sum(axis=0) if entity is None else macc["abatement"][entity]
+    curve = macc["levers"].assign(abatement=abatement, annual_cost=abatement * macc["levers"]["cost_per_tonne"])
+    curve["cumulative_abatement"] = curve["abatement"].where(~curve["alternative"], 0.0).cumsum()
+    return curve
+
+def _group_keys(macc, entities, positions):
+    """Integer exclusive group key per (entity, lever) item; ungrouped items get unique keys"""
+    codes, uniques = pd.factorize(macc["levers"]["exclusive_group"])
+    codes = codes[positions]
+    grouped_keys = entities.astype(np.int64) * (len(uniques) + 1) + codes
+    unique_keys = -1 - np.arange(len(positions), dtype=np.int64)
+    return np.where(codes >= 0, grouped_keys, unique_keys)
+
+def _knapsack(values, weights, keys, budget, target, steps):
+    """Exact multiple-choice knapsack on a discretized grid"""
+    unique_keys, group_index = np.unique(keys, return_inverse=True)
+    members = [np.flatnonzero(group_index == g) for g in range(len(unique_keys))]
+    grid = np.arange(steps + 1)
+    choices = np.full((len(members), steps + 1), -1, dtype=np.int32)
+
+    if target is None:
+        # dp[k]: largest abatement with cost within k budget steps
+        scale = budget / steps if budget > 0 else 1.0
+        units = np.ceil(weights / scale - 1e-9).astype(np.int64)
+        dp = np.zeros(steps + 1)
+        for g, items in enumerate(members):
+            best = dp.copy()
+            for item in items:
+                if units[item] > steps:
+                    continue
+                shifted = np.full(steps + 1, -np.inf)
+                shifted[units[item]:] = dp[:steps + 1 - units[item]] + values[item]
+                better = shifted > best
+                best = np.where(better, shifted, best)
+                choices[g, better] = item
+            dp = best
+        position = steps
+    else:
+        # dp[k]: lowest cost reaching at least k target steps of abatement
+        scale = target / steps if target > 0 else 1.0
+        units = np.rint(values / scale).astype(np.int64)
+        dp = np.full(steps + 1, np.inf)
+        dp[0] = 0.0
+        for g, items in enumerate(members):
+            best = dp.copy()
+            for item in items:
+                shifted = dp[np.maximum(grid - units[item], 0)] + weights[item]
+                better = shifted < best
+                best = np.where(better, shifted, best)
+                choices[g, better] = item
+            dp = best
+        if not np.isfinite(dp[steps]):
+            return None
+        position = steps
+
+    selected = []
+    for g in range(len(members) - 1, -1, -1):
+        item = choices[g, position]
+        if item >= 0:
+            selected.append(item)
+            position = position - units[item] if target is None else max(position - units[item], 0)
+    return np.array(sorted(selected), dtype=np.int64)
+
+def _knapsack_steps(n_items, n_groups, steps):
+    """Grid resolution that grows with the items, within the size limit of the choice table"""
+    return int(max(min(max(steps, KNAPSACK_STEPS_PER_ITEM * n_items), MAX_KNAPSACK_CELLS // max(n_groups, 1)), 1))
+
+def _merit_order(values, weights, costs, keys, budget, target):
+    """Greedy merit-order selection (LP relaxation of the knapsack, rounded down)"""
+    order = np.lexsort((-values, costs / np.where(values > 0, values, 1)))
+    first = ~pd.Series(keys[order]).duplicated().to_numpy()
+    order = order[first]
+
+    if target is None:
+        count = np.searchsorted(np.cumsum(weights[order]), budget, side="right")
+    else:
+        cumulative = np.cumsum(values[order])
+        if not len(cumulative) or cumulative[-1] < target:
+            return None
+        count = np.searchsorted(cumulative, target, side="left") + 1
+    return np.sort(order[:count])
+
+def _close_shortfall(values, weights, costs, keys, rest, selection, target):
+    """Add items in merit order until a selection reaches the target (None when it cannot)"""
+    shortfall = target - values[selection].sum()
+    if shortfall <= 0:
+        return selection
+    open_items = rest[~np.isin(keys[rest], keys[selection])]
+    extra = _merit_order(values[open_items], weights[open_items], costs[open_items], keys[open_items], None, shortfall)
+    return None if extra is None else np.union1d(selection, open_items[extra])
+
+def optimize_portfolio(macc, budget=None, target=None, method="auto", steps=KNAPSACK_STEPS):
+    """
+    Select the lever portfolio that maximizes abatement within an annual budget,
+    or reaches an abatement target at the lowest cost
+
+    Every (entity, lever) pair is an item; at most one lever per exclusive group
+    is chosen for each entity. Levers with net savings use no budget and are
+    always included when they do not conflict with a chosen alternative.
+    Abatement of each item is its merit-order value from build_macc.
+
+    Args:
+        macc (dict): Output of build_macc
+        budget (float): Annual budget in USD (budget mode)
+        target (float): Abatement target in tCO2e/year (target mode)
+        method (str): 'knapsack' (exact on a grid of steps), 'lp' (merit order)
+            or 'auto' (the better of both up to MAX_KNAPSACK_ITEMS items, otherwise merit order)
+        steps (int): Smallest grid resolution of the knapsack (grows with the number of items)
+
+    Returns:
+        dict: Selected items, total abatement and cost, feasibility and method used
+    """
+    if (budget is None) == (target is None):
+        raise ValueError("Provide exactly one of budget or target")
+    if method not in ("auto", "knapsack", "lp"):
+        raise ValueError("Method must be 'auto', 'knapsack' or 'lp'")
+
+    entities, positions = np.nonzero(macc["abatement"] > 0)
+    values = macc["abatement"][entities, positions]
+    costs = macc["cost"][entities, positions]
+    weights = np.maximum(costs, 0.0)
+    keys = _group_keys(macc, entities, positions)
+
+    # Ungrouped levers with net savings are always part of the optimum
+    always = (weights <= 0) & (keys < 0)
+    rest = np.flatnonzero(~always)
+    if target is not None:
+        target = target - values[always].sum()
+
+    candidates = ["knapsack", "lp"] if method == "auto" and len(rest) <= MAX_KNAPSACK_ITEMS \
+        else ["lp"] if method == "auto" else [method]
+
+    chosen = None
+    for candidate in candidates:
+        if target is not None and target <= 0:
+            selection = np.array([], dtype=np.int64)
+        elif candidate == "knapsack":
+            grid_steps = _knapsack_steps(len(rest), len(np.unique(keys[rest])), steps)
+            selection = _knapsack(values[rest], weights[rest], keys[rest], budget, target, grid_steps)
+        else:
+            selection = _merit_order(values[rest], weights[rest], costs[rest], keys[rest], budget, target)
+        if selection is None:
+            continue
+        selection = rest[selection]
+        if target is not None:
+            selection = _close_shortfall(values, weights, costs, keys, rest, selection, target)
+            if selection is None:
+                continue
+
+        # The grid rounds costs and abatement, so merit order can beat the
+        # knapsack: keep the larger abatement (budget) or the lower cost of
+        # the selections reaching the target
+        if chosen is None or (
+            values[selection].sum() > values[chosen].sum() if target is None
+            else weights[selection].sum() < weights[chosen].sum()
+        ):
+            chosen, method = selection, candidate
+    if method == "auto":
+        method = candidates[0]
+
+    feasible = chosen is not None
+    if not feasible:
+        # Target out of reach: report the largest achievable abatement
+        order = rest[np.lexsort((costs[rest], -values[rest]))]
+        chosen = np.sort(order[~pd.Series(keys[order]).duplicated().to_numpy()])
+
+    # Add grouped levers with net savings whose group is still open
+    free = rest[weights[rest] <= 0]
+    free = free[~np.isin(keys[free], keys[chosen])]
+    free = free[~pd.Series(keys[free]).duplicated().to_numpy()]
+    selected = np.union1d(np.union1d(np.flatnonzero(always), chosen), free)
+
+    levers = macc["levers"]
+    portfolio = pd.DataFrame({
+        "entity": entities[selected],
+        "lever": levers["name"].to_numpy()[positions[selected]],
+        "scope": levers["scope"].to_numpy()[positions[selected]],
+        "abatement": values[selected],
+        "cost_per_tonne": levers["cost_per_tonne"].to_numpy()[positions[selected]],
+        "annual_cost": costs[selected]
+    })
+
+    return {
+        "portfolio": portfolio,
+        "total_abatement": float(portfolio["abatement"].sum()),
+        "total_cost": float(portfolio["annual_cost"].sum()),
+        "feasible": feasible,
+        "method": method
+    }
+
+def _lever_arrays(categories, levers):
+    """Abatement share per category and lever, and cost per tonne per lever"""
+    share = np.clip(np.array([lever["abatement"] for lever in levers], dtype=np.float64), 0, 1)
+    incidence = category_incidence(categories, levers)
+    return incidence * share[None, :], np.array([lever["cost_per_tonne"] for lever in levers], dtype=np.float64)
+
+def _sequential_abatement(emissions, lever_share, masks):
+    """Abatement attributed to each selected lever when applied in order; masks are [combination, lever]"""
+    log_remaining = np.log(np.clip(1 - lever_share, 1e-300, None))
+    applied = masks[:, None, :] * log_remaining[None, :, :]
+    before = np.exp(np.cumsum(applied, axis=2) - applied)
+    return np.einsum("c,ck,bck->bk", emissions, lever_share, before) * masks
+
+def simulate_sequence(breakdown_emissions, categories, levers):
+    """
+    Apply strategies in order against a category breakdown
+
+    Each lever abates its share of the emissions left in its categories after
+    the levers before it, so the combined abatement is not double counted.
+
+    Args:
+        breakdown_emissions (array): Emissions per category in tCO2e
+        categories (list): Category name of each entry
+        levers (list): Lever definitions in the order they are applied
+
+    Returns:
+        dict: Per-lever standalone, sequential and overlapping abatement, plus
+            the naive sum and the true combined abatement
+    """
+    emissions = np.asarray(breakdown_emissions, dtype=np.float64)
+    lever_share, cost_per_tonne = _lever_arrays(categories, levers)
+
+    standalone = emissions @ lever_share
+    sequential = _sequential_abatement(emissions, lever_share, np.ones((1, len(levers))))[0]
+
+    steps = pd.DataFrame({
+        "lever": [lever["name"] for lever in levers],
+        "standalone_abatement": standalone,
+        "sequential_abatement": sequential,
+        "overlap": standalone - sequential,
+        "annual_cost": sequential * cost_per_tonne
+    })
+    steps["remaining_emissions"] = emissions.sum() - steps["sequential_abatement"].cumsum()
+
+    return {
+        "steps": steps,
+        "naive_abatement": float(standalone.sum()),
+        "combined_abatement": float(sequential.sum()),
+        "double_counted": float(standalone.sum() - sequential.sum())
+    }
+
+def evaluate_combinations(breakdown_emissions, categories, levers):
+    """
+    Evaluate the true combined abatement of every combination of strategies
+
+    All 2^k combinations are evaluated in vectorized blocks. Combined abatement
+    does not depend on the order of application; costs attribute abatement to
+    levers in the given order.
+
+    Args:
+        breakdown_emissions (array): Emissions per category in tCO2e
+        categories (list): Category name of each entry
+        levers (list): Lever definitions (at most MAX_COMBINATION_LEVERS)
+
+    Returns:
+        dict: Combination masks indexed [combination, lever], combined and naive
+            abatement and annual cost per combination, and the best subset of each size
+    """
+    if len(levers) > MAX_COMBINATION_LEVERS:
+        raise ValueError(f"At most {MAX_COMBINATION_LEVERS} strategies can be combined")
+
+    emissions = np.asarray(breakdown_emissions, dtype=np.float64)
+    lever_share, cost_per_tonne = _lever_arrays(categories, levers)
+    num_levers = len(levers)
+
+    combinations = np.arange(2 ** num_levers, dtype=np.int64)
+    masks = ((combinations[:, None] >> np.arange(num_levers)) & 1).astype(np.float64)
+
+    combined = np.empty(len(combinations))
+    cost = np.empty(len(combinations))
+    block = max(1, COMBINATION_BLOCK_ELEMENTS // max(len(emissions) * num_levers, 1))
+    for start in range(0, len(combinations), block):
+        attributed = _sequential_abatement(emissions, lever_share, masks[start:start + block])
+        combined[start:start + block] = attributed.sum(axis=1)
+        cost[start:start + block] = attributed @ cost_per_tonne
+
+    naive = masks @ (emissions @ lever_share)
+    sizes = masks.sum(axis=1).astype(np.int64)
+
+    # Best subset per size: largest combined abatement, then lowest cost
+    ranked = np.lexsort((cost, -combined, sizes))
+    best = ranked[np.r_[True, np.diff(sizes[ranked]) > 0]]
+    names = np.array([lever["name"] for lever in levers])
+
+    return {
+        "masks": masks.astype(bool),
+        "combined_abatement": combined,
+        "naive_abatement": naive,
+        "annual_cost": cost,
+        "best_by_size": pd.DataFrame({
+            "size": sizes[best],
+            "levers": [", ".join(names[masks[i].astype(bool)]) for i in best],
+            "combined_abatement": combined[best],
+            "naive_abatement": naive[best],
+            "annual_cost": cost[best]
+        })
+    }
@@ -0,0 +1,273 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Interval meter data store
+# Raw reads are resampled onto a regular grid, gap-filled and written to
+# Parquet partitioned by meter and year. Monthly rollups are kept alongside
+# so the calculator never has to rescan interval data.
+
+METER_STORE_DIR = os.path.join("data", "meter_store")
+READ_INTERVAL = "15min"
+MAX_INTERPOLATION_GAP = 4  # Longest gap (in intervals) filled by linear interpolation
+
+# Map meter energy types to calculator inputs
+METER_ENERGY_TYPES = {
+    "electricity": {"scope": "scope2", "input": "purchased_electricity", "unit": "kWh"},
+    "gas": {"scope": "scope1", "input": "natural_gas", "unit": "m³"}
+}
+
+_INTERVAL_DIR = "intervals"
+_ROLLUP_FILE = "monthly_rollup.parquet"
+_KEY_COLUMNS = ["meter_id", "energy_type"]
+
+# Rollup tables already read from disk, keyed by (path, modification time)
+_rollup_cache = {}
+
+def load_meter_reads(source):
+    """
+    Load raw meter reads from a CSV file or file-like object
+
+    Args:
+        source (str or file): CSV with meter_id, timestamp, value and energy_type columns
+
+    Returns:
+        pandas.DataFrame: Normalized meter reads
+    """
+    reads = pd.read_csv(source)
+    reads.columns = [column.strip().lower() for column in reads.columns]
+
+    missing = {"meter_id", "timestamp", "value"} - set(reads.columns)
+    if missing:
+        raise ValueError(f"Meter data is missing required columns: {', '.join(sorted(missing))}")
+
+    if "energy_type" not in reads.columns:
+        reads["energy_type"] = "electricity"
+
+    reads["meter_id"] = reads["meter_id"].astype(str)
+    reads["energy_type"] = reads["energy_type"].astype(str).str.strip().str.lower()
+    reads["timestamp"] = pd.to_datetime(reads["timestamp"])
+    reads["value"] = pd.to_numeric(reads["value"], errors="coerce")
+
+    unknown = set(reads["energy_type"].unique()) - set(METER_ENERGY_TYPES)
+    if unknown:
+        raise ValueError(f"Unsupported energy types: {', '.join(sorted(unknown))}")
+
+    return reads[["meter_id", "energy_type", "timestamp", "value"]]
+
+def resample_meter_reads(reads, interval=READ_INTERVAL, max_gap=MAX_INTERPOLATION_GAP):
+    """
+    Resample meter reads onto a regular interval grid and fill gaps
+
+    Short gaps are linearly interpolated. Longer gaps are filled with the
+    meter's average consumption for the same time-of-day slot. All steps
+    operate on the whole portfolio at once rather than meter by meter.
+
+    Args:
+        reads (pandas.DataFrame): Meter reads (meter_id, energy_type, timestamp, value)
+        interval (str): Target interval as a pandas frequency string
+        max_gap (int): Longest run of missing intervals to interpolate
+
+    Returns:
+        pandas.DataFrame: Regular series with an 'estimated' flag per interval
+    """
+    reads = reads.dropna(subset=["value"]).copy()
+    reads["timestamp"] = reads["timestamp"].dt.floor(interval)
+
+    # Collapse multiple reads falling in the same slot
+    observed = reads.groupby(_KEY_COLUMNS + ["timestamp"], sort=True)["value"].sum()
+
+    # Build the complete grid per meter between its first and last read
+    bounds = observed.reset_index().groupby(_KEY_COLUMNS, sort=True)["timestamp"].agg(["min", "max"])
+    step = pd.Timedelta(interval)
+    counts = ((bounds["max"] - bounds["min"]) // step).to_numpy(dtype=np.int64) + 1
+    meter_positions = np.repeat(np.arange(len(bounds)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    timestamps = bounds["min"].to_numpy()[meter_positions] + offsets * step.to_timedelta64()
+
+    full_index = pd.MultiIndex.from_arrays(
+        [
+            bounds.index.get_level_values("meter_id")[meter_positions],
+            bounds.index.get_level_values("energy_type")[meter_positions],
+            timestamps
+        ],
+        names=_KEY_COLUMNS + ["timestamp"]
+    )
+    series = observed.reindex(full_index)
+    values = series.to_numpy(dtype=float)
+    missing = np.isnan(values)
+
+    # Every meter starts and ends with an observed read, so interpolation
+    # over the concatenated grid never crosses a meter boundary
+    positions = np.arange(len(values))
+    interpolated = values.copy()
+    if missing.any():
+        interpolated[missing] = np.interp(positions[missing], positions[~missing], values[~missing])
+
+    # Length of each run of missing intervals
+    run_ids = np.cumsum(~missing)
+    run_lengths = np.bincount(run_ids[missing], minlength=run_ids[-1] + 1) if len(values) else np.array([])
+    long_gap = missing & (run_lengths[run_ids] > max_gap)
+    interpolated[long_gap] = np.nan
+
+    # Fill long gaps from the meter's time-of-day profile
+    filled = pd.DataFrame({
+        "meter_id": full_index.get_level_values("meter_id"),
+        "energy_type": full_index.get_level_values("energy_type"),
+        "timestamp": full_index.get_level_values("timestamp"),
+        "value": interpolated
+    })
+    slot = filled["timestamp"].dt.hour * 60 + filled["timestamp"].dt.minute
+    profile = filled.groupby([filled["meter_id"], filled["energy_type"], slot])["value"].transform("mean")
+    filled["value"] = filled["value"].fillna(profile).fillna(0.0)
+    filled["estimated"] = missing
+
+    return filled
+
+def ingest_meter_reads(reads, store_dir=METER_STORE_DIR):
+    """
+    Ingest raw meter reads into the partitioned Parquet store
+
+    Existing observed reads for the affected meter-years are merged with the
+    new reads before resampling, so partial uploads extend rather than replace
+    earlier data. Monthly rollups for the affected meter-years are refreshed.
+
+    Args:
+        reads (pandas.DataFrame): Raw meter reads from load_meter_reads
+        store_dir (str): Root directory of the meter store
+
+    Returns:
+        dict: Summary of the ingestion (meters, intervals, estimated share)
+    """
+    interval_dir = os.path.join(store_dir, _INTERVAL_DIR)
+    os.makedirs(store_dir, exist_ok=True)
+
+    reads = reads.copy()
+    reads["year"] = reads["timestamp"].dt.year
+    affected = reads[["meter_id", "year"]].drop_duplicates()
+
+    if os.path.isdir(interval_dir):
+        existing = pd.read_parquet(
+            interval_dir,
+            filters=[
+                ("meter_id", "in", affected["meter_id"].unique().tolist()),
+                ("year", "in", affected["year"].unique().tolist())
+            ]
+        )
+        if not existing.empty:
+            existing["meter_id"] = existing["meter_id"].astype(str)
+            existing["year"] = existing["year"].astype(int)
+            existing = existing.merge(affected, on=["meter_id", "year"])
+            existing = existing[~existing["estimated"]]
+            reads = pd.concat([existing[reads.columns], reads], ignore_index=True)
+            reads = reads.drop_duplicates(subset=_KEY_COLUMNS + ["timestamp"], keep="last")
+
+    filled = resample_meter_reads(reads.drop(columns="year"))
+    filled["year"] = filled["timestamp"].dt.year
+
+    filled.to_parquet(
+        interval_dir,
+        partition_cols=["meter_id", "year"],
+        index=False,
+        existing_data_behavior="delete_matching"
+    )
+
+    _update_rollup(store_dir, filled)
+
+    return {
+        "meters": filled["meter_id"].nunique(),
+        "intervals": len(filled),
+        "estimated_share": float(filled["estimated"].mean()) if len(filled) else 0.0
+    }
+
+def _update_rollup(store_dir, filled):
+    """Replace the monthly rollup rows for the meter-years in filled"""
+    month = filled["timestamp"].dt.month
+    monthly = (
+        filled.assign(month=month, estimated_value=filled["value"].where(filled["estimated"], 0.0))
+        .groupby(_KEY_COLUMNS + ["year", "month"], as_index=False)
+        .agg(value=("value", "sum"), estimated_value=("estimated_value", "sum"), intervals=("value", "size"))
+    )
+
+    rollup_path = os.path.join(store_dir, _ROLLUP_FILE)
+    if os.path.exists(rollup_path):
+        rollup = pd.read_parquet(rollup_path)
+        replaced = rollup.set_index(["meter_id", "year"]).index.isin(
+            monthly.set_index(["meter_id", "year"]).index
+        )
+        monthly = pd.concat([rollup[~replaced], monthly], ignore_index=True)
+
+    monthly = monthly.sort_values(_KEY_COLUMNS + ["year", "month"]).reset_index(drop=True)
+    monthly.to_parquet(rollup_path, index=False)
+    _rollup_cache.pop(rollup_path, None)
+
+def load_rollup(store_dir=METER_STORE_DIR):
+    """
+    Load the monthly rollup table, reusing the in-memory copy when unchanged
+
+    Args:
+        store_dir (str): Root directory of the meter store
+
+    Returns:
+        pandas.DataFrame: Monthly totals per meter and energy type
+    """
+    rollup_path = os.path.join(store_dir, _ROLLUP_FILE)
+    if not os.path.exists(rollup_path):
+        return pd.DataFrame(columns=_KEY_COLUMNS + ["year", "month", "value", "estimated_value", "intervals"])
+
+    mtime = os.path.getmtime(rollup_path)
+    cached = _rollup_cache.get(rollup_path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, pd.read_parquet(rollup_path))
+        _rollup_cache[rollup_path] = cached
+
+    return cached[1]
+
+def get_meter_totals(store_dir=METER_STORE_DIR, period="month", year=None, meter_ids=None, energy_type=None):
+    """
+    Get monthly or annual consumption totals from the precomputed rollups
+
+    Args:
+        store_dir (str): Root directory of the meter store
+        period (str): 'month' or 'year'
+        year (int): Restrict to a single year (optional)
+        meter_ids (list): Restrict to these meters (optional)
+        energy_type (str): Restrict to one energy type (optional)
+
+    Returns:
+        pandas.DataFrame: Totals per meter, energy type and period
+    """
+    rollup = load_rollup(store_dir)
+
+    mask = np.ones(len(rollup), dtype=bool)
+    if year is not None:
+        mask &= rollup["year"].to_numpy() == year
+    if meter_ids is not None:
+        mask &= rollup["meter_id"].isin([str(m) for m in meter_ids]).to_numpy()
+    if energy_type is not None:
+        mask &= rollup["energy_type"].to_numpy() == energy_type
+    selected = rollup[mask]
+
+    group_columns = _KEY_COLUMNS + (["year", "month"] if period == "month" else ["year"])
+    return selected.groupby(group_columns, as_index=False)[["value", "estimated_value", "intervals"]].sum()
+
+def get_calculator_inputs(year, store_dir=METER_STORE_DIR):
+    """
+    Get annual meter totals mapped onto calculator input fields
+
+    Args:
+        year (int): Reporting year
+        store_dir (str): Root directory of the meter store
+
+    Returns:
+        dict: Dictionary keyed by scope, each mapping input name to annual total
+    """
+    totals = get_meter_totals(store_dir, period="year", year=year)
+    by_type = totals.groupby("energy_type")["value"].sum()
+
+    inputs = {"scope1": {}, "scope2": {}}
+    for energy_type, total in by_type.items():
+        mapping = METER_ENERGY_TYPES[energy_type]
+        inputs[mapping["scope"]][mapping["input"]] = float(total)
+
+    return inputs
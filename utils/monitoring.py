@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+from utils.data_processing import calculate_target_trajectories
+
+# Progress monitoring against target trajectories
+# Monthly actuals are kept in a 12-slot ring buffer per entity and scope
+# together with running 12-month totals. Each new month replaces the slot
+# of the month leaving the window and adjusts the running total, so an
+# update costs the same no matter how much history has been ingested.
+# A matching ring of flags records which months in the window were actually
+# reported, so skipped months count as zero emissions but not as coverage.
+# Trackers are plain dicts of arrays and can be kept in session state.
+
+WINDOW_MONTHS = 12
+SCOPES = ["scope1", "scope2", "scope3"]
+DRIFT_TOLERANCE = 0.05
+INITIAL_CAPACITY = 1024
+
+def create_tracker(capacity=INITIAL_CAPACITY):
+    """
+    Create an empty rolling-window tracker
+
+    Args:
+        capacity (int): Initial number of entity slots (grows as needed)
+
+    Returns:
+        dict: Tracker state
+    """
+    return {
+        "entity_index": {},
+        "entity_ids": [],
+        "buffers": np.zeros((capacity, len(SCOPES), WINDOW_MONTHS)),
+        "rolling": np.zeros((capacity, len(SCOPES))),
+        "reported": np.zeros((capacity, WINDOW_MONTHS), dtype=bool),
+        "last_month": np.full(capacity, -1, dtype=np.int64),
+        "stale_updates": 0
+    }
+
+def _entity_rows(tracker, entity_ids):
+    """Map entity ids to tracker rows, adding new entities and growing arrays by doubling"""
+    index = tracker["entity_index"]
+    for entity_id in pd.unique(entity_ids):
+        if entity_id not in index:
+            index[entity_id] = len(tracker["entity_ids"])
+            tracker["entity_ids"].append(entity_id)
+
+    capacity = len(tracker["rolling"])
+    if len(tracker["entity_ids"]) > capacity:
+        grow = max(capacity, len(tracker["entity_ids"]) - capacity)
+        tracker["buffers"] = np.concatenate([tracker["buffers"], np.zeros((grow,) + tracker["buffers"].shape[1:])])
+        tracker["rolling"] = np.concatenate([tracker["rolling"], np.zeros((grow, len(SCOPES)))])
+        tracker["reported"] = np.concatenate([tracker["reported"], np.zeros((grow, WINDOW_MONTHS), dtype=bool)])
+        tracker["last_month"] = np.concatenate([tracker["last_month"], np.full(grow, -1, dtype=np.int64)])
+
+    return np.array([index[entity_id] for entity_id in entity_ids], dtype=np.int64)
+
+def _month_ordinals(months):
+    """Convert months (YYYY-MM strings or dates) to year * 12 + month - 1"""
+    periods = pd.PeriodIndex(pd.to_datetime(pd.Series(months).astype(str)), freq="M")
+    return (periods.year * 12 + periods.month - 1).to_numpy(dtype=np.int64)
+
+def _apply_month(tracker, rows, month, values):
+    """Apply one month of actuals for distinct entity rows"""
+    buffers = tracker["buffers"]
+    rolling = tracker["rolling"]
+    reported = tracker["reported"]
+    last = tracker["last_month"][rows]
+    slot = month % WINDOW_MONTHS
+
+    # Entities new to the tracker or away for a full window start a fresh window
+    fresh = (last < 0) | (month - last >= WINDOW_MONTHS)
+    buffers[rows[fresh]] = 0.0
+    rolling[rows[fresh]] = 0.0
+    reported[rows[fresh]] = False
+
+    # Months skipped since the last update count as zero and are not reported
+    advancing = ~fresh & (month > last)
+    for step in range(1, WINDOW_MONTHS):
+        skipped = advancing & (month - last > step)
+        if not skipped.any():
+            break
+        skipped_rows = rows[skipped]
+        skipped_slots = (last[skipped] + step) % WINDOW_MONTHS
+        rolling[skipped_rows] -= buffers[skipped_rows, :, skipped_slots]
+        buffers[skipped_rows, :, skipped_slots] = 0.0
+        reported[skipped_rows, skipped_slots] = False
+
+    # New months and corrections inside the window replace the slot's value
+    in_window = month > last - WINDOW_MONTHS
+    target = rows[in_window]
+    rolling[target] += values[in_window] - buffers[target, :, slot]
+    buffers[target, :, slot] = values[in_window]
+    reported[target, slot] = True
+
+    tracker["last_month"][rows] = np.maximum(last, month)
+    tracker["stale_updates"] += int((~in_window).sum())
+
+def update_tracker(tracker, actuals):
+    """
+    Ingest monthly actuals into the tracker
+
+    Rows for a month already in an entity's window replace the earlier values;
+    rows older than the window are counted as stale and ignored.
+
+    Args:
+        tracker (dict): Output of create_tracker
+        actuals (pandas.DataFrame): Rows with entity_id, month and scope1/scope2/scope3
+            emissions in tCO2e (missing scope columns count as zero)
+
+    Returns:
+        dict: The updated tracker
+    """
+    missing = {"entity_id", "month"} - set(actuals.columns)
+    if missing:
+        raise ValueError(f"Actuals are missing required columns: {', '.join(sorted(missing))}")
+
+    frame = pd.DataFrame({
+        "entity_id": actuals["entity_id"].astype(str).to_numpy(),
+        "month": _month_ordinals(actuals["month"])
+    })
+    for scope in SCOPES:
+        frame[scope] = pd.to_numeric(actuals[scope], errors="coerce").fillna(0.0).to_numpy() \
+            if scope in actuals.columns else 0.0
+    frame = frame.groupby(["month", "entity_id"], sort=True)[SCOPES].sum().reset_index()
+
+    rows = _entity_rows(tracker, frame["entity_id"].to_numpy())
+    months = frame["month"].to_numpy()
+    values = frame[SCOPES].to_numpy()
+
+    # One vectorized step per distinct month in the batch
+    boundaries = np.flatnonzero(np.diff(months)) + 1
+    for block in np.split(np.arange(len(months)), boundaries):
+        if len(block):
+            _apply_month(tracker, rows[block], int(months[block[0]]), values[block])
+
+    return tracker
+
+def rolling_totals(tracker):
+    """
+    Get the rolling 12-month totals per entity and scope
+
+    Args:
+        tracker (dict): Output of create_tracker
+
+    Returns:
+        pandas.DataFrame: One row per entity with window end month, months reported in the
+            window and totals
+    """
+    count = len(tracker["entity_ids"])
+    last = tracker["last_month"][:count]
+    totals = pd.DataFrame(tracker["rolling"][:count], columns=SCOPES)
+    totals.insert(0, "entity_id", tracker["entity_ids"])
+    totals.insert(1, "window_end", [f"{m // 12}-{m % 12 + 1:02d}" for m in last])
+    totals.insert(2, "months_covered", tracker["reported"][:count].sum(axis=1))
+    totals["total"] = totals[SCOPES].sum(axis=1)
+    return totals
+
+def evaluate_progress(tracker, base_emissions, reduction_percentage, target_year, base_year=2023,
+                      end_year=2050, tolerance=DRIFT_TOLERANCE):
+    """
+    Compare rolling 12-month totals with each entity's target trajectory
+
+    The expected annual emissions for a window are read from the trajectory
+    of calculate_target_trajectories at the window midpoint.
+
+    Args:
+        tracker (dict): Output of create_tracker
+        base_emissions (dict or pandas.Series): Base year emissions per entity id in tCO2e
+        reduction_percentage (float): Reduction by the target year
+        target_year (int): Target year
+        base_year (int): Base year of the trajectory
+        end_year (int): Last year of the trajectory
+        tolerance (float): Allowed overshoot before an entity is flagged off track
+
+    Returns:
+        pandas.DataFrame: Rolling totals with expected emissions, gap and status per entity
+    """
+    totals = rolling_totals(tracker)
+    base = pd.Series(base_emissions, dtype=np.float64).reindex(totals["entity_id"]).to_numpy()
+
+    trajectory = calculate_target_trajectories(1.0, reduction_percentage, target_year, base_year, end_year)
+    last = tracker["last_month"][:len(totals)]
+    midpoint = (last - (WINDOW_MONTHS - 2) / 2) / 12
+    factors = np.interp(midpoint, trajectory["years"] + 0.5, trajectory["reduction_factors"][0])
+
+    totals["expected"] = base * factors
+    totals["gap"] = totals["total"] - totals["expected"]
+    totals["gap_percent"] = np.where(totals["expected"] > 0, totals["gap"] / totals["expected"] * 100, np.nan)
+    totals["status"] = np.select(
+        [
+            totals["months_covered"] < WINDOW_MONTHS,
+            np.isnan(base),
+            totals["total"] <= totals["expected"],
+            totals["total"] <= totals["expected"] * (1 + tolerance)
+        ],
+        ["Insufficient Data", "No Baseline", "On Track", "At Risk"],
+        default="Off Track"
+    )
+    return totals
@@ -0,0 +1,230 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Nearest-neighbour peer finder
+# Peer emissions profiles are turned once into a feature matrix of scope
+# shares, log revenue, log headcount, log intensity and one-hot region,
+# standardized and weighted so that squared Euclidean distance compares
+# profiles, and written to disk with the squared row norms. A query is one
+# matrix product per block of peers (|x|^2 - 2 x.q + |q|^2) followed by an
+# argpartition, so finding the k nearest of 150k peers takes a few
+# milliseconds without a tree structure.
+
+PEER_INDEX_DIR = os.path.join("data", "peer_index")
+PROFILE_COLUMNS = ["company_id", "industry", "region", "revenue", "employees", "scope1", "scope2", "scope3"]
+NUMERIC_FEATURES = ["scope1_share", "scope2_share", "scope3_share", "log_revenue", "log_employees", "log_intensity"]
+FEATURE_WEIGHTS = {
+    "scope1_share": 1.0,
+    "scope2_share": 1.0,
+    "scope3_share": 1.0,
+    "log_revenue": 1.0,
+    "log_employees": 0.5,
+    "log_intensity": 1.5,
+    "region": 0.75
+}
+DEFAULT_NEIGHBORS = 25
+DISTANCE_BLOCK = 65536
+
+_FEATURES_FILE = "features.npy"
+_NORMS_FILE = "norms.npy"
+_PROFILES_FILE = "profiles.parquet"
+_META_FILE = "features.json"
+
+# Indexes already opened, keyed by (directory, modification time)
+_index_cache = {}
+
+def profile_features(profiles):
+    """
+    Raw numeric features of emissions profiles
+
+    Args:
+        profiles (pandas.DataFrame): Profiles with revenue (USD millions), employees
+            and scope1/scope2/scope3 emissions in tCO2e
+
+    Returns:
+        pandas.DataFrame: Scope shares (%) and log revenue, headcount and intensity
+    """
+    scopes = profiles[["scope1", "scope2", "scope3"]].apply(pd.to_numeric, errors="coerce").fillna(0.0).clip(lower=0.0)
+    total = scopes.sum(axis=1).to_numpy()
+    revenue = pd.to_numeric(profiles["revenue"], errors="coerce").fillna(0.0).clip(lower=0.0).to_numpy()
+    employees = pd.to_numeric(profiles["employees"], errors="coerce").fillna(0.0).clip(lower=0.0).to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shares = np.where(total[:, None] > 0, scopes.to_numpy() / total[:, None] * 100, 0.0)
+        intensity = np.where(revenue > 0, total / revenue, 0.0)
+
+    return pd.DataFrame({
+        "scope1_share": shares[:, 0],
+        "scope2_share": shares[:, 1],
+        "scope3_share": shares[:, 2],
+        "log_revenue": np.log1p(revenue),
+        "log_employees": np.log1p(employees),
+        "log_intensity": np.log1p(intensity)
+    }, index=profiles.index)
+
+def _encode(features, regions, metadata):
+    """Standardize, weight and append one-hot regions"""
+    mean = np.array(metadata["mean"])
+    scale = np.array(metadata["scale"])
+    weights = np.array([FEATURE_WEIGHTS[name] for name in NUMERIC_FEATURES])
+    numeric = (features[NUMERIC_FEATURES].to_numpy(dtype=np.float64) - mean) / scale * weights
+
+    region_codes = pd.Categorical(regions, categories=metadata["regions"]).codes
+    one_hot = np.zeros((len(numeric), len(metadata["regions"])))
+    known = region_codes >= 0
+    one_hot[np.flatnonzero(known), region_codes[known]] = FEATURE_WEIGHTS["region"]
+    return np.hstack([numeric, one_hot]).astype(np.float32)
+
+def build_peer_index(profiles, index_dir=PEER_INDEX_DIR):
+    """
+    Build the peer feature matrix and write it to disk
+
+    Args:
+        profiles (pandas.DataFrame): Peer profiles with company_id, industry, region,
+            revenue (USD millions), employees and scope1/scope2/scope3 emissions (tCO2e)
+        index_dir (str): Directory of the index files
+
+    Returns:
+        dict: Summary of the index (peers, features)
+    """
+    missing = set(PROFILE_COLUMNS) - set(profiles.columns)
+    if missing:
+        raise ValueError(f"Peer profiles are missing required columns: {', '.join(sorted(missing))}")
+
+    profiles = profiles[PROFILE_COLUMNS].reset_index(drop=True)
+    profiles["company_id"] = profiles["company_id"].astype(str)
+    profiles["industry"] = profiles["industry"].astype(str)
+    profiles["region"] = profiles["region"].astype(str)
+    features = profile_features(profiles)
+    if not len(features):
+        raise ValueError("Peer profiles are empty")
+
+    std = features[NUMERIC_FEATURES].std(ddof=0).to_numpy()
+    metadata = {
+        "mean": features[NUMERIC_FEATURES].mean().tolist(),
+        "scale": np.where(std > 0, std, 1.0).tolist(),
+        "regions": sorted(profiles["region"].unique()),
+        "industries": sorted(profiles["industry"].unique())
+    }
+    matrix = _encode(features, profiles["region"], metadata)
+
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, _FEATURES_FILE), matrix)
+    np.save(os.path.join(index_dir, _NORMS_FILE), np.einsum("ij,ij->i", matrix, matrix))
+    pd.concat([profiles, features], axis=1).to_parquet(os.path.join(index_dir, _PROFILES_FILE), index=False)
+    with open(os.path.join(index_dir, _META_FILE), "w") as f:
+        json.dump(metadata, f)
+    _index_cache.pop(index_dir, None)
+
+    return {"peers": len(matrix), "features": matrix.shape[1]}
+
+def load_peer_index(index_dir=PEER_INDEX_DIR):
+    """
+    Open the peer index, reusing the open index when the files are unchanged
+
+    Args:
+        index_dir (str): Directory of the index files
+
+    Returns:
+        dict: Memory-mapped feature matrix, squared norms, peer profiles and encoding
+            metadata, or None when no index has been built
+    """
+    meta_path = os.path.join(index_dir, _META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+
+    mtime = os.path.getmtime(meta_path)
+    cached = _index_cache.get(index_dir)
+    if cached is not None and cached["mtime"] == mtime:
+        return cached
+
+    with open(meta_path) as f:
+        metadata = json.load(f)
+    profiles = pd.read_parquet(os.path.join(index_dir, _PROFILES_FILE))
+    index = {
+        "mtime": mtime,
+        "metadata": metadata,
+        "features": np.load(os.path.join(index_dir, _FEATURES_FILE), mmap_mode="r"),
+        "norms": np.load(os.path.join(index_dir, _NORMS_FILE)),
+        "profiles": profiles,
+        "industry_codes": pd.Categorical(profiles["industry"], categories=metadata["industries"]).codes
+    }
+    _index_cache[index_dir] = index
+    return index
+
+def encode_profiles(index, profiles):
+    """
+    Encode query profiles into the index feature space
+
+    Args:
+        index (dict): Output of load_peer_index
+        profiles (pandas.DataFrame): Profiles with region, revenue, employees and scope1-3
+
+    Returns:
+        numpy.ndarray: Feature vectors indexed [profile, feature]
+    """
+    return _encode(profile_features(profiles), profiles["region"].astype(str), index["metadata"])
+
+def nearest_neighbors(index, queries, k=DEFAULT_NEIGHBORS, industry=None, block=DISTANCE_BLOCK):
+    """
+    Find the k nearest peers of each query vector
+
+    Args:
+        index (dict): Output of load_peer_index
+        queries (array): Encoded profiles indexed [query, feature]
+        k (int): Number of neighbours
+        industry (str): Restrict peers to one industry (None for all peers)
+        block (int): Peers per distance block
+
+    Returns:
+        tuple: (peer row positions, distances), each indexed [query, neighbour] nearest first
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    features, norms = index["features"], index["norms"]
+    candidates = None
+    if industry is not None:
+        code = index["metadata"]["industries"].index(industry) if industry in index["metadata"]["industries"] else -2
+        candidates = np.flatnonzero(index["industry_codes"] == code)
+
+    n = len(norms) if candidates is None else len(candidates)
+    k = min(k, n)
+    if k == 0:
+        return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    best_distances = np.empty((len(queries), 0), dtype=np.float32)
+    query_norms = np.einsum("ij,ij->i", queries, queries)
+
+    for start in range(0, n, block):
+        rows = np.arange(start, min(start + block, n)) if candidates is None else candidates[start:start + block]
+        block_features = features[rows[0]:rows[-1] + 1] if candidates is None else features[rows]
+        distances = norms[rows][None, :] - 2 * queries @ block_features.T + query_norms[:, None]
+
+        # Keep the k best of the running best and this block
+        merged_rows = np.hstack([best_rows, np.broadcast_to(rows, distances.shape)])
+        merged = np.hstack([best_distances, distances])
+        keep = np.argpartition(merged, k - 1, axis=1)[:, :k] if merged.shape[1] > k else np.argsort(merged, axis=1)
+        best_rows = np.take_along_axis(merged_rows, keep, axis=1)
+        best_distances = np.take_along_axis(merged, keep, axis=1)
+
+    order = np.argsort(best_distances, axis=1)
+    return (np.take_along_axis(best_rows, order, axis=1),
+            np.sqrt(np.maximum(np.take_along_axis(best_distances, order, axis=1), 0)))
+
+def find_peers(index, profile, k=DEFAULT_NEIGHBORS, industry=None):
+    """
+    Find the companies most similar to one emissions profile
+
+    Args:
+        index (dict): Output of load_peer_index
+        profile (dict): Profile with region, revenue, employees and scope1/scope2/scope3
+        k (int): Number of peers
+        industry (str): Restrict peers to one industry (None for all peers)
+
+    Returns:
+        pandas.DataFrame: Nearest peers with their profile, features and distance
+    """
+    query = encode_profiles(index, pd.DataFrame([profile]))
+    rows, distances = nearest_neighbors(index, query, k=k, industry=industry)
+    return index["profiles"].iloc[rows[0]].assign(distance=distances[0]).reset_index(drop=True)
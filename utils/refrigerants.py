@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+from utils.constants import REFRIGERANT_GWP, EQUIPMENT_LEAK_RATES
+
+# Refrigerant equipment inventory
+# Leakage is calculated per unit, vectorized over the whole inventory with
+# array lookups for GWP and leak rates, then rolled up by site and gas.
+
+INVENTORY_COLUMNS = ["unit_id", "site", "gas", "equipment_type", "charge_kg"]
+MASS_BALANCE_COLUMNS = ["serviced_kg", "new_charge_kg", "new_capacity_kg", "retired_capacity_kg", "recovered_kg"]
+
+def load_equipment_inventory(source):
+    """
+    Load a refrigeration equipment inventory from CSV
+
+    Args:
+        source (str or file): CSV with one row per unit
+
+    Returns:
+        pandas.DataFrame: Inventory with mass balance columns present
+    """
+    inventory = pd.read_csv(source)
+
+    missing = set(INVENTORY_COLUMNS) - set(inventory.columns)
+    if missing:
+        raise ValueError(f"Inventory is missing required columns: {', '.join(sorted(missing))}")
+
+    for column in MASS_BALANCE_COLUMNS:
+        if column not in inventory.columns:
+            inventory[column] = np.nan
+
+    return inventory
+
+def calculate_refrigerant_leakage(inventory, method="auto"):
+    """
+    Calculate refrigerant leakage and emissions for every unit in an inventory
+
+    Mass balance (GHG Protocol simplified material balance):
+        leaked = serviced + (new_charge - new_capacity) + (retired_capacity - recovered)
+    Screening:
+        leaked = charge x default annual leak rate for the equipment type
+
+    With method 'auto', units with servicing records use mass balance and all
+    other units use the screening method.
+
+    Args:
+        inventory (pandas.DataFrame): Equipment inventory from load_equipment_inventory
+        method (str): 'auto', 'mass_balance' or 'screening'
+
+    Returns:
+        pandas.DataFrame: Inventory with method, leaked_kg and emissions (tCO2e) columns
+    """
+    if method not in ("auto", "mass_balance", "screening"):
+        raise ValueError("Method must be 'auto', 'mass_balance' or 'screening'")
+
+    gases = list(REFRIGERANT_GWP.keys())
+    gas_codes = pd.Categorical(inventory["gas"], categories=gases).codes
+    if (gas_codes < 0).any():
+        unknown = sorted(set(inventory["gas"][gas_codes < 0].astype(str)))
+        raise ValueError(f"Unknown refrigerant gases: {', '.join(unknown)}")
+
+    equipment_types = list(EQUIPMENT_LEAK_RATES.keys())
+    equipment_codes = pd.Categorical(inventory["equipment_type"], categories=equipment_types).codes
+    if (equipment_codes < 0).any():
+        unknown = sorted(set(inventory["equipment_type"][equipment_codes < 0].astype(str)))
+        raise ValueError(f"Unknown equipment types: {', '.join(unknown)}")
+
+    gwp = np.array([REFRIGERANT_GWP[gas] for gas in gases], dtype=float)
+    leak_rates = np.array([EQUIPMENT_LEAK_RATES[t] for t in equipment_types], dtype=float) / 100
+
+    charge = inventory["charge_kg"].to_numpy(dtype=float)
+    serviced = inventory["serviced_kg"].to_numpy(dtype=float)
+    balance = {column: np.nan_to_num(inventory[column].to_numpy(dtype=float)) for column in MASS_BALANCE_COLUMNS}
+
+    mass_balance = (
+        balance["serviced_kg"]
+        + (balance["new_charge_kg"] - balance["new_capacity_kg"])
+        + (balance["retired_capacity_kg"] - balance["recovered_kg"])
+    )
+    screening = charge * leak_rates[equipment_codes]
+
+    if method == "mass_balance":
+        use_mass_balance = np.ones(len(inventory), dtype=bool)
+    elif method == "screening":
+        use_mass_balance = np.zeros(len(inventory), dtype=bool)
+    else:
+        use_mass_balance = ~np.isnan(serviced)
+
+    leaked = np.maximum(np.where(use_mass_balance, mass_balance, screening), 0.0)
+
+    results = inventory.copy()
+    results["method"] = np.where(use_mass_balance, "Mass balance", "Screening")
+    results["gwp"] = gwp[gas_codes]
+    results["leaked_kg"] = leaked
+    results["emissions"] = leaked * results["gwp"].to_numpy() / 1000  # kgCO2e to tCO2e
+
+    return results
+
+def summarize_refrigerant_emissions(unit_results):
+    """
+    Roll up unit-level refrigerant emissions by site and gas
+
+    Args:
+        unit_results (pandas.DataFrame): Output of calculate_refrigerant_leakage
+
+    Returns:
+        dict: Site/gas rollup, per-gas totals and the Scope 1 inventory input
+    """
+    by_site_gas = unit_results.groupby(["site", "gas"], as_index=False).agg(
+        units=("unit_id", "size"),
+        charge_kg=("charge_kg", "sum"),
+        leaked_kg=("leaked_kg", "sum"),
+        emissions=("emissions", "sum")
+    )
+    by_gas = by_site_gas.groupby("gas")["emissions"].sum().sort_values(ascending=False)
+
+    return {
+        "by_site_gas": by_site_gas,
+        "by_gas": by_gas,
+        "scope1_input": {gas: float(value) for gas, value in by_gas.items() if value > 0},
+        "total_emissions": float(by_gas.sum())
+    }
@@ -12,7 +12,23 @@ import io
 import plotly.io as pio
 import base64
 
-def generate_report(company_data, total_emissions, emissions_by_scope, scope1_breakdown, scope2_breakdown, scope3_breakdown, targets):
+def _imputed_note(data_quality, scope, category):
+    """
+    Build the label suffix marking an imputed breakdown category
+    
+    Args:
+        data_quality (dict): Data quality scores from calculate_emissions (or None)
+        scope (str): Scope key (scope1, scope2, scope3)
+        category (str): Breakdown category
+        
+    Returns:
+        str: Suffix such as ' (imputed, DQ 0.60)' or an empty string
+    """
+    if not data_quality or category not in data_quality.get(scope, {}):
+        return ""
+    return f" (imputed, DQ {data_quality[scope][category]:.2f})"
+
+def generate_report(company_data, total_emissions, emissions_by_scope, scope1_breakdown, scope2_breakdown, scope3_breakdown, targets, data_quality=None):
     """
     Generate a PDF report of emissions calculation results
     
@@ -24,6 +40,7 @@ def generate_report(company_data, total_emissions, emissions_by_scope, scope1_br
         scope2_breakdown (dict): Dictionary containing scope 2 emissions breakdown
         scope3_breakdown (dict): Dictionary containing scope 3 emissions breakdown
         targets (dict): Dictionary containing emissions reduction targets
+        data_quality (dict): Data quality scores of imputed categories from calculate_emissions (optional)
     
     Returns:
         str: Path to the generated PDF file
@@ -57,6 +74,9 @@ def generate_report(company_data, total_emissions, emissions_by_scope, scope1_br
         "Scope 3 Breakdown": scope3_breakdown
     }
     
+    if data_quality:
+        report_data["Emissions Summary"]["Data Quality Score"] = f"{data_quality['overall']:.2f}"
+    
     # In a real app, we would generate a PDF using a library like ReportLab
     # But for this example, we'll just simulate the report generation
     
@@ -77,22 +97,22 @@ def generate_report(company_data, total_emissions, emissions_by_scope, scope1_br
     
     print("\n--- SCOPE 1 BREAKDOWN ---")
     for category, value in report_data["Scope 1 Breakdown"].items():
-        print(f"{category}: {value:.2f} tCO2e")
+        print(f"{category}: {value:.2f} tCO2e{_imputed_note(data_quality, 'scope1', category)}")
     
     print("\n--- SCOPE 2 BREAKDOWN ---")
     for category, value in report_data["Scope 2 Breakdown"].items():
-        print(f"{category}: {value:.2f} tCO2e")
+        print(f"{category}: {value:.2f} tCO2e{_imputed_note(data_quality, 'scope2', category)}")
     
     print("\n--- SCOPE 3 BREAKDOWN ---")
     for category, value in report_data["Scope 3 Breakdown"].items():
-        print(f"{category}: {value:.2f} tCO2e")
+        print(f"{category}: {value:.2f} tCO2e{_imputed_note(data_quality, 'scope3', category)}")
     
     print("\n=== END OF REPORT ===")
     
     # In a real app, we would return the path to the generated PDF
     return "emissions_report.pdf"
 
-def create_pdf_report(company_data, total_emissions, emissions_by_scope, scope1_breakdown, scope2_breakdown, scope3_breakdown, targets):
+def create_pdf_report(company_data, total_emissions, emissions_by_scope, scope1_breakdown, scope2_breakdown, scope3_breakdown, targets, data_quality=None):
     """
     Create a PDF report using ReportLab
     
@@ -104,6 +124,7 @@ def create_pdf_report(company_data, total_emissions, emissions_by_scope, scope1_
         scope2_breakdown (dict): Dictionary containing scope 2 emissions breakdown
         scope3_breakdown (dict): Dictionary containing scope 3 emissions breakdown
         targets (dict): Dictionary containing emissions reduction targets
+        data_quality (dict): Data quality scores of imputed categories from calculate_emissions (optional)
     
     Returns:
         BytesIO: PDF file as bytes
@@ -158,6 +179,8 @@ def create_pdf_report(company_data, total_emissions, emissions_by_scope, scope1_
         ["Emissions per Employee:", f"{total_emissions/company_data['employees']:.2f} tCO2e"],
         ["Emissions Intensity:", f"{total_emissions/company_data['revenue']:.2f} tCO2e per million USD"]
     ]
+    if data_quality:
+        emissions_info.append(["Data Quality Score:", f"{data_quality['overall']:.2f}"])
     emissions_table = Table(emissions_info, colWidths=[2*inch, 4*inch])
     emissions_table.setStyle(TableStyle([
         ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
@@ -188,7 +211,7 @@ def create_pdf_report(company_data, total_emissions, emissions_by_scope, scope1_
         elements.append(Paragraph("Scope 1 Emissions Breakdown", heading_style))
         scope1_data = [["Category", "Emissions (tCO2e)"]]
         for category, value in scope1_breakdown.items():
-            scope1_data.append([category, f"{value:.2f}"])
+            scope1_data.append([category + _imputed_note(data_quality, 'scope1', category), f"{value:.2f}"])
         scope1_table = Table(scope1_data, colWidths=[3*inch, 3*inch])
         scope1_table.setStyle(TableStyle([
             ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
@@ -203,7 +226,7 @@ def create_pdf_report(company_data, total_emissions, emissions_by_scope, scope1_
         elements.append(Paragraph("Scope 2 Emissions Breakdown", heading_style))
         scope2_data = [["Category", "Emissions (tCO2e)"]]
         for category, value in scope2_breakdown.items():
-            scope2_data.append([category, f"{value:.2f}"])
+            scope2_data.append([category + _imputed_note(data_quality, 'scope2', category), f"{value:.2f}"])
         scope2_table = Table(scope2_data, colWidths=[3*inch, 3*inch])
         scope2_table.setStyle(TableStyle([
             ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
@@ -218,7 +241,7 @@ def create_pdf_report(company_data, total_emissions, emissions_by_scope, scope1_
         elements.append(Paragraph("Scope 3 Emissions Breakdown", heading_style))
         scope3_data = [["Category", "Emissions (tCO2e)"]]
         for category, value in scope3_breakdown.items():
-            scope3_data.append([category, f"{value:.2f}"])
+            scope3_data.append([category + _imputed_note(data_quality, 'scope3', category), f"{value:.2f}"])
         scope3_table = Table(scope3_data, colWidths=[3*inch, 3*inch])
         scope3_table.setStyle(TableStyle([
             ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
@@ -0,0 +1,105 @@
+import hashlib
+import json
+from collections import OrderedDict
+import numpy as np
+from utils.constants import REDUCTION_TARGETS, SCOPE_TARGET_SPLITS
+
+# Target scenario sweeps
+# A full grid of reduction levels, target years, frameworks and scope splits
+# is evaluated in one batched array computation. Results are cached by a hash
+# of the inputs so repeated views of the same grid are served instantly.
+
+SCOPES = ["scope1", "scope2", "scope3"]
+MAX_CACHED_SWEEPS = 16
+
+_sweep_cache = OrderedDict()
+
+def _sweep_key(**inputs):
+    """Hash sweep inputs into a cache key"""
+    payload = json.dumps(inputs, sort_keys=True, default=lambda value: np.asarray(value).tolist())
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def run_target_sweep(scope_emissions, reductions, target_years, frameworks=None, splits=None,
+                     base_year=2023, end_year=2050):
+    """
+    Evaluate reduction pathways over a full scenario grid in one batched call
+
+    Each pathway reaches the swept reduction (scaled per scope by the split)
+    in the target year with a constant annual rate, then follows the
+    framework's annual reduction rate until its net zero year.
+
+    Args:
+        scope_emissions (dict): Base year emissions by scope (scope1, scope2, scope3)
+        reductions (list): Headline reduction percentages to sweep (0-100)
+        target_years (list): Target years to sweep
+        frameworks (list): Names from REDUCTION_TARGETS (defaults to all)
+        splits (list): Names from SCOPE_TARGET_SPLITS (defaults to all)
+        base_year (int): Base year
+        end_year (int): Last year of each pathway
+
+    Returns:
+        dict: Grid axes and read-only arrays indexed [reduction, target_year, framework, split, ...]
+    """
+    frameworks = list(frameworks) if frameworks is not None else list(REDUCTION_TARGETS.keys())
+    splits = list(splits) if splits is not None else list(SCOPE_TARGET_SPLITS.keys())
+    base = np.array([float(scope_emissions.get(scope, 0)) for scope in SCOPES])
+    reductions = np.asarray(reductions, dtype=np.float64)
+    target_years = np.asarray(target_years, dtype=np.int64)
+
+    key = _sweep_key(
+        base=base, reductions=reductions, target_years=target_years, frameworks=frameworks,
+        splits=splits, base_year=base_year, end_year=end_year
+    )
+    if key in _sweep_cache:
+        _sweep_cache.move_to_end(key)
+        return _sweep_cache[key]
+
+    years = np.arange(base_year, end_year + 1)
+    multipliers = np.array([[SCOPE_TARGET_SPLITS[s][scope] for scope in SCOPES] for s in splits])
+    annual_rates = np.array([REDUCTION_TARGETS[f]["annual"] for f in frameworks]) / 100
+    net_zero_years = np.array([REDUCTION_TARGETS[f]["net_zero_year"] for f in frameworks])
+
+    # Scope reductions per reduction level and split: (R, S, 3)
+    scope_reductions = np.clip(reductions[:, None, None] / 100 * multipliers[None, :, :], 0, 1)
+
+    # Progress towards each target year: (T, Y)
+    horizon = np.maximum(target_years - base_year, 1)[:, None]
+    progress = np.clip(years[None, :] - base_year, 0, horizon) / horizon
+    years_after_target = np.clip(years[None, :] - target_years[:, None], 0, None)
+
+    # Pre-target pathway weighted by scope emissions: (R, S, T, Y)
+    pre_target = np.einsum(
+        "k,rskty->rsty",
+        base,
+        (1 - scope_reductions)[:, :, :, None, None] ** progress[None, None, None, :, :]
+    )
+
+    # Post-target framework decay with net zero cut-off: (T, F, Y)
+    post_target = (1 - annual_rates)[None, :, None] ** years_after_target[:, None, :]
+    post_target = post_target * (years[None, None, :] < net_zero_years[None, :, None])
+
+    # Full grid: (R, T, F, S, Y)
+    emissions = pre_target.transpose(0, 2, 1, 3)[:, :, None, :, :] * post_target[None, :, :, None, :]
+
+    target_index = np.clip(target_years - base_year, 0, len(years) - 1)
+    target_emissions = emissions[:, np.arange(len(target_years)), :, :, target_index]
+    results = {
+        "reductions": reductions,
+        "target_years": target_years,
+        "frameworks": frameworks,
+        "splits": splits,
+        "years": years,
+        "emissions": emissions,
+        "cumulative_emissions": emissions.sum(axis=-1),
+        "target_emissions": np.moveaxis(target_emissions, 0, 1),
+        "scope_target_emissions": base[None, None, :] * (1 - scope_reductions)
+    }
+    for value in results.values():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+
+    _sweep_cache[key] = results
+    if len(_sweep_cache) > MAX_CACHED_SWEEPS:
+        _sweep_cache.popitem(last=False)
+
+    return results
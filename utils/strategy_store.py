@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from utils.constants import INDUSTRY_RECOMMENDATIONS
+from utils.macc import category_incidence
+
+# Strategy library
+# Strategies are loaded once from a JSON or Parquet file (reloaded when the
+# file changes) and indexed by scope, industry, cost level and timeframe.
+# Each index maps a value to the sorted row positions holding it, so filters
+# are set operations on small arrays instead of scans over the library.
+# Recommendations are scored against an emissions breakdown with one matrix
+# product and cached per profile.
+# The library is the single source of the abatement levers: 'categories' are
+# the breakdown categories a strategy covers (shell-style wildcards allowed),
+# 'abatement' the share of their emissions removed, 'cost_per_tonne' the
+# annualized net cost in USD per tCO2e abated (negative = net savings) and
+# strategies sharing an 'exclusive_group' are alternatives of which at most
+# one is selected. Per tCO2e/year of abatement, 'capex_per_tonne' is the
+# upfront investment in USD, 'lifetime' the years over which the lever
+# delivers abatement and 'energy_savings_per_tonne' the annual energy cost
+# savings in USD at current prices (negative = premium).
+
+STRATEGY_STORE_PATH = os.path.join("data", "strategies.json")
+INDEXED_FIELDS = {
+    "scope": "applicable_scope",
+    "industry": "industries",
+    "cost_level": "cost_level",
+    "timeframe": "implementation_time"
+}
+LEVER_FIELDS = ["name", "categories", "abatement", "cost_per_tonne", "timeframe", "exclusive_group",
+                "capex_per_tonne", "lifetime", "energy_savings_per_tonne"]
+MAX_CACHED_PROFILES = 64
+
+_store_cache = {}
+_recommendation_cache = OrderedDict()
+
+def _read_library(path):
+    """Read strategy records and industry recommendations from JSON or Parquet"""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path).to_dict("records"), INDUSTRY_RECOMMENDATIONS
+
+    with open(path) as f:
+        library = json.load(f)
+    if isinstance(library, list):
+        return library, INDUSTRY_RECOMMENDATIONS
+    return library["strategies"], library.get("industry_recommendations", INDUSTRY_RECOMMENDATIONS)
+
+def _build_index(values):
+    """Map each value (or each element of list values) to sorted row positions"""
+    exploded = pd.Series(list(values)).explode()
+    return {
+        value: np.sort(rows.to_numpy(dtype=np.int64))
+        for value, rows in pd.Series(exploded.index, index=exploded.to_numpy()).groupby(level=0)
+    }
+
+def load_strategy_store(path=STRATEGY_STORE_PATH):
+    """
+    Load the strategy library, reusing the in-memory store when the file is unchanged
+
+    Args:
+        path (str): JSON file (a list of strategies, or an object with 'strategies'
+            and 'industry_recommendations') or Parquet file of strategies
+
+    Returns:
+        dict: Strategy table, inverted indexes, lever definitions and industry recommendations
+    """
+    mtime = os.path.getmtime(path)
+    cached = _store_cache.get(path)
+    if cached is not None and cached["mtime"] == mtime:
+        return cached
+
+    records, recommendations = _read_library(path)
+    strategies = pd.DataFrame(records)
+    for column in ["co_benefits", "industries", "categories"]:
+        strategies[column] = strategies[column].map(list)
+    if "exclusive_group" not in strategies.columns:
+        strategies["exclusive_group"] = None
+    strategies["exclusive_group"] = strategies["exclusive_group"].astype(object).where(strategies["exclusive_group"].notna(), None)
+    missing = set(LEVER_FIELDS) - set(strategies.columns)
+    if missing:
+        raise ValueError(f"Strategy library is missing required fields: {', '.join(sorted(missing))}")
+
+    store = {
+        "path": path,
+        "mtime": mtime,
+        "strategies": strategies,
+        "indexes": {name: _build_index(strategies[column]) for name, column in INDEXED_FIELDS.items()},
+        "levers": strategies[LEVER_FIELDS]
+            .assign(scope=strategies["applicable_scope"].str.replace("Scope ", "scope"))
+            .to_dict("records"),
+        "industry_recommendations": recommendations,
+        "incidence": {}
+    }
+    _store_cache[path] = store
+    return store
+
+def query_strategies(store, scope=None, industry=None, cost_level=None, timeframe=None):
+    """
+    Find strategy rows matching all given filters
+
+    Each filter takes one value or a list of values (matched with OR). Industry
+    filters also match strategies applicable to 'All' industries. Timeframe
+    values match any indexed timeframe containing them, e.g. 'Short' matches
+    'Short-Medium'.
+
+    Args:
+        store (dict): Output of load_strategy_store
+        scope (str or list): Applicable scopes, e.g. 'Scope 1'
+        industry (str or list): Industries
+        cost_level (str or list): Cost levels
+        timeframe (str or list): Implementation times
+
+    Returns:
+        numpy.ndarray: Sorted row positions of matching strategies
+    """
+    indexes = store["indexes"]
+    rows = np.arange(len(store["strategies"]))
+
+    filters = {"scope": scope, "industry": industry, "cost_level": cost_level, "timeframe": timeframe}
+    for name, values in filters.items():
+        if values is None:
+            continue
+        values = [values] if isinstance(values, str) else list(values)
+        if name == "industry":
+            values = values + ["All"]
+        if name == "timeframe":
+            values = [key for key in indexes[name] if any(value in key for value in values)]
+
+        matches = [indexes[name][value] for value in values if value in indexes[name]]
+        if not matches:
+            return np.array([], dtype=np.int64)
+        rows = np.intersect1d(rows, np.unique(np.concatenate(matches)), assume_unique=True)
+
+    return rows
+
+def _incidence(store, categories):
+    """Category x strategy incidence matrix, cached per category set"""
+    key = tuple(categories)
+    if key not in store["incidence"]:
+        store["incidence"][key] = category_incidence(categories, store["levers"])
+    return store["incidence"][key]
+
+def score_strategies(store, breakdown, rows=None):
+    """
+    Score strategies by the emissions they could abate for a breakdown
+
+    Args:
+        store (dict): Output of load_strategy_store
+        breakdown (dict): Emissions by breakdown category in tCO2e
+        rows (array): Row positions to score (defaults to all strategies)
+
+    Returns:
+        numpy.ndarray: Standalone abatement per scored strategy in tCO2e/year
+    """
+    categories = sorted(breakdown)
+    incidence = _incidence(store, categories)
+    if rows is not None:
+        incidence = incidence[:, rows]
+    share = store["strategies"]["abatement"].to_numpy(dtype=np.float64)
+    share = share if rows is None else share[rows]
+
+    emissions = np.array([breakdown[category] for category in categories], dtype=np.float64)
+    return (emissions @ incidence) * share
+
+def recommend_strategies(store, breakdown, industry=None, scope=None, cost_level=None, timeframe=None, limit=None):
+    """
+    Rank matching strategies by abatement for an emissions profile
+
+    Results are cached per store version, breakdown and filters.
+
+    Args:
+        store (dict): Output of load_strategy_store
+        breakdown (dict): Emissions by breakdown category in tCO2e
+        industry, scope, cost_level, timeframe: Filters as in query_strategies
+        limit (int): Maximum number of strategies to return
+
+    Returns:
+        pandas.DataFrame: Matching strategies with abatement and share of total, best first
+    """
+    key = hashlib.sha256(json.dumps(
+        [store["path"], store["mtime"], sorted(breakdown.items()), industry, scope, cost_level, timeframe, limit],
+        default=str
+    ).encode()).hexdigest()
+    if key in _recommendation_cache:
+        _recommendation_cache.move_to_end(key)
+        return _recommendation_cache[key]
+
+    rows = query_strategies(store, scope=scope, industry=industry, cost_level=cost_level, timeframe=timeframe)
+    abatement = score_strategies(store, breakdown, rows) if breakdown else np.zeros(len(rows))
+    total = sum(breakdown.values())
+
+    order = np.argsort(-abatement, kind="stable")[:limit]
+    recommendations = store["strategies"].iloc[rows[order]].assign(
+        abatement=abatement[order],
+        abatement_share=abatement[order] / total if total > 0 else 0.0
+    ).reset_index(drop=True)
+
+    _recommendation_cache[key] = recommendations
+    if len(_recommendation_cache) > MAX_CACHED_PROFILES:
+        _recommendation_cache.popitem(last=False)
+
+    return recommendations
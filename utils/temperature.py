@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from utils.constants import SECTOR_PATHWAYS
+from utils.data_processing import calculate_target_trajectories
+
+# Implied temperature rise (ITR) scoring
+# Each entity's target trajectory (compound reduction to its target year,
+# then held flat or cut linearly to zero at its net zero year) is summed into
+# cumulative emissions to the pathway end year. Its budget is the same base
+# emissions following its sector's 1.5°C pathway. The overshoot ratio of the
+# two maps linearly to a temperature score: 1.5°C when the trajectory stays
+# within the budget, rising by DEGREES_PER_OVERSHOOT per budget overshot.
+# Entities are handled as rows of one entity x year array, so tens of
+# thousands are scored in a single pass.
+
+ENTITY_COLUMNS = ["entity_id", "industry", "base_emissions", "reduction_percentage", "target_year"]
+PATHWAY_END_YEAR = 2050
+BUDGET_TEMPERATURE = 1.5
+DEGREES_PER_OVERSHOOT = 1.5  # Emissions held flat to 2050 score about 3°C
+TEMPERATURE_BOUNDS = (1.2, 6.0)
+DEFAULT_SECTOR = "Other"
+
+def sector_pathways(base_year=2023, end_year=PATHWAY_END_YEAR, pathways=SECTOR_PATHWAYS):
+    """
+    Remaining share of base emissions under each sector pathway
+
+    Reductions are interpolated linearly between milestones, starting from
+    no reduction in the base year and holding the last milestone.
+
+    Args:
+        base_year (int): Base year for calculations
+        end_year (int): Last year of the pathways
+        pathways (dict): Reduction (%) by milestone year for each sector
+
+    Returns:
+        tuple: (sector names, remaining shares indexed [sector, year])
+    """
+    years = np.arange(base_year, end_year + 1)
+    sectors = list(pathways)
+    remaining = np.empty((len(sectors), len(years)))
+    for s, sector in enumerate(sectors):
+        milestones = sorted((year, reduction) for year, reduction in pathways[sector].items() if year > base_year)
+        milestone_years = [base_year] + [year for year, _ in milestones]
+        reductions = [0.0] + [reduction for _, reduction in milestones]
+        remaining[s] = 1 - np.interp(years, milestone_years, reductions) / 100
+    return sectors, remaining
+
+def target_pathways(reduction_percentages, target_years, net_zero_years=None, base_year=2023, end_year=PATHWAY_END_YEAR):
+    """
+    Remaining share of base emissions on each entity's target trajectory
+
+    Args:
+        reduction_percentages (array): Reduction by target year per entity
+        target_years (array): Target year per entity
+        net_zero_years (array): Net zero year per entity (NaN or None to hold the target level)
+        base_year (int): Base year for calculations
+        end_year (int): Last year of the trajectories
+
+    Returns:
+        numpy.ndarray: Remaining shares indexed [entity, year]
+    """
+    trajectories = calculate_target_trajectories(1.0, reduction_percentages, target_years, base_year, end_year=end_year)
+    remaining = trajectories['reduction_factors']
+    if net_zero_years is None:
+        return remaining
+
+    # Linear cut from the target level to zero in the net zero year
+    years = trajectories['years'][None, :]
+    target_years = trajectories['target_years'][:, None].astype(np.float64)
+    net_zero_years = np.asarray(net_zero_years, dtype=np.float64)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        left = np.clip((net_zero_years - years) / (net_zero_years - target_years), 0.0, 1.0)
+    after_target = (years > target_years) & ~np.isnan(net_zero_years)
+    return np.where(after_target, remaining * np.nan_to_num(left), remaining)
+
+def temperature_score(overshoot_ratio):
+    """
+    Map cumulative overshoot ratios to implied temperature rise
+
+    Args:
+        overshoot_ratio (float or array): Cumulative emissions over the pathway budget
+
+    Returns:
+        float or numpy.ndarray: Temperature score in °C
+    """
+    ratio = np.asarray(overshoot_ratio, dtype=np.float64)
+    temperature = np.clip(BUDGET_TEMPERATURE + DEGREES_PER_OVERSHOOT * (ratio - 1), *TEMPERATURE_BOUNDS)
+    return temperature if temperature.ndim else float(temperature)
+
+def score_entities(entities, base_year=2023, end_year=PATHWAY_END_YEAR, pathways=SECTOR_PATHWAYS):
+    """
+    Score the temperature alignment of entity targets against sector pathways
+
+    Args:
+        entities (pandas.DataFrame): Entities with entity_id, industry, base_emissions (tCO2e),
+            reduction_percentage and target_year, plus an optional net_zero_year
+        base_year (int): Base year of the emissions and pathways
+        end_year (int): Last year of the cumulative comparison
+        pathways (dict): Reduction (%) by milestone year for each sector
+
+    Returns:
+        pandas.DataFrame: Entities with cumulative emissions, pathway budget,
+            overshoot ratio and temperature score
+    """
+    missing = set(ENTITY_COLUMNS) - set(entities.columns)
+    if missing:
+        raise ValueError(f"Entities are missing required columns: {', '.join(sorted(missing))}")
+    if end_year <= base_year:
+        raise ValueError("End year must be after the base year")
+
+    entities = entities.reset_index(drop=True)
+    base = pd.to_numeric(entities["base_emissions"], errors="coerce").fillna(0.0).clip(lower=0.0).to_numpy()
+    reductions = pd.to_numeric(entities["reduction_percentage"], errors="coerce").fillna(0.0).clip(0.0, 100.0).to_numpy()
+    target_years = pd.to_numeric(entities["target_year"], errors="coerce").fillna(end_year).to_numpy(dtype=np.int64)
+    net_zero_years = pd.to_numeric(entities["net_zero_year"], errors="coerce").to_numpy(dtype=np.float64) \
+        if "net_zero_year" in entities.columns else None
+
+    sectors, pathway_remaining = sector_pathways(base_year, end_year, pathways)
+    sector_codes = pd.Categorical(entities["industry"], categories=sectors).codes
+    sector_codes = np.where(sector_codes >= 0, sector_codes, sectors.index(DEFAULT_SECTOR))
+
+    target_remaining = target_pathways(reductions, target_years, net_zero_years, base_year, end_year)
+    cumulative = base * target_remaining.sum(axis=1)
+    budget = base * pathway_remaining.sum(axis=1)[sector_codes]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overshoot = np.where(budget > 0, cumulative / budget, 1.0)
+
+    return entities.assign(
+        cumulative_emissions=cumulative,
+        pathway_budget=budget,
+        overshoot_ratio=overshoot,
+        temperature=temperature_score(overshoot)
+    )
+
+def portfolio_temperature(scores, weights=None):
+    """
+    Aggregate entity temperature scores
+
+    Args:
+        scores (pandas.DataFrame): Output of score_entities
+        weights (array): Weight per entity, e.g. ownership share (defaults to base emissions)
+
+    Returns:
+        dict: Weighted temperature, shares of entities aligned with 1.5°C and
+            well below 2°C, and scores by industry
+    """
+    weights = scores["base_emissions"].to_numpy(dtype=np.float64) if weights is None else np.asarray(weights, dtype=np.float64)
+    total_weight = weights.sum()
+    temperature = scores["temperature"].to_numpy()
+
+    by_industry = scores.assign(weight=weights, weighted=temperature * weights).groupby("industry").agg(
+        entities=("temperature", "size"),
+        weight=("weight", "sum"),
+        weighted=("weighted", "sum"),
+        mean_temperature=("temperature", "mean"),
+        median_temperature=("temperature", "median")
+    )
+    by_industry["temperature"] = np.where(
+        by_industry["weight"] > 0,
+        by_industry["weighted"] / by_industry["weight"].where(by_industry["weight"] > 0, 1.0),
+        by_industry["mean_temperature"]
+    )
+    by_industry = by_industry[["entities", "temperature", "median_temperature"]].reset_index()
+
+    return {
+        "temperature": float(np.average(temperature, weights=weights)) if total_weight > 0 else float(temperature.mean()),
+        "aligned_share": float((temperature <= BUDGET_TEMPERATURE).mean() * 100),
+        "below_2c_share": float((temperature < 2.0).mean() * 100),
+        "by_industry": by_industry
+    }
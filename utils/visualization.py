@@ -100,7 +100,8 @@ def create_emissions_bar_chart(categories, values, scopes):
     
     return fig
 
-def create_reduction_pathway_chart(base_year, base_emissions, target_year, target_emissions):
+def create_reduction_pathway_chart(base_year, base_emissions, target_year, target_emissions,
+                                   budget_years=None, budget_emissions=None):
     """
     Create a line chart showing the emissions reduction pathway
     
@@ -109,6 +110,8 @@ def create_reduction_pathway_chart(base_year, base_emissions, target_year, targe
         base_emissions (float): Base year emissions
         target_year (int): Target year
         target_emissions (float): Target year emissions
+        budget_years (list): Years of a carbon-budget pathway to overlay (optional)
+        budget_emissions (list): Emissions of the carbon-budget pathway (optional)
         
     Returns:
         plotly.graph_objects.Figure: Line chart figure
@@ -123,18 +126,33 @@ def create_reduction_pathway_chart(base_year, base_emissions, target_year, targe
     # Linear pathway
     linear_emissions = [base_emissions - annual_reduction * i for i in range(len(years))]
     
+    # Compound pathway (constant annual rate)
+    annual_factor = (target_emissions / base_emissions) ** (1 / num_years) if base_emissions > 0 else 0
+    compound_emissions = [base_emissions * annual_factor ** i for i in range(len(years))]
+    
     # Create dataframe for plotting
     df = pd.DataFrame({
-        'Year': years,
-        'Emissions (tCO2e)': linear_emissions
+        'Year': years + years,
+        'Emissions (tCO2e)': linear_emissions + compound_emissions,
+        'Pathway': ['Linear'] * len(years) + ['Compound'] * len(years)
     })
     
+    if budget_years is not None and budget_emissions is not None:
+        df = pd.concat([df, pd.DataFrame({
+            'Year': list(budget_years),
+            'Emissions (tCO2e)': list(budget_emissions),
+            'Pathway': ['Carbon Budget'] * len(budget_years)
+        })])
+    
+    end_year = int(df['Year'].max())
+    
     # Create line chart
     fig = px.line(
         df,
         x='Year',
         y='Emissions (tCO2e)',
-        title=f"Emissions Reduction Pathway ({base_year}-{target_year})",
+        color='Pathway',
+        title=f"Emissions Reduction Pathway ({base_year}-{end_year})",
         markers=True
     )
     
@@ -189,19 +207,20 @@ def create_reduction_pathway_chart(base_year, base_emissions, target_year, targe
     fig.update_xaxes(
         tickmode='linear',
         tick0=base_year,
-        dtick=max(1, (target_year - base_year) // 5)  # Set tick spacing based on time range
+        dtick=max(1, (end_year - base_year) // 5)  # Set tick spacing based on time range
     )
     
     return fig
 
-def create_scope_comparison_radar_chart(company_values, industry_values, labels):
+def create_scope_comparison_radar_chart(company_values, industry_values, labels, comparison_name="Industry Average"):
     """
     Create a radar chart comparing company scope distribution with industry average
     
     Args:
         company_values (list): List of company percentages by scope
-        industry_values (list): List of industry average percentages by scope
+        industry_values (list): List of industry average (or peer) percentages by scope
         labels (list): List of scope labels
+        comparison_name (str): Legend name of the comparison values
         
     Returns:
         plotly.graph_objects.Figure: Radar chart figure
@@ -219,7 +238,7 @@ def create_scope_comparison_radar_chart(company_values, industry_values, labels)
         r=industry_values,
         theta=labels,
         fill='toself',
-        name='Industry Average'
+        name=comparison_name
     ))
     
     fig.update_layout(
@@ -352,3 +371,168 @@ def create_carbon_credit_comparison_chart(offset_amount, credit_types, price_sce
     )
     
     return fig
+
+def create_sweep_heatmap(values, reductions, target_years, title, colorbar_title="Emissions (tCO2e)"):
+    """
+    Create a heatmap of a scenario sweep metric over reduction level and target year
+    
+    Args:
+        values (numpy.ndarray): Metric indexed [reduction, target_year]
+        reductions (list): Reduction percentages (x axis)
+        target_years (list): Target years (y axis)
+        title (str): Chart title
+        colorbar_title (str): Label for the color scale
+        
+    Returns:
+        plotly.graph_objects.Figure: Heatmap figure
+    """
+    fig = px.imshow(
+        np.asarray(values).T,
+        x=[f"{r:g}%" for r in reductions],
+        y=[str(y) for y in target_years],
+        labels=dict(x="Reduction by Target Year", y="Target Year", color=colorbar_title),
+        color_continuous_scale="Greens_r",
+        aspect="auto",
+        title=title
+    )
+    
+    fig.update_layout(
+        plot_bgcolor="white",
+        margin=dict(t=60, b=60, l=60, r=30)
+    )
+    
+    return fig
+
+def create_sweep_small_multiples(years, pathways, reduction_labels, framework_names, title):
+    """
+    Create small-multiple line charts of swept pathways, one panel per framework
+    
+    Args:
+        years (list): Years of each pathway
+        pathways (numpy.ndarray): Emissions indexed [reduction, framework, year]
+        reduction_labels (list): Labels for the reduction levels (one line each)
+        framework_names (list): Framework names (one panel each)
+        title (str): Chart title
+        
+    Returns:
+        plotly.graph_objects.Figure: Faceted line chart figure
+    """
+    pathways = np.asarray(pathways)
+    num_reductions, num_frameworks, num_years = pathways.shape
+    
+    df = pd.DataFrame({
+        'Year': np.tile(years, num_reductions * num_frameworks),
+        'Emissions (tCO2e)': pathways.reshape(-1),
+        'Reduction': np.repeat(reduction_labels, num_frameworks * num_years),
+        'Framework': np.tile(np.repeat(framework_names, num_years), num_reductions)
+    })
+    
+    fig = px.line(
+        df,
+        x='Year',
+        y='Emissions (tCO2e)',
+        color='Reduction',
+        facet_col='Framework',
+        title=title,
+        color_discrete_sequence=px.colors.sequential.Greens_r
+    )
+    
+    fig.update_layout(
+        plot_bgcolor="white",
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.3,
+            xanchor="center",
+            x=0.5
+        ),
+        margin=dict(t=80, b=100, l=60, r=30)
+    )
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+    
+    return fig
+
+def create_macc_chart(names, abatement, cost_per_tonne, selected=None, title="Marginal Abatement Cost Curve"):
+    """
+    Create a marginal abatement cost curve with one bar per lever
+    
+    Bar widths are the abatement volumes and heights the cost per tonne,
+    with levers placed side by side in merit order.
+    
+    Args:
+        names (list): Lever names in merit order
+        abatement (list): Abatement per lever in tCO2e/year
+        cost_per_tonne (list): Cost per tonne abated in USD/tCO2e
+        selected (list): Names of levers in the optimized portfolio (optional)
+        title (str): Chart title
+        
+    Returns:
+        plotly.graph_objects.Figure: Bar chart figure
+    """
+    abatement = np.asarray(abatement, dtype=float)
+    cost_per_tonne = np.asarray(cost_per_tonne, dtype=float)
+    starts = np.concatenate([[0.0], np.cumsum(abatement)[:-1]])
+    selected = set(selected or [])
+    
+    colors = [
+        '#2ecc71' if name in selected else ('#95a5a6' if selected else ('#3498db' if cost >= 0 else '#2ecc71'))
+        for name, cost in zip(names, cost_per_tonne)
+    ]
+    
+    fig = go.Figure(go.Bar(
+        x=starts + abatement / 2,
+        y=cost_per_tonne,
+        width=abatement,
+        marker_color=colors,
+        marker_line=dict(color='white', width=1),
+        text=names,
+        hovertemplate='%{text}<br>Abatement: %{width:,.2f} tCO2e/yr<br>Cost: $%{y:,.0f}/tCO2e<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title="Cumulative Abatement (tCO2e/year)",
+        yaxis_title="Cost (USD/tCO2e)",
+        plot_bgcolor="white",
+        showlegend=False,
+        bargap=0
+    )
+    
+    return fig
+
+def create_decomposition_waterfall(base_label, base_total, effects, comparison_label, comparison_total,
+                                   title="Drivers of Emissions Change"):
+    """
+    Create a waterfall chart from base year emissions through driver effects to comparison year emissions
+    
+    Args:
+        base_label (str): Label of the base year bar
+        base_total (float): Base year emissions in tCO2e
+        effects (dict): Effect name to change in tCO2e
+        comparison_label (str): Label of the comparison year bar
+        comparison_total (float): Comparison year emissions in tCO2e
+        title (str): Chart title
+        
+    Returns:
+        plotly.graph_objects.Figure: Waterfall chart figure
+    """
+    fig = go.Figure(go.Waterfall(
+        x=[base_label] + [f"{name.title()} Effect" for name in effects] + [comparison_label],
+        y=[base_total] + list(effects.values()) + [comparison_total],
+        measure=["absolute"] + ["relative"] * len(effects) + ["total"],
+        text=[f"{base_total:,.1f}"] + [f"{value:+,.1f}" for value in effects.values()] + [f"{comparison_total:,.1f}"],
+        textposition="outside",
+        increasing=dict(marker=dict(color="#e74c3c")),
+        decreasing=dict(marker=dict(color="#2ecc71")),
+        totals=dict(marker=dict(color="#3498db")),
+        connector=dict(line=dict(color="#95a5a6"))
+    ))
+    
+    fig.update_layout(
+        title=title,
+        yaxis_title="Emissions (tCO2e)",
+        plot_bgcolor="white",
+        showlegend=False
+    )
+    
+    return fig